@@ -0,0 +1,96 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Validation of the single precision beam coordinates: the same bunch is
+tracked in a stationary bucket in double and single precision, and the drift
+of the r.m.s. emittance, the bunch length and the tracking time are compared.
+"""
+
+from __future__ import division, print_function
+import time
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.trackers.tracker import RingAndRFTracker
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import CutOptions, Profile
+
+
+# LHC flat bottom --------------------------------------------------------------------
+# Bunch parameters
+N_b = 1e9           # Intensity
+N_p = 100000        # Macro-particles
+tau_0 = 0.4e-9      # Initial bunch length, 4 sigma [s]
+
+# Machine and RF parameters
+C = 26658.883        # Machine circumference [m]
+p_s = 450e9          # Synchronous momentum [eV/c]
+h = 35640            # Harmonic number
+V = 6e6              # RF voltage [V]
+dphi = 0             # Phase modulation/offset
+gamma_t = 55.759505  # Transition gamma
+alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+
+# Tracking details
+N_t = 10000          # Number of turns to track
+dt_stat = 1000       # Turns between two statistics
+# LHC flat bottom --------------------------------------------------------------------
+
+
+def run(precision):
+
+    ring = Ring(C, alpha, p_s, Proton(), N_t)
+    rf = RFStation(ring, [h], [V], [dphi])
+    beam = Beam(ring, N_p, N_b, precision=precision)
+    bigaussian(ring, rf, beam, tau_0/4, reinsertion=True, seed=1)
+    profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                       cut_right=rf.t_rf[0, 0]))
+    tracker = RingAndRFTracker(rf, beam)
+
+    emittance = []
+    sigma_dt = []
+    tracking_time = 0.
+    for i in range(1, N_t + 1):
+        t0 = time.time()
+        tracker.track()
+        profile.track()
+        tracking_time += time.time() - t0
+        if (i % dt_stat) == 0:
+            beam.statistics()
+            emittance.append(beam.epsn_rms_l)
+            sigma_dt.append(beam.sigma_dt)
+
+    return np.array(emittance), np.array(sigma_dt), tracking_time, \
+        profile.n_macroparticles
+
+
+emit_d, sigma_d, time_d, profile_d = run('double')
+emit_s, sigma_s, time_s, profile_s = run('single')
+
+print("Single vs double precision, %d macro-particles, %d turns"
+      % (N_p, N_t))
+print("%8s %16s %16s %12s %12s" % ("turn", "emittance [eVs]",
+                                    "emittance [eVs]", "rel. diff.",
+                                    "sigma_dt"))
+print("%8s %16s %16s %12s %12s" % ("", "double", "single", "emittance",
+                                    "rel. diff."))
+for i in range(len(emit_d)):
+    print("%8d %16.8e %16.8e %12.3e %12.3e"
+          % ((i + 1)*dt_stat, emit_d[i], emit_s[i],
+             emit_s[i]/emit_d[i] - 1, sigma_s[i]/sigma_d[i] - 1))
+print("")
+print("Emittance drift over the run: double %.3e, single %.3e"
+      % (emit_d[-1]/emit_d[0] - 1, emit_s[-1]/emit_s[0] - 1))
+print("Max. profile difference: %.3e of the peak"
+      % (np.max(np.abs(profile_s - profile_d))/np.max(profile_d)))
+print("Tracking time: double %.2f s, single %.2f s, speedup %.2f"
+      % (time_d, time_s, time_d/time_s))
@@ -0,0 +1,94 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Benchmark of the sorting of the macro-particles by arrival time: the slicing
+and the interpolated kick with a fine profile are timed for a beam in random
+order and for the same beam sorted every sort_period turns.
+"""
+
+from __future__ import division, print_function
+import time
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.trackers.tracker import RingAndRFTracker
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import CutOptions, Profile
+
+
+# LHC flat bottom --------------------------------------------------------------------
+# Bunch parameters
+N_b = 1e9           # Intensity
+N_p = 2000000       # Macro-particles
+tau_0 = 0.4e-9      # Initial bunch length, 4 sigma [s]
+
+# Machine and RF parameters
+C = 26658.883        # Machine circumference [m]
+p_s = 450e9          # Synchronous momentum [eV/c]
+h = 35640            # Harmonic number
+V = 6e6              # RF voltage [V]
+dphi = 0             # Phase modulation/offset
+gamma_t = 55.759505  # Transition gamma
+alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+
+# Tracking details
+N_t = 200            # Number of turns to track
+n_slices = 1000000   # Number of slices
+sort_period = 20     # Turns between two sortings
+# LHC flat bottom --------------------------------------------------------------------
+
+
+def run(sort_period):
+
+    ring = Ring(C, alpha, p_s, Proton(), N_t)
+    rf = RFStation(ring, [h], [V], [dphi])
+    beam = Beam(ring, N_p, N_b, sort_period=sort_period)
+    bigaussian(ring, rf, beam, tau_0/4, reinsertion=True, seed=1)
+    profile = Profile(beam, CutOptions(n_slices=n_slices, cut_left=0,
+                                       cut_right=rf.t_rf[0, 0]))
+    tracker = RingAndRFTracker(rf, beam, interpolation=True, Profile=profile)
+
+    time_slice = 0.
+    time_tracker = 0.
+    time_sort = 0.
+    for i in range(N_t):
+        t0 = time.time()
+        profile.track()
+        t1 = time.time()
+        tracker.track()
+        t2 = time.time()
+        beam.track()
+        t3 = time.time()
+        time_slice += t1 - t0
+        time_tracker += t2 - t1
+        time_sort += t3 - t2
+
+    return time_slice, time_tracker, time_sort, profile.n_macroparticles
+
+
+slice_u, tracker_u, sort_u, profile_u = run(0)
+slice_s, tracker_s, sort_s, profile_s = run(sort_period)
+
+print("Particle sorting, %d macro-particles, %d slices, %d turns, "
+      "sorting every %d turns" % (N_p, n_slices, N_t, sort_period))
+print("%20s %12s %12s %10s" % ("", "unsorted [s]", "sorted [s]", "speedup"))
+print("%20s %12.3f %12.3f %10.2f" % ("slicing", slice_u, slice_s,
+                                    slice_u/slice_s))
+print("%20s %12.3f %12.3f %10.2f" % ("interpolated kick", tracker_u,
+                                    tracker_s, tracker_u/tracker_s))
+print("%20s %12.3f %12.3f" % ("sorting", sort_u, sort_s))
+total_u = slice_u + tracker_u + sort_u
+total_s = slice_s + tracker_s + sort_s
+print("%20s %12.3f %12.3f %10.2f" % ("total", total_u, total_s,
+                                    total_u/total_s))
+print("Max. profile difference: %.1f macro-particles"
+      % np.max(np.abs(profile_s - profile_u)))
@@ -4,20 +4,77 @@ import sys
 
 path = os.path.realpath(__file__)
 basepath = os.sep.join(path.split(os.sep)[:-1])
-libblond = None
-try:
+
+# Instruction set specific builds of the library (compile.py --variants) and
+# the CPU features they need, from the most to the least specific
+libblond_variants = [('avx512', ['avx2', 'fma', 'avx512f', 'avx512cd',
+                                 'avx512bw', 'avx512dq', 'avx512vl']),
+                     ('avx2', ['avx2', 'fma'])]
+
+
+def cpu_features():
+    """Function returning the set of the features (flags) of the CPU, empty
+    if they cannot be read.
+    """
+
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith('flags'):
+                    return set(line.split(':', 1)[1].split())
+    except (IOError, OSError):
+        pass
+    return set()
+
+
+def _load_libblond():
+    """Loads the most specific variant of the library supported by the CPU;
+    the environment variable BLOND_LIBRARY_VARIANT=generic|avx2|avx512
+    forces a variant.
+    """
+
     if ('posix' in os.name):
-        libblond = ctypes.CDLL(os.path.join(
-            basepath, 'cpp_routines/libblond.so'))
+        extension = '.so'
     elif ('win' in sys.platform):
-        libblond = ctypes.CDLL(os.path.join(
-            basepath, 'cpp_routines\\libblond.dll'))
+        extension = '.dll'
     else:
         print('YOU DO NOT HAVE A WINDOWS OR LINUX OPERATING SYSTEM. ABORTING...')
         sys.exit()
+
+    requested = os.environ.get('BLOND_LIBRARY_VARIANT', '').lower()
+    if requested:
+        candidates = [requested]
+    else:
+        features = cpu_features()
+        candidates = [variant for variant, needed in libblond_variants
+                      if features.issuperset(needed)]
+        candidates.append('generic')
+
+    for variant in candidates:
+        if variant == 'generic':
+            libname = 'libblond' + extension
+        else:
+            libname = 'libblond_' + variant + extension
+        libpath = os.path.join(basepath, 'cpp_routines', libname)
+        if os.path.isfile(libpath) or variant == candidates[-1]:
+            return ctypes.CDLL(libpath), variant, libpath
+
+
+def get_libblond_variant():
+    """Function returning the variant of the compiled library that was loaded
+    ('generic', 'avx2' or 'avx512'), None if no library was loaded.
+    """
+
+    return libblond_variant
+
+
+libblond = None
+libblond_variant = None
+libblond_path = None
+try:
+    libblond, libblond_variant, libblond_path = _load_libblond()
 except OSError as e:
     print("""
         Warning: The compiled blond library was not found.
-        You can safely ignore this warning if you are in 
+        You can safely ignore this warning if you are in
         the process of compiling the library.""")
-
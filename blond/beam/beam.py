@@ -18,7 +18,8 @@ from __future__ import division
 from builtins import object
 import numpy as np
 from scipy.constants import m_p, m_e, e, c
-from ..trackers.utilities import is_in_separatrix
+from ..trackers.utilities import is_in_separatrix, separatrix_parameters
+from ..utils import bmath as bm
 
 class Particle(object):
 
@@ -66,6 +67,14 @@ class Beam(object):
         total number of macroparticles.
     intensity : float
         total intensity of the beam (in number of charge).
+    precision : str
+        precision of the beam coordinates, 'double' (default) or 'single'.
+        In single precision, dt and dE are stored as float32 to halve the
+        memory footprint and bandwidth of tracking; the kick, drift and
+        statistics are still computed in double precision.
+    sort_period : int
+        number of calls of track() between two sortings of the macro-particles
+        by arrival time, see sort_particles(); 0 (default) to never sort.
   
     Attributes
     ----------
@@ -93,6 +102,10 @@ class Beam(object):
         standard deviation of beam arrival time [s].
     sigma_dE : float
         standard deviation of beam energy offset [eV].
+    skewness_dt, skewness_dE : float
+        skewness of beam arrival time and energy offset [].
+    kurtosis_dt, kurtosis_dE : float
+        excess kurtosis of beam arrival time and energy offset [].
     intensity : float
         total intensity of the beam in number of charges [].
     n_macroparticles : int
@@ -103,6 +116,15 @@ class Beam(object):
         number of macro-particles marked as 'lost' [].
     id : numpy_array, int
         unique macro-particle ID number; zero if particle is 'lost'.
+    dtype : numpy dtype
+        type of the dt and dE arrays (numpy.float64 or numpy.float32).
+    sort_period : int
+        number of calls of track() between two sortings by arrival time.
+    compaction_threshold : float
+        fraction of lost macro-particles above which track() eliminates
+        them from the coordinate arrays; 0 if never.
+    n_macroparticles_eliminated : int
+        number of lost macro-particles eliminated from the arrays [].
         
     See Also
     ---------
@@ -127,23 +149,86 @@ class Beam(object):
     >>> my_beam = Beam(ring, n_macroparticle, intensity)
     """
 
-    def __init__(self, Ring, n_macroparticles, intensity):
+    def __init__(self, Ring, n_macroparticles, intensity,
+                 precision='double', sort_period=0, compaction_threshold=0.):
+
+        if precision == 'double':
+            self.dtype = np.float64
+        elif precision == 'single':
+            self.dtype = np.float32
+        else:
+            raise RuntimeError("ERROR in Beam: precision should be 'double'" +
+                               " or 'single'!")
+        self.precision = precision
 
         self.Particle = Ring.Particle
         self.beta = Ring.beta[0][0]
         self.gamma = Ring.gamma[0][0]
         self.energy = Ring.energy[0][0]
         self.momentum = Ring.momentum[0][0]
-        self.dt = np.zeros([int(n_macroparticles)])
-        self.dE = np.zeros([int(n_macroparticles)])
+        self.dt = np.zeros([int(n_macroparticles)], dtype=self.dtype)
+        self.dE = np.zeros([int(n_macroparticles)], dtype=self.dtype)
         self.mean_dt = 0.
         self.mean_dE = 0.
         self.sigma_dt = 0.
         self.sigma_dE = 0.
+        self.skewness_dt = 0.
+        self.skewness_dE = 0.
+        self.kurtosis_dt = 0.
+        self.kurtosis_dE = 0.
         self.intensity = float(intensity) 
         self.n_macroparticles = int(n_macroparticles)
         self.ratio = self.intensity/self.n_macroparticles
         self.id = np.arange(1, self.n_macroparticles + 1, dtype=int)
+        self.sort_period = int(sort_period)
+        if self.sort_period < 0:
+            raise RuntimeError("ERROR in Beam: sort_period should be a" +
+                               " positive number of turns!")
+        self.sort_counter = 0
+        self.compaction_threshold = float(compaction_threshold)
+        if not 0 <= self.compaction_threshold < 1:
+            raise RuntimeError("ERROR in Beam: compaction_threshold should" +
+                               " be a fraction of the macro-particles" +
+                               " between 0 and 1!")
+        self.n_macroparticles_eliminated = 0
+
+    @property
+    def dt(self):
+        '''Beam arrival times, defined as @property to keep the precision of
+        the Beam when the array is replaced.
+
+        Returns
+        -------
+        dt : numpy_array, float
+            beam arrival times with respect to synchronous time [s].
+
+        '''
+
+        return self._dt
+
+    @dt.setter
+    def dt(self, value):
+
+        self._dt = np.asarray(value, dtype=self.dtype)
+
+    @property
+    def dE(self):
+        '''Beam energy offsets, defined as @property to keep the precision of
+        the Beam when the array is replaced.
+
+        Returns
+        -------
+        dE : numpy_array, float
+            beam energy offset with respect to the synchronous particle [eV].
+
+        '''
+
+        return self._dE
+
+    @dE.setter
+    def dE(self, value):
+
+        self._dE = np.asarray(value, dtype=self.dtype)
 
     @property
     def n_macroparticles_lost(self):
@@ -152,11 +237,12 @@ class Beam(object):
         Returns
         -------        
         n_macroparticles_lost : int
-            number of macroparticles lost.
+            number of macroparticles lost, including the eliminated ones.
             
         '''
         
-        return len( np.where( self.id == 0 )[0] )
+        return (int(np.count_nonzero(self.id == 0)) +
+                self.n_macroparticles_eliminated)
 
     @property
     def n_macroparticles_alive(self):
@@ -169,23 +255,78 @@ class Beam(object):
             
         '''
 
-        return self.n_macroparticles - self.n_macroparticles_lost
+        return self.n_macroparticles - int(np.count_nonzero(self.id == 0))
 
 
+    def sort_particles(self):
+        '''
+        Sorting of the macro-particles by arrival time. The dt, dE and id
+        arrays are reordered together and in place, so that the slicing and
+        the interpolated kick access the profile and the voltage arrays
+        sequentially. Particle-wise results do not depend on the order, but
+        the particles have to be identified by id after a sorting.
+
+        The particles are bucket-sorted into 2^15 - 1 buckets of arrival time
+        (radix sort of int16 keys, linear in the number of particles); the
+        order inside a bucket is kept.
+        '''
+
+        dt_min = np.min(self.dt)
+        dt_max = np.max(self.dt)
+        if dt_max <= dt_min:
+            return
+        n_buckets = np.iinfo(np.int16).max
+        buckets = ((self.dt - dt_min) * ((n_buckets - 0.5) /
+                                         (dt_max - dt_min))).astype(np.int16)
+        order = np.argsort(buckets, kind='stable')
+        self.dt[:] = self.dt[order]
+        self.dE[:] = self.dE[order]
+        self.id[:] = self.id[order]
+
+    def track(self):
+        '''
+        Sorting of the macro-particles by arrival time every sort_period
+        calls, and elimination of the lost macro-particles when their
+        fraction exceeds compaction_threshold; the Beam can be added to the
+        list of objects tracked every turn. Nothing is done if sort_period
+        and compaction_threshold are 0.
+        '''
+
+        if self.compaction_threshold > 0:
+            if (np.count_nonzero(self.id == 0) >
+                    self.compaction_threshold * self.n_macroparticles):
+                self.eliminate_lost_particles()
+
+        if self.sort_period > 0:
+            self.sort_counter += 1
+            if self.sort_counter >= self.sort_period:
+                self.sort_particles()
+                self.sort_counter = 0
+
     def eliminate_lost_particles(self):
-        """Eliminate lost particles from the beam coordinate arrays
-        """
-        
-        indexalive = np.where( self.id == 0 )[0]
-        if len(indexalive) < self.n_macroparticles:
-            self.dt = np.ascontiguousarray(self.beam.dt[indexalive])
-            self.dE = np.ascontiguousarray(self.beam.dE[indexalive])
-            self.n_macroparticles = len(self.beam.dt)
-        else:
-            raise RuntimeError("ERROR in Beams: all particles lost and"+
-                " eliminated!")    
+        '''
+        Elimination of the lost macro-particles (id 0) from the beam
+        coordinate arrays, so that they are no longer tracked and sliced. The
+        macro-particles that are not lost are moved to the beginning of the
+        dt, dE and id arrays, keeping their order, and the arrays are replaced
+        by views of this part: no memory is allocated. The number of
+        macro-particles and the intensity are reduced accordingly; the
+        intensity per macro-particle is kept.
+        '''
+
+        n_macroparticles = self.n_macroparticles
+        n_alive = bm.compact_lost_particles(self)
+        if n_alive == 0:
+            raise RuntimeError("ERROR in Beam: all particles lost and" +
+                               " eliminated!")
+        if n_alive < n_macroparticles:
+            self.dt = self.dt[:n_alive]
+            self.dE = self.dE[:n_alive]
+            self.id = self.id[:n_alive]
+            self.n_macroparticles = n_alive
+            self.n_macroparticles_eliminated += n_macroparticles - n_alive
+            self.intensity = self.ratio * n_alive
 
-        
     def statistics(self):
         '''
         Calculation of the mean and standard deviation of beam coordinates,
@@ -196,20 +337,85 @@ class Beam(object):
         - mean_dE
         - sigma_dt
         - sigma_dE
+        - skewness_dt
+        - skewness_dE
+        - kurtosis_dt (excess kurtosis, zero for a Gaussian distribution)
+        - kurtosis_dE
+        - n_alive (number of macro-particles not flagged as lost)
         '''
 
-        # Statistics only for particles that are not flagged as lost
-        itemindex = np.where(self.id != 0)[0]
-        self.mean_dt = np.mean(self.dt[itemindex])
-        self.mean_dE = np.mean(self.dE[itemindex])
-        self.sigma_dt = np.std(self.dt[itemindex])
-        self.sigma_dE = np.std(self.dE[itemindex])
+        # Statistics only for particles that are not flagged as lost,
+        # accumulated in double precision in a single pass
+        (n_alive, self.mean_dt, self.mean_dE, self.sigma_dt, self.sigma_dE,
+         self.skewness_dt, self.skewness_dE, self.kurtosis_dt,
+         self.kurtosis_dE) = bm.beam_statistics(self)
+        self.n_alive = int(n_alive)
+        if self.n_alive == 0:
+            self.mean_dt = self.mean_dE = np.nan
+            self.sigma_dt = self.sigma_dE = np.nan
 
         # R.m.s. emittance in Gaussian approximation
         self.epsn_rms_l = np.pi*self.sigma_dE*self.sigma_dt # in eVs
 
 
 
+    def losses(self, longitudinal_cut=None, energy_cut=None,
+               below_energy=None, separatrix=None, mask=None):
+        '''Beam losses with any combination of the criteria below, detected
+        in a single pass over the beam.
+
+        Set to 0 all the particle's id fulfilling at least one criterion.
+
+        Parameters
+        ----------
+        longitudinal_cut : tuple (dt_min, dt_max) (optional)
+            Lost if dt not in the interval (dt_min, dt_max).
+        energy_cut : tuple (dE_min, dE_max) (optional)
+            Lost if dE not in the interval (dE_min, dE_max).
+        below_energy : float (optional)
+            Lost if dE below below_energy.
+        separatrix : tuple (Ring, RFStation) (optional)
+            Lost if outside the separatrix, see is_in_separatrix.
+        mask : uint8 array (optional)
+            Array of length n_macroparticles filled with the criteria
+            fulfilled by each newly lost particle, bits 1, 2, 4 and 8
+            corresponding to the criteria in the order above; 0 for the other
+            particles.
+
+        Returns
+        -------
+        counts : int array
+            Number of newly lost particles in total and for each criterion,
+            in the order above.
+        '''
+
+        criteria = 0
+        cuts = np.zeros(5)
+        parameters = np.zeros(11)
+        alpha_order = 0
+        if longitudinal_cut is not None:
+            criteria |= 1
+            cuts[0:2] = longitudinal_cut
+        if energy_cut is not None:
+            criteria |= 2
+            cuts[2:4] = energy_cut
+        if below_energy is not None:
+            criteria |= 4
+            cuts[4] = below_energy
+        if separatrix is not None:
+            criteria |= 8
+            Ring, RFStation = separatrix
+            parameters = separatrix_parameters(Ring, RFStation, self)
+            alpha_order = RFStation.alpha_order
+        if mask is not None and (mask.dtype != np.uint8 or
+                                 len(mask) != len(self.dt)):
+            raise RuntimeError("ERROR in Beam: the loss mask should be a" +
+                               " uint8 array of length n_macroparticles!")
+
+        return bm.beam_losses(self, criteria, cuts, parameters, alpha_order,
+                              mask)
+
+
     def losses_separatrix(self, Ring, RFStation):
         '''Beam losses based on separatrix.
 
@@ -223,11 +429,7 @@ class Beam(object):
             Used to call the function is_in_separatrix.
         '''
 
-        itemindex = np.where(is_in_separatrix(Ring, RFStation, self, 
-            self.dt, self.dE) == False)[0]
-
-        if itemindex.size != 0:
-            self.id[itemindex] = 0
+        self.losses(separatrix=(Ring, RFStation))
 
 
     def losses_longitudinal_cut(self, dt_min, dt_max): 
@@ -244,10 +446,7 @@ class Beam(object):
             maximum dt.
         '''
 
-        itemindex = np.where( (self.dt - dt_min)*(dt_max - self.dt) < 0 )[0]
-
-        if itemindex.size != 0:
-            self.id[itemindex] = 0
+        self.losses(longitudinal_cut=(dt_min, dt_max))
 
 
     def losses_energy_cut(self, dE_min, dE_max): 
@@ -263,10 +462,7 @@ class Beam(object):
             maximum dE.
         '''
 
-        itemindex = np.where( (self.dE - dE_min)*(dE_max - self.dE) < 0 )[0]
-
-        if itemindex.size != 0:          
-            self.id[itemindex] = 0 
+        self.losses(energy_cut=(dE_min, dE_max))
 
 
     def losses_below_energy(self, dE_min): 
@@ -280,10 +476,108 @@ class Beam(object):
             minimum dE.
         '''
 
-        itemindex = np.where( (self.dE - dE_min) < 0 )[0]
+        self.losses(below_energy=dE_min)
+
+
+
+
+
+
+class _EnsembleMember(Beam):
+    """Beam of a BeamEnsemble: its dt, dE and id arrays are rows of the
+    coordinate blocks of the ensemble, and replacing them copies the new
+    values into the block.
+    """
+
+    def __init__(self, Ring, ensemble, index):
+
+        self._dt = ensemble.dt[index]
+        self._dE = ensemble.dE[index]
+        Beam.__init__(self, Ring, ensemble.n_macroparticles,
+                      ensemble.intensity, precision=ensemble.precision)
+        self.id = ensemble.id[index]
+
+    @Beam.dt.setter
+    def dt(self, value):
+
+        self._dt[:] = value
+
+    @Beam.dE.setter
+    def dE(self, value):
+
+        self._dE[:] = value
+
+    def eliminate_lost_particles(self):
+
+        raise RuntimeError("ERROR in Beam: the lost particles of a member" +
+                           " of a BeamEnsemble cannot be eliminated!")
+
+
+class BeamEnsemble(object):
+    """Class containing an ensemble of independent beams with the same number
+    of macro-particles, e.g. for scans of the seed or of the RF parameters.
+
+    The coordinates of all the members are stored in [n_ensemble,
+    n_macroparticles] blocks, which EnsembleTracker tracks with one call to
+    the compiled library per turn. Each member is also a Beam (whose arrays
+    are rows of the blocks), to generate its distribution and compute its
+    statistics, losses or profile as usual.
+
+    >>> ensemble = BeamEnsemble(ring, 20, 10000, 1e11)
+    >>> for i, beam in enumerate(ensemble):
+    >>>     bigaussian(ring, rf, beam, 1e-9, seed=i)
+
+    Parameters
+    ----------
+    Ring : Ring
+        Used to import different quantities such as the mass and the energy.
+    n_ensemble : int
+        number of beams of the ensemble.
+    n_macroparticles : int
+        number of macroparticles of each beam.
+    intensity : float
+        intensity of each beam (in number of charge).
+    precision : str
+        precision of the beam coordinates, 'double' (default) or 'single'.
+
+    Attributes
+    ----------
+    dt, dE : numpy_array, float
+        beam coordinates of all the members [n_ensemble, n_macroparticles].
+    id : numpy_array, int
+        particle ids of all the members [n_ensemble, n_macroparticles].
+    members : list
+        the Beam objects of the members.
+
+    """
+
+    def __init__(self, Ring, n_ensemble, n_macroparticles, intensity,
+                 precision='double'):
+
+        self.n_ensemble = int(n_ensemble)
+        self.n_macroparticles = int(n_macroparticles)
+        if self.n_ensemble < 1:
+            raise RuntimeError("ERROR in BeamEnsemble: n_ensemble should be" +
+                               " a positive number of beams!")
+        self.intensity = float(intensity)
+        self.precision = precision
+        dtype = np.float32 if precision == 'single' else np.float64
+        shape = (self.n_ensemble, self.n_macroparticles)
+        self.dt = np.zeros(shape, dtype=dtype)
+        self.dE = np.zeros(shape, dtype=dtype)
+        self.id = np.tile(np.arange(1, self.n_macroparticles + 1, dtype=int),
+                          (self.n_ensemble, 1))
+        self.members = [_EnsembleMember(Ring, self, i)
+                        for i in range(self.n_ensemble)]
+
+    def __len__(self):
+
+        return self.n_ensemble
 
-        if itemindex.size != 0:          
-            self.id[itemindex] = 0 
+    def __getitem__(self, index):
 
+        return self.members[index]
 
+    def __iter__(self):
 
+        return iter(self.members)
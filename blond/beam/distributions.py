@@ -26,6 +26,7 @@ from scipy.integrate import cumtrapz
 from ..trackers.utilities import is_in_separatrix
 from ..beam.profile import Profile, CutOptions
 from ..trackers.utilities import potential_well_cut, minmax_location
+from ..utils import bmath as bm
 
 def matched_from_line_density(beam, full_ring_and_RF, line_density_input=None,
                               main_harmonic_option='lowest_freq',
@@ -36,7 +37,8 @@ def matched_from_line_density(beam, full_ring_and_RF, line_density_input=None,
                               dt_margin_percent=0.40, n_points_abel=1e4,
                               bunch_length=None, line_density_type=None,
                               line_density_exponent=None, seed=None,
-                              process_pot_well = True):
+                              process_pot_well = True,
+                              random_generator='numpy'):
     '''
     *Function to generate a beam by inputing the line density. The distribution
     function is then reconstructed with the Abel transform and the particles
@@ -336,7 +338,8 @@ def matched_from_line_density(beam, full_ring_and_RF, line_density_input=None,
     # Populating the bunch
     populate_bunch(beam, time_grid, deltaE_grid, density_grid,
                    time_for_grid[1]-time_for_grid[0],
-                   deltaE_for_grid[1]-deltaE_for_grid[0], seed)
+                   deltaE_for_grid[1]-deltaE_for_grid[0], seed,
+                   random_generator)
              
     if TotalInducedVoltage is not None:
         # Inputing new line density
@@ -375,7 +378,7 @@ def matched_from_distribution_function(beam, full_ring_and_RF,
                                bunch_length_fit=None,
                                distribution_variable='Hamiltonian',
                                process_pot_well = True,
-                               turn_number=0):
+                               turn_number=0, random_generator='numpy'):
     '''
     *Function to generate a beam by inputing the distribution function (by
     choosing the type of distribution and the emittance).
@@ -611,7 +614,7 @@ def matched_from_distribution_function(beam, full_ring_and_RF,
     # Populating the bunch
     populate_bunch(beam, time_grid, deltaE_grid, density_grid, 
                    time_resolution_low, deltaE_coord_array[1] -
-                   deltaE_coord_array[0], seed)
+                   deltaE_coord_array[0], seed, random_generator)
     
     if TotalInducedVoltage is not None:
         return [time_potential_low_res, line_density_], induced_voltage_object
@@ -705,11 +708,30 @@ def X0_from_bunch_length(bunch_length, bunch_length_fit, X_grid, sorted_X_dE0,
     return X0
 
 def populate_bunch(beam, time_grid, deltaE_grid, density_grid, time_step,
-                   deltaE_step, seed):
+                   deltaE_step, seed, random_generator='numpy'):
     '''
     *Method to populate the bunch using a random number generator from the
-    particle density in phase space.*
+    particle density in phase space. With random_generator='philox', the
+    counter-based generator of libblond is used in place of the global NumPy
+    generator, which is then left untouched.*
     '''
+    if random_generator == 'philox':
+        seed = random_seed(seed)
+        n = beam.n_macroparticles
+        # Inverse transform sampling of the grid cells
+        cumulative_density = np.cumsum(density_grid.flatten())
+        indexes = np.searchsorted(cumulative_density, bm.random_uniform(
+            n, seed, 0, high=cumulative_density[-1]), side='right')
+        indexes = np.minimum(indexes, len(cumulative_density) - 1)
+        beam.dt = (time_grid.flatten()[indexes] +
+                   bm.random_uniform(n, seed, 1, -0.5, 0.5) * time_step)
+        beam.dE = (deltaE_grid.flatten()[indexes] +
+                   bm.random_uniform(n, seed, 2, -0.5, 0.5) * deltaE_step)
+        return
+    elif random_generator != 'numpy':
+        raise RuntimeError("ERROR in populate_bunch: random_generator " +
+                           "should be 'numpy' or 'philox'!")
+
     # Initialise the random number generator
     np.random.seed(seed=seed)
     # Generating particles randomly inside the grid cells according to the
@@ -789,8 +811,20 @@ def line_density(coord_array, dist_type, bunch_length, bunch_position=0,
 
 
 
+def random_seed(seed=None):
+    r"""Function returning the seed of the counter-based random generator of
+    libblond; if no seed is given, it is drawn from the global NumPy random
+    generator.
+    """
+
+    if seed is None:
+        seed = np.random.randint(np.iinfo(np.int64).max, dtype=np.int64)
+    return int(seed)
+
+
+
 def bigaussian(Ring, RFStation, Beam, sigma_dt, sigma_dE = None, seed = None,
-               reinsertion = False):
+               reinsertion = False, random_generator = 'numpy'):
     r"""Function generating a Gaussian beam both in time and energy 
     coordinates. Fills Beam.dt and Beam.dE arrays.
     
@@ -812,6 +846,11 @@ def bigaussian(Ring, RFStation, Beam, sigma_dt, sigma_dE = None, seed = None,
     reinsertion : bool (optional)
         Re-insert particles that are generated outside the separatrix into the
         bucket; default in False
+    random_generator : str (optional)
+        'numpy' (default) seeds and uses the global NumPy random generator;
+        'philox' uses the counter-based generator of libblond, which is
+        multi-threaded and reproducible independently of the number of
+        threads, and leaves the global NumPy generator untouched
     
     """
     
@@ -854,24 +893,42 @@ def bigaussian(Ring, RFStation, Beam, sigma_dt, sigma_dE = None, seed = None,
     Beam.sigma_dE = sigma_dE
     
     # Generate coordinates
-    np.random.seed(seed)
-    
-    Beam.dt = sigma_dt*np.random.randn(Beam.n_macroparticles) + \
-              (phi_s - phi_rf)/omega_rf                  
-    Beam.dE = sigma_dE*np.random.randn(Beam.n_macroparticles)
+    if random_generator == 'philox':
+        seed = random_seed(seed)
+        Beam.dt = bm.random_normal(Beam.n_macroparticles, seed, 0,
+                                   (phi_s - phi_rf)/omega_rf, sigma_dt)
+        Beam.dE = bm.random_normal(Beam.n_macroparticles, seed, 1, 0.,
+                                   sigma_dE)
+    elif random_generator == 'numpy':
+        np.random.seed(seed)
+        Beam.dt = sigma_dt*np.random.randn(Beam.n_macroparticles) + \
+                  (phi_s - phi_rf)/omega_rf
+        Beam.dE = sigma_dE*np.random.randn(Beam.n_macroparticles)
+    else:
+        raise RuntimeError("ERROR in bigaussian: random_generator should " +
+                           "be 'numpy' or 'philox'!")
     
     # Re-insert if necessary
     if reinsertion == True:
         
         itemindex = np.where(is_in_separatrix(Ring, 
             RFStation, Beam, Beam.dt, Beam.dE) == False)[0]
-         
+        stream = 2
+        
         while itemindex.size != 0:
             
-            Beam.dt[itemindex] = sigma_dt*np.random.randn(itemindex.size) \
-                                 + (phi_s - phi_rf)/omega_rf
+            if random_generator == 'philox':
+                Beam.dt[itemindex] = bm.random_normal(
+                    itemindex.size, seed, stream,
+                    (phi_s - phi_rf)/omega_rf, sigma_dt)
+                Beam.dE[itemindex] = bm.random_normal(
+                    itemindex.size, seed, stream + 1, 0., sigma_dE)
+                stream += 2
+            else:
+                Beam.dt[itemindex] = sigma_dt*np.random.randn(itemindex.size) \
+                                     + (phi_s - phi_rf)/omega_rf
                                      
-            Beam.dE[itemindex] = sigma_dE*np.random.randn(itemindex.size)
+                Beam.dE[itemindex] = sigma_dE*np.random.randn(itemindex.size)
             itemindex = np.where(is_in_separatrix(Ring, 
                 RFStation, Beam, Beam.dt, Beam.dE) == False)[0]
 
@@ -0,0 +1,100 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+**Module to apply the loss criteria to the beam every turn and to record the
+number of lost macro-particles per turn and per criterion.**
+"""
+
+from __future__ import division
+from builtins import object
+import numpy as np
+
+
+class BeamLosses(object):
+    r"""Class flagging the lost macro-particles of a Beam every turn, with any
+    combination of the criteria of Beam.losses() applied in a single pass
+    over the beam, and recording the number of newly lost macro-particles.
+
+    >>> beam_losses = BeamLosses(beam, ring.n_turns,
+    >>>                          longitudinal_cut=(0, rf.t_rf[0, 0]),
+    >>>                          separatrix=(ring, rf))
+    >>> for i in range(ring.n_turns):
+    >>>     tracker.track()
+    >>>     beam_losses.track()
+
+    Parameters
+    ----------
+    Beam : class
+        A Beam type class
+    n_turns : int
+        Maximum number of turns recorded
+    longitudinal_cut : tuple (dt_min, dt_max) (optional)
+        Longitudinal cut, see Beam.losses()
+    energy_cut : tuple (dE_min, dE_max) (optional)
+        Energy cut, see Beam.losses()
+    below_energy : float (optional)
+        Lower energy cut, see Beam.losses()
+    separatrix : tuple (Ring, RFStation) (optional)
+        Separatrix losses, see Beam.losses()
+
+    Attributes
+    ----------
+    counter : int
+        Number of turns recorded
+    lost_per_turn : int array
+        Number of newly lost macro-particles per turn, in total and for each
+        criterion (columns total, longitudinal_cut, energy_cut, below_energy,
+        separatrix)
+
+    """
+
+    criteria = ['total', 'longitudinal_cut', 'energy_cut', 'below_energy',
+                'separatrix']
+
+    def __init__(self, Beam, n_turns, longitudinal_cut=None, energy_cut=None,
+                 below_energy=None, separatrix=None):
+
+        self.beam = Beam
+        self.options = {'longitudinal_cut': longitudinal_cut,
+                        'energy_cut': energy_cut,
+                        'below_energy': below_energy,
+                        'separatrix': separatrix}
+        if all(option is None for option in self.options.values()):
+            raise RuntimeError("ERROR in BeamLosses: at least one loss" +
+                               " criterion should be given!")
+
+        self.counter = 0
+        self.lost_per_turn = np.zeros((int(n_turns), len(self.criteria)),
+                                      dtype=np.int64)
+
+    def track(self):
+        """Applies the loss criteria and records the number of newly lost
+        macro-particles of the turn.
+        """
+
+        if self.counter >= len(self.lost_per_turn):
+            raise RuntimeError("ERROR in BeamLosses: the number of recorded" +
+                               " turns exceeds n_turns!")
+        self.lost_per_turn[self.counter] = self.beam.losses(**self.options)
+        self.counter += 1
+
+    def total_losses(self):
+        """Function returning the number of macro-particles lost since the
+        start of the recording, for each criterion.
+
+        Returns
+        -------
+        losses : dict
+            Number of lost macro-particles per criterion (and total)
+
+        """
+
+        totals = np.sum(self.lost_per_turn[:self.counter], axis=0)
+        return dict(zip(self.criteria, [int(n) for n in totals]))
@@ -17,11 +17,12 @@
 from __future__ import division, print_function
 from builtins import object
 import numpy as np
-from numpy.fft import rfft, rfftfreq
+from numpy.fft import rfftfreq
 from scipy import ndimage
 import ctypes
 from ..toolbox import filters_and_fitting as ffroutines
 from ..utils import bmath as bm
+from ..utils import bfft
 
 class CutOptions(object):
     r"""
@@ -337,6 +338,9 @@ class Profile(object):
     operations : list
         contains all the methods to be called every turn, like slice track,
         fitting, filtering etc.
+    sliced_by_tracker : bool
+        set by the trackers slicing the beam themselves (fused slicing); the
+        next call of track() then skips the slicing and resets it
     bunchPosition : float
         profile position [s]
     bunchLength : float
@@ -393,6 +397,9 @@ class Profile(object):
         self.beam_spectrum = np.array([], dtype=float)
         self.beam_spectrum_freq = np.array([], dtype=float)
 
+        # Set when a tracker has already sliced the beam at the current turn
+        self.sliced_by_tracker = False
+
         if OtherSlicesOptions.smooth:
             self.operations = [self._slice_smooth]
         else:
@@ -433,6 +440,10 @@ class Profile(object):
         """
         Constant space slicing with a constant frame. 
         """
+        if self.sliced_by_tracker:
+            # Already sliced with the kick and drift of the tracker
+            self.sliced_by_tracker = False
+            return
         bm.slice(self)
         # libblond.histogram(self.Beam.dt.ctypes.data_as(ctypes.c_void_p), 
         #                  self.n_macroparticles.ctypes.data_as(ctypes.c_void_p), 
@@ -524,12 +535,20 @@ class Profile(object):
 
         self.beam_spectrum_freq = rfftfreq(n_sampling_fft, self.bin_size)
 
-    def beam_spectrum_generation(self, n_sampling_fft):
+    def beam_spectrum_generation(self, n_sampling_fft, fft_plan=None):
         """
-        Beam spectrum calculation
+        Beam spectrum calculation, with the given bfft.RealFFT plan of size
+        n_sampling_fft or the one of the selected FFT backend. With the
+        pyfftw backend, the spectrum is written in the same array as long as
+        its size does not change.
         """
 
-        self.beam_spectrum = rfft(self.n_macroparticles, n_sampling_fft)
+        if fft_plan is None:
+            fft_plan = bfft.real_fft(n_sampling_fft)
+        out = None
+        if len(self.beam_spectrum) == fft_plan.n_spectrum:
+            out = self.beam_spectrum
+        self.beam_spectrum = fft_plan.rfft(self.n_macroparticles, out=out)
 
     def beam_profile_derivative(self, mode='gradient'):
         """
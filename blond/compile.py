@@ -54,6 +54,14 @@ parser.add_argument('-c', '--compiler', type=str, default='g++',
                     help='C++ compiler that will be used to compile the'
                     ' source files. Default: g++')
 
+parser.add_argument('-v', '--variants', type=str, nargs='*',
+                    choices=['avx2', 'avx512'],
+                    help='Also compile the library for the given x86'
+                    ' instruction sets (all of them if none is given). The'
+                    ' variant matching the CPU is loaded at import time and'
+                    ' the generic library is the fallback.'
+                    ' Default: generic library only')
+
 # If True you can launch with 'OMP_NUM_THREADS=xx python MAIN_FILE.py'
 # where xx is the number of threads that you want to launch
 parallel = False
@@ -68,6 +76,14 @@ boost_path = None
 #                -mfma4 -fopenmp -ftree-vectorizer-verbose=1
 cflags = ['-Ofast', '-std=c++11', '-shared']
 
+# Additional flags of the instruction set specific libraries, which are
+# named libblond_<variant>.so
+variant_cflags = {
+    'avx2': ['-mavx2', '-mfma'],
+    'avx512': ['-mavx2', '-mfma', '-mavx512f', '-mavx512cd', '-mavx512bw',
+               '-mavx512dq', '-mavx512vl', '-mprefer-vector-width=512']
+}
+
 cpp_files = [
     # 'cpp_routines/mean_std_whereint.cpp',
     # os.path.join(basepath, 'cpp_routines/convolution.cpp'),
@@ -75,9 +91,20 @@ cpp_files = [
     os.path.join(basepath, 'cpp_routines/drift.cpp'),
     os.path.join(basepath, 'cpp_routines/linear_interp_kick.cpp'),
     os.path.join(basepath, 'cpp_routines/histogram.cpp'),
+    os.path.join(basepath, 'cpp_routines/beam_statistics.cpp'),
+    os.path.join(basepath, 'cpp_routines/beam_losses.cpp'),
+    os.path.join(basepath, 'cpp_routines/hamiltonian_table.cpp'),
+    os.path.join(basepath, 'cpp_routines/kick_drift_histogram.cpp'),
+    os.path.join(basepath, 'cpp_routines/kick_drift_periodic.cpp'),
+    os.path.join(basepath, 'cpp_routines/rf_voltage_table.cpp'),
+    os.path.join(basepath, 'cpp_routines/track_turns.cpp'),
+    os.path.join(basepath, 'cpp_routines/ensemble.cpp'),
     os.path.join(basepath, 'cpp_routines/music_track.cpp'),
     os.path.join(basepath, 'cpp_routines/blondmath.cpp'),
+    os.path.join(basepath, 'cpp_routines/random.cpp'),
     os.path.join(basepath, 'cpp_routines/fast_resonator.cpp'),
+    os.path.join(basepath, 'cpp_routines/resonator_induced_voltage.cpp'),
+    os.path.join(basepath, 'cpp_routines/pole_residue.cpp'),
     os.path.join(basepath, 'toolbox/tomoscope.cpp'),
     os.path.join(basepath, 'synchrotron_radiation/synchrotron_radiation.cpp'),
     os.path.join(basepath, 'beam/sparse_histogram.cpp')
@@ -102,36 +129,47 @@ if (__name__ == "__main__"):
     print('C++ Compiler: ', compiler)
     subprocess.call([compiler, '--version'])
 
-    try:
-        os.remove(os.path.join(basepath, 'cpp_routines/libblond.so'))
-    except OSError as e:
-        pass
+    variants = []
+    if args.variants is not None:
+        variants = args.variants if args.variants else list(variant_cflags)
+    print('Instruction set variants: ', variants)
 
     if (parallel is True):
         cflags += ['-fopenmp', '-DPARALLEL', '-D_GLIBCXX_PARALLEL']
 
     if ('posix' in os.name):
         cflags += ['-fPIC']
-        libname = os.path.join(basepath, 'cpp_routines/libblond.so')
-        command = [compiler] + cflags + ['-o', libname] + cpp_files
-        subprocess.call(command)
-
-        print('\nIF THE COMPILATION IS CORRECT A FILE NAMED libblond.so SHOULD'
-              ' APPEAR IN THE cpp_routines FOLDER. OTHERWISE YOU HAVE TO'
-              ' CORRECT THE ERRORS AND COMPILE AGAIN.')
-
+        extension = '.so'
     elif ('win' in sys.platform):
-
-        libname = os.path.join(basepath, 'cpp_routines/libblond.dll')
-
-        command = [compiler] + cflags + ['-o', libname] + cpp_files
-        subprocess.call(command)
-
-        print('\nIF THE COMPILATION IS CORRECT A FILE NAMED libblond.dll SHOULD'
-              ' APPEAR IN THE cpp_routines FOLDER. OTHERWISE YOU HAVE TO'
-              ' CORRECT THE ERRORS AND COMPILE AGAIN.')
-
+        extension = '.dll'
     else:
         print(
             'YOU DO NOT HAVE A WINDOWS OR LINUX OPERATING SYSTEM. ABORTING...')
         sys.exit()
+
+    # The variants of a previous compilation would be loaded in place of the
+    # new generic library
+    for variant in [''] + ['_' + variant for variant in variant_cflags]:
+        try:
+            os.remove(os.path.join(basepath, 'cpp_routines/libblond' +
+                                   variant + extension))
+        except OSError as e:
+            pass
+
+    for variant in [None] + variants:
+        if variant is None:
+            libname = os.path.join(basepath,
+                                   'cpp_routines/libblond' + extension)
+            flags = cflags
+        else:
+            libname = os.path.join(basepath, 'cpp_routines/libblond_' +
+                                   variant + extension)
+            flags = cflags + variant_cflags[variant]
+        command = [compiler] + flags + ['-o', libname] + cpp_files
+        subprocess.call(command)
+
+    print('\nIF THE COMPILATION IS CORRECT A FILE NAMED libblond' + extension +
+          ' SHOULD APPEAR IN THE cpp_routines FOLDER (AND ONE FILE'
+          ' libblond_<variant>' + extension + ' PER INSTRUCTION SET'
+          ' VARIANT). OTHERWISE YOU HAVE TO CORRECT THE ERRORS AND COMPILE'
+          ' AGAIN.')
@@ -0,0 +1,189 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines for the lost macro-particles (id == 0): detection of
+// the losses with several criteria in one pass, and compaction of the arrays
+
+#include <stdint.h>
+#include <cmath>
+#include "cos.h"
+
+using namespace vdt;
+
+// In-place stream compaction: the macro-particles that are not lost are
+// moved to the beginning of the arrays, keeping their order, and their
+// number is returned
+template <typename T>
+static int compact_lost_particles_impl(T * __restrict__ beam_dt,
+                                       T * __restrict__ beam_dE,
+                                       int64_t * __restrict__ beam_id,
+                                       const int n_macroparticles)
+{
+    int j = 0;
+    // Nothing to move before the first lost particle
+    while (j < n_macroparticles && beam_id[j] != 0) j++;
+
+    for (int i = j + 1; i < n_macroparticles; i++) {
+        if (beam_id[i] != 0) {
+            beam_dt[j] = beam_dt[i];
+            beam_dE[j] = beam_dE[i];
+            beam_id[j] = beam_id[i];
+            j++;
+        }
+    }
+    return j;
+}
+
+extern "C" int compact_lost_particles(double * __restrict__ beam_dt,
+                                      double * __restrict__ beam_dE,
+                                      int64_t * __restrict__ beam_id,
+                                      const int n_macroparticles)
+{
+    return compact_lost_particles_impl<double>(beam_dt, beam_dE, beam_id,
+                                               n_macroparticles);
+}
+
+extern "C" int compact_lost_particlesf(float * __restrict__ beam_dt,
+                                       float * __restrict__ beam_dE,
+                                       int64_t * __restrict__ beam_id,
+                                       const int n_macroparticles)
+{
+    return compact_lost_particles_impl<float>(beam_dt, beam_dE, beam_id,
+                                              n_macroparticles);
+}
+
+// Loss criteria, bits of the criteria argument and of the mask
+enum {
+    LONGITUDINAL_CUT = 1,
+    ENERGY_CUT = 2,
+    BELOW_ENERGY = 4,
+    SEPARATRIX = 8
+};
+
+// Flags as lost (id = 0) the particles fulfilling any of the criteria; the
+// number of newly lost particles, in total and for each criterion, is
+// returned in counts. The criteria of each newly lost particle are written
+// in mask, if not NULL.
+// cuts: dt_min, dt_max, dE_min, dE_max, dE_below
+// separatrix: eta_0, eta_1, eta_2, 1 / (beta^2 E), c pi / (C beta E), c2,
+//             omega_rf, phi_rf_d, phi_s, |H_sep|, sign of eta_0
+template <typename T>
+static void beam_losses_impl(const T * __restrict__ beam_dt,
+                             const T * __restrict__ beam_dE,
+                             int64_t * __restrict__ beam_id,
+                             const int n_macroparticles,
+                             const int criteria,
+                             const double * __restrict__ cuts,
+                             const double * __restrict__ separatrix,
+                             const int alpha_order,
+                             unsigned char * __restrict__ mask,
+                             int64_t * __restrict__ counts)
+{
+    const double dt_min = cuts[0], dt_max = cuts[1];
+    const double dE_min = cuts[2], dE_max = cuts[3];
+    const double dE_below = cuts[4];
+
+    const double eta_0 = separatrix[0], eta_1 = separatrix[1];
+    const double eta_2 = separatrix[2], inv_beta2_E = separatrix[3];
+    const double c1_coeff = separatrix[4], c2 = separatrix[5];
+    const double omega_rf = separatrix[6], phi_rf_d = separatrix[7];
+    const double phi_s = separatrix[8], H_sep = separatrix[9];
+    const double eta_sign = separatrix[10];
+    const double cos_phi_s = cos(phi_s), sin_phi_s = sin(phi_s);
+    const double two_pi = 2. * M_PI;
+    const double inv_two_pi = 1. / two_pi;
+    // Phase projected to [-pi, pi) below and [0, 2 pi) above transition
+    const double phase_shift = eta_sign < 0 ? 0.5 : 0.;
+
+    int64_t total = 0, n_longitudinal = 0, n_energy = 0, n_below = 0,
+            n_separatrix = 0;
+
+    #pragma omp parallel for \
+        reduction(+ : total, n_longitudinal, n_energy, n_below, n_separatrix)
+    for (int i = 0; i < n_macroparticles; i++) {
+        if (mask != NULL) mask[i] = 0;
+        // Particles lost before are not counted again
+        if (beam_id[i] == 0) continue;
+
+        const double dt = beam_dt[i];
+        const double dE = beam_dE[i];
+        int lost = 0;
+
+        if ((criteria & LONGITUDINAL_CUT) && (dt < dt_min || dt > dt_max))
+            lost |= LONGITUDINAL_CUT;
+        if ((criteria & ENERGY_CUT) && (dE < dE_min || dE > dE_max))
+            lost |= ENERGY_CUT;
+        if ((criteria & BELOW_ENERGY) && dE < dE_below)
+            lost |= BELOW_ENERGY;
+        if (criteria & SEPARATRIX) {
+            double eta = eta_0;
+            if (alpha_order > 0) {
+                const double delta = dE * inv_beta2_E;
+                eta += eta_1 * delta;
+                if (alpha_order > 1) eta += eta_2 * delta * delta;
+            }
+            double phi_b = omega_rf * dt + phi_rf_d;
+            if (eta_sign != 0.)
+                phi_b -= two_pi * floor(phi_b * inv_two_pi + phase_shift);
+            const double H = eta * c1_coeff * dE * dE
+                             + c2 * (fast_cos(phi_b) - cos_phi_s
+                                     + (phi_b - phi_s) * sin_phi_s);
+            if (!(fabs(H) < H_sep)) lost |= SEPARATRIX;
+        }
+
+        if (lost) {
+            beam_id[i] = 0;
+            total++;
+            n_longitudinal += (lost & LONGITUDINAL_CUT) != 0;
+            n_energy += (lost & ENERGY_CUT) != 0;
+            n_below += (lost & BELOW_ENERGY) != 0;
+            n_separatrix += (lost & SEPARATRIX) != 0;
+            if (mask != NULL) mask[i] = lost;
+        }
+    }
+
+    counts[0] = total;
+    counts[1] = n_longitudinal;
+    counts[2] = n_energy;
+    counts[3] = n_below;
+    counts[4] = n_separatrix;
+}
+
+extern "C" void beam_losses(const double * __restrict__ beam_dt,
+                            const double * __restrict__ beam_dE,
+                            int64_t * __restrict__ beam_id,
+                            const int n_macroparticles,
+                            const int criteria,
+                            const double * __restrict__ cuts,
+                            const double * __restrict__ separatrix,
+                            const int alpha_order,
+                            unsigned char * __restrict__ mask,
+                            int64_t * __restrict__ counts)
+{
+    beam_losses_impl<double>(beam_dt, beam_dE, beam_id, n_macroparticles,
+                             criteria, cuts, separatrix, alpha_order, mask,
+                             counts);
+}
+
+extern "C" void beam_lossesf(const float * __restrict__ beam_dt,
+                             const float * __restrict__ beam_dE,
+                             int64_t * __restrict__ beam_id,
+                             const int n_macroparticles,
+                             const int criteria,
+                             const double * __restrict__ cuts,
+                             const double * __restrict__ separatrix,
+                             const int alpha_order,
+                             unsigned char * __restrict__ mask,
+                             int64_t * __restrict__ counts)
+{
+    beam_losses_impl<float>(beam_dt, beam_dE, beam_id, n_macroparticles,
+                            criteria, cuts, separatrix, alpha_order, mask,
+                            counts);
+}
@@ -0,0 +1,172 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine that computes the statistics of the macro-particles
+// that are not lost (id != 0) in a single pass over the coordinates: the
+// moments of blocks of particles are merged with the pairwise (Chan et al.)
+// update formulas
+
+#include <cmath>
+#include <vector>
+#include <stdint.h>
+
+#ifdef PARALLEL
+#include <omp.h>
+#endif
+
+// Number of values, mean and sums of the 2nd, 3rd and 4th powers of the
+// deviations from the mean
+struct Moments {
+    double n, mean, M2, M3, M4;
+    Moments() : n(0.), mean(0.), M2(0.), M3(0.), M4(0.) {}
+};
+
+// Moments of a block of values, small enough to stay in cache between the
+// computation of the mean and of the central moments
+template <typename T>
+static inline Moments block_moments(const T * __restrict__ x,
+                                    const int64_t * __restrict__ id,
+                                    const int n)
+{
+    Moments m;
+    double count = 0., sum = 0.;
+    for (int i = 0; i < n; i++) {
+        const double alive = id[i] != 0 ? 1. : 0.;
+        count += alive;
+        sum += alive * x[i];
+    }
+    if (count == 0.) return m;
+    m.n = count;
+    m.mean = sum / count;
+
+    double M2 = 0., M3 = 0., M4 = 0.;
+    for (int i = 0; i < n; i++) {
+        const double d = id[i] != 0 ? x[i] - m.mean : 0.;
+        const double d2 = d * d;
+        M2 += d2;
+        M3 += d2 * d;
+        M4 += d2 * d2;
+    }
+    m.M2 = M2;
+    m.M3 = M3;
+    m.M4 = M4;
+    return m;
+}
+
+// Moments of the union of two sets of values
+static inline void merge(Moments &a, const Moments &b)
+{
+    if (b.n == 0.) return;
+    if (a.n == 0.) {
+        a = b;
+        return;
+    }
+    const double n = a.n + b.n;
+    const double delta = b.mean - a.mean;
+    const double delta2 = delta * delta;
+    const double na_nb = a.n * b.n;
+
+    const double M4 = a.M4 + b.M4
+                      + delta2 * delta2 * na_nb
+                      * (a.n * a.n - na_nb + b.n * b.n) / (n * n * n)
+                      + 6. * delta2 * (a.n * a.n * b.M2 + b.n * b.n * a.M2)
+                      / (n * n)
+                      + 4. * delta * (a.n * b.M3 - b.n * a.M3) / n;
+    const double M3 = a.M3 + b.M3
+                      + delta2 * delta * na_nb * (a.n - b.n) / (n * n)
+                      + 3. * delta * (a.n * b.M2 - b.n * a.M2) / n;
+    a.M2 += b.M2 + delta2 * na_nb / n;
+    a.mean += delta * b.n / n;
+    a.M3 = M3;
+    a.M4 = M4;
+    a.n = n;
+}
+
+static inline void moments_result(const Moments &m, double *mean,
+                                  double *sigma, double *skewness,
+                                  double *kurtosis)
+{
+    *mean = m.mean;
+    *sigma = m.n > 0. ? std::sqrt(m.M2 / m.n) : 0.;
+    *skewness = m.M2 > 0. ? std::sqrt(m.n) * m.M3 / std::pow(m.M2, 1.5) : 0.;
+    *kurtosis = m.M2 > 0. ? m.n * m.M4 / (m.M2 * m.M2) - 3. : 0.;
+}
+
+template <typename T>
+static void beam_statistics_impl(const T * __restrict__ beam_dt,
+                                 const T * __restrict__ beam_dE,
+                                 const int64_t * __restrict__ beam_id,
+                                 const int n_macroparticles,
+                                 double * __restrict__ result)
+{
+#ifdef PARALLEL
+    const int max_threads = omp_get_max_threads();
+#else
+    const int max_threads = 1;
+#endif
+    const int block_size = 1024;
+    std::vector<Moments> moments_dt(max_threads), moments_dE(max_threads);
+
+    // Contiguous blocks of particles per thread, merged in a fixed order
+    #pragma omp parallel
+    {
+#ifdef PARALLEL
+        const int thread = omp_get_thread_num();
+        const int n_threads = omp_get_num_threads();
+#else
+        const int thread = 0;
+        const int n_threads = 1;
+#endif
+        const int start = (int64_t) n_macroparticles * thread / n_threads;
+        const int end = (int64_t) n_macroparticles * (thread + 1) / n_threads;
+        Moments m_dt, m_dE;
+        for (int i = start; i < end; i += block_size) {
+            const int n = end - i < block_size ? end - i : block_size;
+            merge(m_dt, block_moments(&beam_dt[i], &beam_id[i], n));
+            merge(m_dE, block_moments(&beam_dE[i], &beam_id[i], n));
+        }
+        moments_dt[thread] = m_dt;
+        moments_dE[thread] = m_dE;
+    }
+
+    for (int i = 1; i < max_threads; i++) {
+        merge(moments_dt[0], moments_dt[i]);
+        merge(moments_dE[0], moments_dE[i]);
+    }
+
+    // n_alive, mean_dt, mean_dE, sigma_dt, sigma_dE, skewness_dt,
+    // skewness_dE, kurtosis_dt, kurtosis_dE
+    result[0] = moments_dt[0].n;
+    moments_result(moments_dt[0], &result[1], &result[3], &result[5],
+                   &result[7]);
+    moments_result(moments_dE[0], &result[2], &result[4], &result[6],
+                   &result[8]);
+}
+
+extern "C" void beam_statistics(const double * __restrict__ beam_dt,
+                                const double * __restrict__ beam_dE,
+                                const int64_t * __restrict__ beam_id,
+                                const int n_macroparticles,
+                                double * __restrict__ result)
+{
+    beam_statistics_impl<double>(beam_dt, beam_dE, beam_id, n_macroparticles,
+                                 result);
+}
+
+// Single precision coordinates, accumulated in double precision
+extern "C" void beam_statisticsf(const float * __restrict__ beam_dt,
+                                 const float * __restrict__ beam_dE,
+                                 const int64_t * __restrict__ beam_id,
+                                 const int n_macroparticles,
+                                 double * __restrict__ result)
+{
+    beam_statistics_impl<float>(beam_dt, beam_dE, beam_id, n_macroparticles,
+                                result);
+}
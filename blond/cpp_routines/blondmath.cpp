@@ -284,4 +284,23 @@ extern "C" {
         else std::sort(in, in + n);
     }
 
+
+    // Number of threads of the following parallel regions of the calling
+    // thread; no effect in the serial library
+    void set_num_threads(const int n)
+    {
+#ifdef PARALLEL
+        omp_set_num_threads(n);
+#endif
+    }
+
+    int get_num_threads()
+    {
+#ifdef PARALLEL
+        return omp_get_max_threads();
+#else
+        return 1;
+#endif
+    }
+
 }
@@ -13,50 +13,78 @@ Project website: http://blond.web.cern.ch/
 
 
 // Optimised C++ routine that calculates the drift.
+// The solver is resolved by the caller: 0 for 'simple', 1 for 'exact'. All
+// the solvers and orders of the slippage factor are parallel loops without
+// branches, which the compiler can vectorise.
 // Author: Danilo Quartullo, Helga Timko, Alexandre Lasheen
 
-#include <string.h>
+template <typename R>
+static void drift_impl(R * __restrict__ beam_dt,
+                       const R * __restrict__ beam_dE,
+                       const int solver,
+                       const double T0, const double length_ratio,
+                       const int alpha_order, const double eta_zero,
+                       const double eta_one, const double eta_two,
+                       const double beta, const double energy,
+                       const int n_macroparticles)
+{
+    const double T = T0 * length_ratio;
 
-extern "C" void drift(double * __restrict__ beam_dt, 
-                      const double * __restrict__ beam_dE, 
-                      const char * __restrict__ solver,
-	                  const double T0, const double length_ratio, 
-	                  const double alpha_order, const double eta_zero, 
-	                  const double eta_one, const double eta_two,
-                      const double beta, const double energy, 
-                      const int n_macroparticles){
-
-int i;
-double T = T0*length_ratio;
-
-if ( strcmp (solver,"simple") == 0 )
-	{
-		double coeff = eta_zero/(beta*beta*energy);
+    if (solver == 0) {
+        const double coeff = eta_zero / (beta * beta * energy);
         #pragma omp parallel for
-		for (int i = 0; i < n_macroparticles; i++)
-			beam_dt[i] += T*coeff*beam_dE[i];
-	}
-
-else
-	{
-		const double coeff = 1./(beta*beta*energy);
-		const double eta0 = eta_zero*coeff;
-		const double eta1 = eta_one*coeff*coeff;
-		const double eta2 = eta_two*coeff*coeff*coeff;
-
-		if ( alpha_order == 1 )
-    		for ( i = 0; i < n_macroparticles; i++ )
-        		beam_dt[i] += T*(1./(1. - eta0*beam_dE[i]) - 1.);
-    	else if (alpha_order == 2)
-        	for ( i = 0; i < n_macroparticles; i++ )
-        		beam_dt[i] += T*(1./(1. - eta0*beam_dE[i]
-        		           - eta1*beam_dE[i]*beam_dE[i]) - 1.);
-    	else
-        	for ( i = 0; i < n_macroparticles; i++ )
-        		beam_dt[i] += T*(1./(1. - eta0*beam_dE[i]
-        		           - eta1*beam_dE[i]*beam_dE[i]
-        		           - eta2*beam_dE[i]*beam_dE[i]*beam_dE[i]) - 1.);
-	}
+        for (int i = 0; i < n_macroparticles; i++)
+            beam_dt[i] += T * coeff * beam_dE[i];
+    } else {
+        const double coeff = 1. / (beta * beta * energy);
+        const double eta0 = eta_zero * coeff;
+        const double eta1 = eta_one * coeff * coeff;
+        const double eta2 = eta_two * coeff * coeff * coeff;
 
+        if (alpha_order == 1) {
+            #pragma omp parallel for
+            for (int i = 0; i < n_macroparticles; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]) - 1.);
+        } else if (alpha_order == 2) {
+            #pragma omp parallel for
+            for (int i = 0; i < n_macroparticles; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]
+                                         - eta1 * beam_dE[i] * beam_dE[i]) - 1.);
+        } else {
+            #pragma omp parallel for
+            for (int i = 0; i < n_macroparticles; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]
+                                         - eta1 * beam_dE[i] * beam_dE[i]
+                                         - eta2 * beam_dE[i] * beam_dE[i] * beam_dE[i]) - 1.);
+        }
+    }
 }
 
+extern "C" void drift(double * __restrict__ beam_dt,
+                      const double * __restrict__ beam_dE,
+                      const int solver,
+                      const double T0, const double length_ratio,
+                      const int alpha_order, const double eta_zero,
+                      const double eta_one, const double eta_two,
+                      const double beta, const double energy,
+                      const int n_macroparticles)
+{
+    drift_impl<double>(beam_dt, beam_dE, solver, T0, length_ratio,
+                       alpha_order, eta_zero, eta_one, eta_two, beta, energy,
+                       n_macroparticles);
+}
+
+// Single precision coordinates, the drift is computed in double precision
+extern "C" void driftf(float * __restrict__ beam_dt,
+                       const float * __restrict__ beam_dE,
+                       const int solver,
+                       const double T0, const double length_ratio,
+                       const int alpha_order, const double eta_zero,
+                       const double eta_one, const double eta_two,
+                       const double beta, const double energy,
+                       const int n_macroparticles)
+{
+    drift_impl<float>(beam_dt, beam_dE, solver, T0, length_ratio,
+                      alpha_order, eta_zero, eta_one, eta_two, beta, energy,
+                      n_macroparticles);
+}
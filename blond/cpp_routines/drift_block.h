@@ -0,0 +1,56 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Drift of the particles [start, end), with the same arithmetic as drift.cpp,
+// for the routines tracking blocks of particles that stay in cache. The
+// function is not inlined, so that the compiler evaluates the coefficients as
+// in drift.cpp (with -Ofast, the inlined divisions may be replaced by
+// multiplications with reciprocals shared between the solvers).
+
+#ifndef DRIFT_BLOCK_H_
+#define DRIFT_BLOCK_H_
+
+template <typename R>
+static void __attribute__((noinline)) drift_block(R * __restrict__ beam_dt,
+                        const R * __restrict__ beam_dE,
+                        const int solver, const int alpha_order,
+                        const double T0, const double length_ratio,
+                        const double eta_zero, const double eta_one,
+                        const double eta_two, const double beta,
+                        const double energy, const int start, const int end)
+{
+    const double T = T0 * length_ratio;
+
+    if (solver == 0) {
+        const double coeff = eta_zero / (beta * beta * energy);
+        for (int i = start; i < end; i++)
+            beam_dt[i] += T * coeff * beam_dE[i];
+    } else {
+        const double coeff = 1. / (beta * beta * energy);
+        const double eta0 = eta_zero * coeff;
+        const double eta1 = eta_one * coeff * coeff;
+        const double eta2 = eta_two * coeff * coeff * coeff;
+
+        if (alpha_order == 1)
+            for (int i = start; i < end; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]) - 1.);
+        else if (alpha_order == 2)
+            for (int i = start; i < end; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]
+                                         - eta1 * beam_dE[i] * beam_dE[i]) - 1.);
+        else
+            for (int i = start; i < end; i++)
+                beam_dt[i] += T * (1. / (1. - eta0 * beam_dE[i]
+                                         - eta1 * beam_dE[i] * beam_dE[i]
+                                         - eta2 * beam_dE[i] * beam_dE[i] * beam_dE[i]) - 1.);
+    }
+}
+
+#endif  // DRIFT_BLOCK_H_
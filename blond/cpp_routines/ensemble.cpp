@@ -0,0 +1,218 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines for the tracking of an ensemble of independent beams
+// stored in one [n_ensemble][n_macroparticles] block: kick, drift and
+// histogram of all the members in one call, with parameters per member.
+// The blocks of particles of all the members are distributed to the threads,
+// so that many small beams use all the threads. The arithmetic per particle is
+// the same as in kick.cpp, drift.cpp and histogram.cpp, so the results are
+// identical to the tracking of each member separately.
+
+#include <stdint.h>
+#include <string.h>     // memset()
+#include <math.h>
+#include "sin.h"
+#include "drift_block.h"
+
+using namespace vdt;
+
+// Number of particles of a block
+static const int STEP = 1024;
+
+// voltage, omega_RF, phi_RF: [n_ensemble][n_rf]
+// acc_kick: [n_ensemble]
+template <typename T>
+static void ensemble_kick_impl(const T * __restrict__ beam_dt,
+                               T * __restrict__ beam_dE,
+                               const int n_ensemble,
+                               const int n_macroparticles, const int n_rf,
+                               const double * __restrict__ voltage,
+                               const double * __restrict__ omega_RF,
+                               const double * __restrict__ phi_RF,
+                               const double * __restrict__ acc_kick)
+{
+    const int n_blocks = (n_macroparticles + STEP - 1) / STEP;
+
+    #pragma omp parallel for
+    for (int b = 0; b < n_ensemble * n_blocks; b++) {
+        const int k = b / n_blocks;
+        const int start = (b % n_blocks) * STEP;
+        const int end = n_macroparticles - start > STEP ?
+                        start + STEP : n_macroparticles;
+        const T *dt = beam_dt + (int64_t) k * n_macroparticles;
+        T *dE = beam_dE + (int64_t) k * n_macroparticles;
+
+        // KICK
+        for (int j = 0; j < n_rf; j++) {
+            const double v = voltage[k * n_rf + j];
+            const double o = omega_RF[k * n_rf + j];
+            const double p = phi_RF[k * n_rf + j];
+            for (int i = start; i < end; i++)
+                dE[i] = dE[i] + v * fast_sin(o * dt[i] + p);
+        }
+
+        // SYNCHRONOUS ENERGY CHANGE
+        for (int i = start; i < end; i++)
+            dE[i] = dE[i] + acc_kick[k];
+    }
+}
+
+// All the parameters are given per member: [n_ensemble]
+template <typename T>
+static void ensemble_drift_impl(T * __restrict__ beam_dt,
+                                const T * __restrict__ beam_dE,
+                                const int n_ensemble,
+                                const int n_macroparticles,
+                                const int * __restrict__ solver,
+                                const int * __restrict__ alpha_order,
+                                const double * __restrict__ t_rev,
+                                const double * __restrict__ length_ratio,
+                                const double * __restrict__ eta_zero,
+                                const double * __restrict__ eta_one,
+                                const double * __restrict__ eta_two,
+                                const double * __restrict__ beta,
+                                const double * __restrict__ energy)
+{
+    const int n_blocks = (n_macroparticles + STEP - 1) / STEP;
+
+    #pragma omp parallel for
+    for (int b = 0; b < n_ensemble * n_blocks; b++) {
+        const int k = b / n_blocks;
+        const int start = (b % n_blocks) * STEP;
+        const int end = n_macroparticles - start > STEP ?
+                        start + STEP : n_macroparticles;
+        drift_block(beam_dt + (int64_t) k * n_macroparticles,
+                    beam_dE + (int64_t) k * n_macroparticles,
+                    solver[k], alpha_order[k], t_rev[k], length_ratio[k],
+                    eta_zero[k], eta_one[k], eta_two[k], beta[k], energy[k],
+                    start, end);
+    }
+}
+
+// One histogram per member, output: [n_ensemble][n_slices]; the members are
+// distributed to the threads
+template <typename T>
+static void ensemble_histogram_impl(const T * __restrict__ input,
+                                    double * __restrict__ output,
+                                    const int n_ensemble,
+                                    const int n_macroparticles,
+                                    const double * __restrict__ cut_left,
+                                    const double * __restrict__ cut_right,
+                                    const int n_slices)
+{
+    #pragma omp parallel for schedule(dynamic)
+    for (int k = 0; k < n_ensemble; k++) {
+        const T *x = input + (int64_t) k * n_macroparticles;
+        double *histo = output + (int64_t) k * n_slices;
+        const double left = cut_left[k];
+        const double inv_bin_width = n_slices / (cut_right[k] - left);
+
+        memset(histo, 0., n_slices * sizeof(double));
+        for (int i = 0; i < n_macroparticles; i++) {
+            const float fbin = floor((x[i] - left) * inv_bin_width);
+            const int bin = (int) fbin;
+            if (bin < 0 || bin >= n_slices) continue;
+            histo[bin] += 1.;
+        }
+    }
+}
+
+extern "C" void ensemble_kick(const double * __restrict__ beam_dt,
+                              double * __restrict__ beam_dE,
+                              const int n_ensemble,
+                              const int n_macroparticles, const int n_rf,
+                              const double * __restrict__ voltage,
+                              const double * __restrict__ omega_RF,
+                              const double * __restrict__ phi_RF,
+                              const double * __restrict__ acc_kick)
+{
+    ensemble_kick_impl<double>(beam_dt, beam_dE, n_ensemble, n_macroparticles,
+                               n_rf, voltage, omega_RF, phi_RF, acc_kick);
+}
+
+extern "C" void ensemble_kickf(const float * __restrict__ beam_dt,
+                               float * __restrict__ beam_dE,
+                               const int n_ensemble,
+                               const int n_macroparticles, const int n_rf,
+                               const double * __restrict__ voltage,
+                               const double * __restrict__ omega_RF,
+                               const double * __restrict__ phi_RF,
+                               const double * __restrict__ acc_kick)
+{
+    ensemble_kick_impl<float>(beam_dt, beam_dE, n_ensemble, n_macroparticles,
+                              n_rf, voltage, omega_RF, phi_RF, acc_kick);
+}
+
+extern "C" void ensemble_drift(double * __restrict__ beam_dt,
+                               const double * __restrict__ beam_dE,
+                               const int n_ensemble,
+                               const int n_macroparticles,
+                               const int * __restrict__ solver,
+                               const int * __restrict__ alpha_order,
+                               const double * __restrict__ t_rev,
+                               const double * __restrict__ length_ratio,
+                               const double * __restrict__ eta_zero,
+                               const double * __restrict__ eta_one,
+                               const double * __restrict__ eta_two,
+                               const double * __restrict__ beta,
+                               const double * __restrict__ energy)
+{
+    ensemble_drift_impl<double>(beam_dt, beam_dE, n_ensemble,
+                                n_macroparticles, solver, alpha_order, t_rev,
+                                length_ratio, eta_zero, eta_one, eta_two,
+                                beta, energy);
+}
+
+extern "C" void ensemble_driftf(float * __restrict__ beam_dt,
+                                const float * __restrict__ beam_dE,
+                                const int n_ensemble,
+                                const int n_macroparticles,
+                                const int * __restrict__ solver,
+                                const int * __restrict__ alpha_order,
+                                const double * __restrict__ t_rev,
+                                const double * __restrict__ length_ratio,
+                                const double * __restrict__ eta_zero,
+                                const double * __restrict__ eta_one,
+                                const double * __restrict__ eta_two,
+                                const double * __restrict__ beta,
+                                const double * __restrict__ energy)
+{
+    ensemble_drift_impl<float>(beam_dt, beam_dE, n_ensemble,
+                               n_macroparticles, solver, alpha_order, t_rev,
+                               length_ratio, eta_zero, eta_one, eta_two,
+                               beta, energy);
+}
+
+extern "C" void ensemble_histogram(const double * __restrict__ input,
+                                   double * __restrict__ output,
+                                   const int n_ensemble,
+                                   const int n_macroparticles,
+                                   const double * __restrict__ cut_left,
+                                   const double * __restrict__ cut_right,
+                                   const int n_slices)
+{
+    ensemble_histogram_impl<double>(input, output, n_ensemble,
+                                    n_macroparticles, cut_left, cut_right,
+                                    n_slices);
+}
+
+extern "C" void ensemble_histogramf(const float * __restrict__ input,
+                                    double * __restrict__ output,
+                                    const int n_ensemble,
+                                    const int n_macroparticles,
+                                    const double * __restrict__ cut_left,
+                                    const double * __restrict__ cut_right,
+                                    const int n_slices)
+{
+    ensemble_histogram_impl<float>(input, output, n_ensemble,
+                                   n_macroparticles, cut_left, cut_right,
+                                   n_slices);
+}
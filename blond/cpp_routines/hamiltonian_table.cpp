@@ -0,0 +1,161 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines evaluating the Hamiltonian
+// H = eom_factor_dE * dE^2 + U(dt) of the macro-particles, with the potential
+// well U tabulated on a uniform time grid (any number of RF systems), and
+// checking whether the macro-particles are inside the separatrix
+
+#include <stdint.h>
+#include <stddef.h>
+#include <limits>
+
+// Linear interpolation of the potential well; dt must be inside the table
+static inline double potential(const double dt,
+                               const double * __restrict__ well,
+                               const double t_min, const double inv_bin_size,
+                               const int last)
+{
+    const double x = (dt - t_min) * inv_bin_size;
+    int k = (int) x;
+    k = k < 0 ? 0 : (k > last ? last : k);
+    const double t = x - k;
+    return well[k] + t * (well[k + 1] - well[k]);
+}
+
+template <typename T>
+static void hamiltonian_table_impl(const T * __restrict__ beam_dt,
+                                   const T * __restrict__ beam_dE,
+                                   const double * __restrict__ well,
+                                   const int n_points, const double t_min,
+                                   const double bin_size,
+                                   const double eom_factor_dE,
+                                   double * __restrict__ hamiltonian,
+                                   const int n_macroparticles)
+{
+    const double inv_bin_size = 1. / bin_size;
+    const double t_max = t_min + (n_points - 1) * bin_size;
+    const int last = n_points - 2;
+    const double outside = std::numeric_limits<double>::infinity();
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i++) {
+        const double dt = beam_dt[i];
+        const double dE = beam_dE[i];
+        // Infinite outside of the tabulated potential well
+        if (dt < t_min || dt > t_max)
+            hamiltonian[i] = outside;
+        else
+            hamiltonian[i] = eom_factor_dE * dE * dE
+                             + potential(dt, well, t_min, inv_bin_size, last);
+    }
+}
+
+// Particles inside the separatrix: t_left <= dt <= t_right and H < H_sep.
+// The result is written in is_in (if not NULL), and the particles outside
+// are flagged as lost in beam_id (if not NULL); the number of particles
+// outside that were not lost before is returned.
+template <typename T>
+static int separatrix_table_impl(const T * __restrict__ beam_dt,
+                                 const T * __restrict__ beam_dE,
+                                 int64_t * __restrict__ beam_id,
+                                 const double * __restrict__ well,
+                                 const int n_points, const double t_min,
+                                 const double bin_size,
+                                 const double eom_factor_dE,
+                                 const double t_left, const double t_right,
+                                 const double H_sep,
+                                 unsigned char * __restrict__ is_in,
+                                 const int n_macroparticles)
+{
+    const double inv_bin_size = 1. / bin_size;
+    const int last = n_points - 2;
+    int n_lost = 0;
+
+    #pragma omp parallel for reduction(+ : n_lost)
+    for (int i = 0; i < n_macroparticles; i++) {
+        const double dt = beam_dt[i];
+        const double dE = beam_dE[i];
+        bool inside = dt >= t_left && dt <= t_right;
+        if (inside)
+            inside = eom_factor_dE * dE * dE
+                     + potential(dt, well, t_min, inv_bin_size, last) < H_sep;
+        if (is_in != NULL) is_in[i] = inside;
+        if (beam_id != NULL && !inside && beam_id[i] != 0) {
+            beam_id[i] = 0;
+            n_lost++;
+        }
+    }
+    return n_lost;
+}
+
+extern "C" void hamiltonian_table(const double * __restrict__ beam_dt,
+                                  const double * __restrict__ beam_dE,
+                                  const double * __restrict__ well,
+                                  const int n_points, const double t_min,
+                                  const double bin_size,
+                                  const double eom_factor_dE,
+                                  double * __restrict__ hamiltonian,
+                                  const int n_macroparticles)
+{
+    hamiltonian_table_impl<double>(beam_dt, beam_dE, well, n_points, t_min,
+                                   bin_size, eom_factor_dE, hamiltonian,
+                                   n_macroparticles);
+}
+
+extern "C" void hamiltonian_tablef(const float * __restrict__ beam_dt,
+                                   const float * __restrict__ beam_dE,
+                                   const double * __restrict__ well,
+                                   const int n_points, const double t_min,
+                                   const double bin_size,
+                                   const double eom_factor_dE,
+                                   double * __restrict__ hamiltonian,
+                                   const int n_macroparticles)
+{
+    hamiltonian_table_impl<float>(beam_dt, beam_dE, well, n_points, t_min,
+                                  bin_size, eom_factor_dE, hamiltonian,
+                                  n_macroparticles);
+}
+
+extern "C" int separatrix_table(const double * __restrict__ beam_dt,
+                                const double * __restrict__ beam_dE,
+                                int64_t * __restrict__ beam_id,
+                                const double * __restrict__ well,
+                                const int n_points, const double t_min,
+                                const double bin_size,
+                                const double eom_factor_dE,
+                                const double t_left, const double t_right,
+                                const double H_sep,
+                                unsigned char * __restrict__ is_in,
+                                const int n_macroparticles)
+{
+    return separatrix_table_impl<double>(beam_dt, beam_dE, beam_id, well,
+                                         n_points, t_min, bin_size,
+                                         eom_factor_dE, t_left, t_right,
+                                         H_sep, is_in, n_macroparticles);
+}
+
+extern "C" int separatrix_tablef(const float * __restrict__ beam_dt,
+                                 const float * __restrict__ beam_dE,
+                                 int64_t * __restrict__ beam_id,
+                                 const double * __restrict__ well,
+                                 const int n_points, const double t_min,
+                                 const double bin_size,
+                                 const double eom_factor_dE,
+                                 const double t_left, const double t_right,
+                                 const double H_sep,
+                                 unsigned char * __restrict__ is_in,
+                                 const int n_macroparticles)
+{
+    return separatrix_table_impl<float>(beam_dt, beam_dE, beam_id, well,
+                                        n_points, t_min, bin_size,
+                                        eom_factor_dE, t_left, t_right,
+                                        H_sep, is_in, n_macroparticles);
+}
@@ -23,10 +23,11 @@ int omp_get_num_threads() {return 1;}
 int omp_get_thread_num() {return 0;}
 #endif
 
-extern "C" void histogram(const double *__restrict__ input,
-                          double *__restrict__ output, const double cut_left,
-                          const double cut_right, const int n_slices,
-                          const int n_macroparticles)
+template <typename T>
+static void histogram_impl(const T *__restrict__ input,
+                           double *__restrict__ output, const double cut_left,
+                           const double cut_right, const int n_slices,
+                           const int n_macroparticles)
 {
     // Number of Iterations of the inner loop
     const int STEP = 16;
@@ -76,10 +77,30 @@ extern "C" void histogram(const double *__restrict__ input,
     free(histo);
 }
 
-extern "C" void smooth_histogram(const double *__restrict__ input,
-                                 double *__restrict__ output, const double cut_left,
-                                 const double cut_right, const int n_slices,
-                                 const int n_macroparticles)
+extern "C" void histogram(const double *__restrict__ input,
+                          double *__restrict__ output, const double cut_left,
+                          const double cut_right, const int n_slices,
+                          const int n_macroparticles)
+{
+    histogram_impl<double>(input, output, cut_left, cut_right, n_slices,
+                           n_macroparticles);
+}
+
+// Single precision coordinates, the histogram is accumulated in double
+extern "C" void histogramf(const float *__restrict__ input,
+                           double *__restrict__ output, const double cut_left,
+                           const double cut_right, const int n_slices,
+                           const int n_macroparticles)
+{
+    histogram_impl<float>(input, output, cut_left, cut_right, n_slices,
+                          n_macroparticles);
+}
+
+template <typename T>
+static void smooth_histogram_impl(const T *__restrict__ input,
+                                  double *__restrict__ output, const double cut_left,
+                                  const double cut_right, const int n_slices,
+                                  const int n_macroparticles)
 {
 
     int i;
@@ -120,6 +141,26 @@ extern "C" void smooth_histogram(const double *__restrict__ input,
 
 
 
+extern "C" void smooth_histogram(const double *__restrict__ input,
+                                 double *__restrict__ output, const double cut_left,
+                                 const double cut_right, const int n_slices,
+                                 const int n_macroparticles)
+{
+    smooth_histogram_impl<double>(input, output, cut_left, cut_right,
+                                  n_slices, n_macroparticles);
+}
+
+extern "C" void smooth_histogramf(const float *__restrict__ input,
+                                  double *__restrict__ output, const double cut_left,
+                                  const double cut_right, const int n_slices,
+                                  const int n_macroparticles)
+{
+    smooth_histogram_impl<float>(input, output, cut_left, cut_right,
+                                 n_slices, n_macroparticles);
+}
+
+
+
 /***** serial histogram
 
 extern "C" void histogram(const double *__restrict__ input,
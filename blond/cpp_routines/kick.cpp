@@ -15,13 +15,14 @@ Project website: http://blond.web.cern.ch/
 
 using namespace vdt;
 
-extern "C" void kick(const double * __restrict__ beam_dt, 
-					 double * __restrict__ beam_dE, const int n_rf, 
-					 const double * __restrict__ voltage, 
-					 const double * __restrict__ omega_RF, 
-					 const double * __restrict__ phi_RF,
-					 const int n_macroparticles,
-					 const double acc_kick){
+template <typename T>
+static void kick_impl(const T * __restrict__ beam_dt, 
+					  T * __restrict__ beam_dE, const int n_rf, 
+					  const double * __restrict__ voltage, 
+					  const double * __restrict__ omega_RF, 
+					  const double * __restrict__ phi_RF,
+					  const int n_macroparticles,
+					  const double acc_kick){
 int j;
 
 // KICK
@@ -38,6 +39,29 @@ for (j = 0; j < n_rf; j++)
 
 }
 
+extern "C" void kick(const double * __restrict__ beam_dt, 
+					 double * __restrict__ beam_dE, const int n_rf, 
+					 const double * __restrict__ voltage, 
+					 const double * __restrict__ omega_RF, 
+					 const double * __restrict__ phi_RF,
+					 const int n_macroparticles,
+					 const double acc_kick){
+	kick_impl<double>(beam_dt, beam_dE, n_rf, voltage, omega_RF, phi_RF,
+	                  n_macroparticles, acc_kick);
+}
+
+// Single precision coordinates, the kick is computed in double precision
+extern "C" void kickf(const float * __restrict__ beam_dt, 
+					  float * __restrict__ beam_dE, const int n_rf, 
+					  const double * __restrict__ voltage, 
+					  const double * __restrict__ omega_RF, 
+					  const double * __restrict__ phi_RF,
+					  const int n_macroparticles,
+					  const double acc_kick){
+	kick_impl<float>(beam_dt, beam_dE, n_rf, voltage, omega_RF, phi_RF,
+	                 n_macroparticles, acc_kick);
+}
+
 extern "C" void rf_volt_comp(const double * __restrict__ voltage,
                              const double * __restrict__ omega_RF,
                              const double * __restrict__ phi_RF,
@@ -0,0 +1,192 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine that applies the RF kick, the drift and the slicing
+// of the beam in a single pass over the particle coordinates.
+// The arithmetic per particle is the same as in kick.cpp, drift.cpp and
+// histogram.cpp, so the results are identical to the sequential calls.
+
+#include <string.h>     // memset()
+#include <stdlib.h>     // malloc()
+#include <math.h>
+#include "sin.h"
+
+#ifdef PARALLEL
+#include <omp.h>        // omp_get_thread_num(), omp_get_num_threads()
+#else
+static int omp_get_max_threads() {return 1;}
+static int omp_get_num_threads() {return 1;}
+static int omp_get_thread_num() {return 0;}
+#endif
+
+using namespace vdt;
+
+template <typename R>
+static void kick_drift_histogram_impl(R * __restrict__ beam_dt,
+                                      R * __restrict__ beam_dE,
+                                      const int n_rf,
+                                      const double * __restrict__ voltage,
+                                      const double * __restrict__ omega_RF,
+                                      const double * __restrict__ phi_RF,
+                                      const double acc_kick,
+                                      const int solver,
+                                      const double T0, const double length_ratio,
+                                      const int alpha_order,
+                                      const double eta_zero,
+                                      const double eta_one,
+                                      const double eta_two,
+                                      const double beta, const double energy,
+                                      double * __restrict__ profile,
+                                      const double cut_left,
+                                      const double cut_right,
+                                      const int n_slices,
+                                      const int n_macroparticles)
+{
+    // Number of Iterations of the inner loop
+    const int STEP = 16;
+    const double inv_bin_width = n_slices / (cut_right - cut_left);
+
+    const double T = T0 * length_ratio;
+    const bool simple = (solver == 0);
+    const double coeff = simple ? eta_zero / (beta * beta * energy)
+                         : 1. / (beta * beta * energy);
+    const double eta0 = eta_zero * coeff;
+    const double eta1 = eta_one * coeff * coeff;
+    const double eta2 = eta_two * coeff * coeff * coeff;
+
+    // allocate memory for the thread_private histogram
+    double **histo = (double **) malloc(omp_get_max_threads() * sizeof(double *));
+    histo[0] = (double *) malloc (omp_get_max_threads() * n_slices * sizeof(double));
+    for (int i = 0; i < omp_get_max_threads(); i++)
+        histo[i] = (*histo + n_slices * i);
+
+    #pragma omp parallel
+    {
+        const int id = omp_get_thread_num();
+        const int threads = omp_get_num_threads();
+        memset(histo[id], 0., n_slices * sizeof(double));
+        float fbin[STEP];
+
+        #pragma omp for
+        for (int i = 0; i < n_macroparticles; i += STEP) {
+
+            const int loop_count = n_macroparticles - i > STEP ?
+                                   STEP : n_macroparticles - i;
+
+            // KICK
+            for (int j = 0; j < n_rf; j++)
+                for (int k = i; k < i + loop_count; k++)
+                    beam_dE[k] = beam_dE[k] + voltage[j]
+                                 * fast_sin(omega_RF[j] * beam_dt[k] + phi_RF[j]);
+
+            // SYNCHRONOUS ENERGY CHANGE
+            for (int k = i; k < i + loop_count; k++)
+                beam_dE[k] = beam_dE[k] + acc_kick;
+
+            // DRIFT
+            if (simple) {
+                for (int k = i; k < i + loop_count; k++)
+                    beam_dt[k] += T * coeff * beam_dE[k];
+            } else if (alpha_order == 1) {
+                for (int k = i; k < i + loop_count; k++)
+                    beam_dt[k] += T * (1. / (1. - eta0 * beam_dE[k]) - 1.);
+            } else if (alpha_order == 2) {
+                for (int k = i; k < i + loop_count; k++)
+                    beam_dt[k] += T * (1. / (1. - eta0 * beam_dE[k]
+                                             - eta1 * beam_dE[k] * beam_dE[k]) - 1.);
+            } else {
+                for (int k = i; k < i + loop_count; k++)
+                    beam_dt[k] += T * (1. / (1. - eta0 * beam_dE[k]
+                                             - eta1 * beam_dE[k] * beam_dE[k]
+                                             - eta2 * beam_dE[k] * beam_dE[k] * beam_dE[k]) - 1.);
+            }
+
+            // HISTOGRAM
+            for (int j = 0; j < loop_count; j++) {
+                fbin[j] = floor((beam_dt[i + j] - cut_left) * inv_bin_width);
+            }
+            for (int j = 0; j < loop_count; j++) {
+                const int bin  = (int) fbin[j];
+                if (bin < 0 || bin >= n_slices) continue;
+                histo[id][bin] += 1.;
+            }
+        }
+
+        // Reduce to a single histogram
+        #pragma omp for
+        for (int i = 0; i < n_slices; i++) {
+            profile[i] = 0.;
+            for (int t = 0; t < threads; t++)
+                profile[i] += histo[t][i];
+        }
+    }
+
+    // free memory
+    free(histo[0]);
+    free(histo);
+}
+
+extern "C" void kick_drift_histogram(double * __restrict__ beam_dt,
+                                     double * __restrict__ beam_dE,
+                                     const int n_rf,
+                                     const double * __restrict__ voltage,
+                                     const double * __restrict__ omega_RF,
+                                     const double * __restrict__ phi_RF,
+                                     const double acc_kick,
+                                     const int solver,
+                                     const double T0, const double length_ratio,
+                                     const int alpha_order,
+                                     const double eta_zero,
+                                     const double eta_one,
+                                     const double eta_two,
+                                     const double beta, const double energy,
+                                     double * __restrict__ profile,
+                                     const double cut_left,
+                                     const double cut_right,
+                                     const int n_slices,
+                                     const int n_macroparticles)
+{
+    kick_drift_histogram_impl<double>(beam_dt, beam_dE, n_rf, voltage,
+                                      omega_RF, phi_RF, acc_kick, solver, T0,
+                                      length_ratio, alpha_order, eta_zero,
+                                      eta_one, eta_two, beta, energy, profile,
+                                      cut_left, cut_right, n_slices,
+                                      n_macroparticles);
+}
+
+// Single precision coordinates, kick and drift are computed in double
+// precision and the histogram is accumulated in double
+extern "C" void kick_drift_histogramf(float * __restrict__ beam_dt,
+                                      float * __restrict__ beam_dE,
+                                      const int n_rf,
+                                      const double * __restrict__ voltage,
+                                      const double * __restrict__ omega_RF,
+                                      const double * __restrict__ phi_RF,
+                                      const double acc_kick,
+                                      const int solver,
+                                      const double T0, const double length_ratio,
+                                      const int alpha_order,
+                                      const double eta_zero,
+                                      const double eta_one,
+                                      const double eta_two,
+                                      const double beta, const double energy,
+                                      double * __restrict__ profile,
+                                      const double cut_left,
+                                      const double cut_right,
+                                      const int n_slices,
+                                      const int n_macroparticles)
+{
+    kick_drift_histogram_impl<float>(beam_dt, beam_dE, n_rf, voltage,
+                                     omega_RF, phi_RF, acc_kick, solver, T0,
+                                     length_ratio, alpha_order, eta_zero,
+                                     eta_one, eta_two, beta, energy, profile,
+                                     cut_left, cut_right, n_slices,
+                                     n_macroparticles);
+}
@@ -0,0 +1,154 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine that applies the kick and the drift with the periodic
+// solver, in place and in a single pass over the particle coordinates.
+// Particles on the right of the frame only change reference, particles that
+// end up on the left of the frame change reference and are kicked and drifted
+// a second time. The arithmetic per particle is the same as in kick.cpp and
+// drift.cpp.
+
+#include "sin.h"
+
+using namespace vdt;
+
+template <typename R>
+static inline void kick_drift_particle(R &dt, R &dE, const int n_rf,
+                                       const double * __restrict__ voltage,
+                                       const double * __restrict__ omega_RF,
+                                       const double * __restrict__ phi_RF,
+                                       const double acc_kick,
+                                       const bool simple,
+                                       const int alpha_order, const double T,
+                                       const double coeff, const double eta0,
+                                       const double eta1, const double eta2)
+{
+    // KICK
+    for (int j = 0; j < n_rf; j++)
+        dE = dE + voltage[j] * fast_sin(omega_RF[j] * dt + phi_RF[j]);
+
+    // SYNCHRONOUS ENERGY CHANGE
+    dE = dE + acc_kick;
+
+    // DRIFT
+    if (simple)
+        dt += T * coeff * dE;
+    else if (alpha_order == 1)
+        dt += T * (1. / (1. - eta0 * dE) - 1.);
+    else if (alpha_order == 2)
+        dt += T * (1. / (1. - eta0 * dE - eta1 * dE * dE) - 1.);
+    else
+        dt += T * (1. / (1. - eta0 * dE - eta1 * dE * dE
+                         - eta2 * dE * dE * dE) - 1.);
+}
+
+// t_frame: length of the frame, i.e. the revolution period at the drift turn
+template <typename R>
+static void kick_drift_periodic_impl(R * __restrict__ beam_dt,
+                                     R * __restrict__ beam_dE,
+                                     const double t_frame,
+                                     const int n_rf,
+                                     const double * __restrict__ voltage,
+                                     const double * __restrict__ omega_RF,
+                                     const double * __restrict__ phi_RF,
+                                     const double acc_kick,
+                                     const int solver,
+                                     const double T0, const double length_ratio,
+                                     const int alpha_order,
+                                     const double eta_zero,
+                                     const double eta_one,
+                                     const double eta_two,
+                                     const double beta, const double energy,
+                                     const int n_macroparticles)
+{
+    const double T = T0 * length_ratio;
+    const bool simple = (solver == 0);
+    const double coeff = simple ? eta_zero / (beta * beta * energy)
+                         : 1. / (beta * beta * energy);
+    const double eta0 = eta_zero * coeff;
+    const double eta1 = eta_one * coeff * coeff;
+    const double eta2 = eta_two * coeff * coeff * coeff;
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i++) {
+        R dt = beam_dt[i];
+        R dE = beam_dE[i];
+
+        if (dt > t_frame) {
+            // Right of the frame: change of reference, no kick and drift
+            dt -= t_frame;
+        } else {
+            kick_drift_particle(dt, dE, n_rf, voltage, omega_RF, phi_RF,
+                                acc_kick, simple, alpha_order, T, coeff,
+                                eta0, eta1, eta2);
+            // Left of the updated frame: change of reference and second
+            // kick and drift with the previous wave
+            if (dt < 0) {
+                dt += t_frame;
+                kick_drift_particle(dt, dE, n_rf, voltage, omega_RF, phi_RF,
+                                    acc_kick, simple, alpha_order, T, coeff,
+                                    eta0, eta1, eta2);
+            }
+        }
+
+        beam_dt[i] = dt;
+        beam_dE[i] = dE;
+    }
+}
+
+extern "C" void kick_drift_periodic(double * __restrict__ beam_dt,
+                                    double * __restrict__ beam_dE,
+                                    const double t_frame,
+                                    const int n_rf,
+                                    const double * __restrict__ voltage,
+                                    const double * __restrict__ omega_RF,
+                                    const double * __restrict__ phi_RF,
+                                    const double acc_kick,
+                                    const int solver,
+                                    const double T0, const double length_ratio,
+                                    const int alpha_order,
+                                    const double eta_zero,
+                                    const double eta_one,
+                                    const double eta_two,
+                                    const double beta, const double energy,
+                                    const int n_macroparticles)
+{
+    kick_drift_periodic_impl<double>(beam_dt, beam_dE, t_frame, n_rf, voltage,
+                                     omega_RF, phi_RF, acc_kick, solver, T0,
+                                     length_ratio, alpha_order, eta_zero,
+                                     eta_one, eta_two, beta, energy,
+                                     n_macroparticles);
+}
+
+// Single precision coordinates, kick and drift are computed in double
+// precision
+extern "C" void kick_drift_periodicf(float * __restrict__ beam_dt,
+                                     float * __restrict__ beam_dE,
+                                     const double t_frame,
+                                     const int n_rf,
+                                     const double * __restrict__ voltage,
+                                     const double * __restrict__ omega_RF,
+                                     const double * __restrict__ phi_RF,
+                                     const double acc_kick,
+                                     const int solver,
+                                     const double T0, const double length_ratio,
+                                     const int alpha_order,
+                                     const double eta_zero,
+                                     const double eta_one,
+                                     const double eta_two,
+                                     const double beta, const double energy,
+                                     const int n_macroparticles)
+{
+    kick_drift_periodic_impl<float>(beam_dt, beam_dE, t_frame, n_rf, voltage,
+                                    omega_RF, phi_RF, acc_kick, solver, T0,
+                                    length_ratio, alpha_order, eta_zero,
+                                    eta_one, eta_two, beta, energy,
+                                    n_macroparticles);
+}
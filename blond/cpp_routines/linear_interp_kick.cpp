@@ -17,14 +17,15 @@ Project website: http://blond.web.cern.ch/
 #include <cmath>
 
 
-extern "C" void linear_interp_kick(double * __restrict__ beam_dt,
-                                   double * __restrict__ beam_dE,
-                                   const double * __restrict__ voltage_array,
-                                   const double * __restrict__ bin_centers,
-                                   const double charge,
-                                   const int n_slices,
-                                   const int n_macroparticles,
-                                   const double acc_kick)
+template <typename T>
+static void linear_interp_kick_impl(const T * __restrict__ beam_dt,
+                                    T * __restrict__ beam_dE,
+                                    const double * __restrict__ voltage_array,
+                                    const double * __restrict__ bin_centers,
+                                    const double charge,
+                                    const int n_slices,
+                                    const int n_macroparticles,
+                                    const double acc_kick)
 {
 
 
@@ -69,6 +70,35 @@ extern "C" void linear_interp_kick(double * __restrict__ beam_dt,
     free(factor);
 }
 
+extern "C" void linear_interp_kick(double * __restrict__ beam_dt,
+                                   double * __restrict__ beam_dE,
+                                   const double * __restrict__ voltage_array,
+                                   const double * __restrict__ bin_centers,
+                                   const double charge,
+                                   const int n_slices,
+                                   const int n_macroparticles,
+                                   const double acc_kick)
+{
+    linear_interp_kick_impl<double>(beam_dt, beam_dE, voltage_array,
+                                    bin_centers, charge, n_slices,
+                                    n_macroparticles, acc_kick);
+}
+
+// Single precision coordinates, the kick is computed in double precision
+extern "C" void linear_interp_kickf(float * __restrict__ beam_dt,
+                                    float * __restrict__ beam_dE,
+                                    const double * __restrict__ voltage_array,
+                                    const double * __restrict__ bin_centers,
+                                    const double charge,
+                                    const int n_slices,
+                                    const int n_macroparticles,
+                                    const double acc_kick)
+{
+    linear_interp_kick_impl<float>(beam_dt, beam_dE, voltage_array,
+                                   bin_centers, charge, n_slices,
+                                   n_macroparticles, acc_kick);
+}
+
 // Optimised C++ routine that interpolates the induced voltage
 // assuming constant slice width and a shift of the time array by a constant.
 // Only right extrapolation is assumed; it gives zero values.
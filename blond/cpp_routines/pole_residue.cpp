@@ -0,0 +1,70 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine computing the induced voltage of an impedance
+// described by poles and residues (see InducedVoltagePoleResidue), with the
+// wake W(t) = Re sum_p a_p exp(s_p t) propagated from one slice to the next,
+// in O(n_slices * n_poles)
+
+#include <cmath>
+#include <vector>
+
+// For each pole, the state z = sum_j n_j exp(s (t - t_j)) over the slices j
+// before t (and the previous turns) is propagated by exp(s bin_size) from one
+// slice to the next, and the voltage at slice i is
+//   sum_p Re[a_p (z_p + n_i / 2)]
+// (W(0) is halved). poles, residues and state are complex arrays (real and
+// imaginary parts interleaved). On input, state is the contribution of the
+// previous turns at the first slice; on output, the state at the last slice,
+// including its particles. The result is not multiplied by the charge.
+extern "C" void pole_residue_induced_voltage(const double * __restrict__ profile,
+                                             const int n_slices,
+                                             const double bin_size,
+                                             const double * __restrict__ poles,
+                                             const double * __restrict__ residues,
+                                             const int n_poles,
+                                             double * __restrict__ state,
+                                             double * __restrict__ induced_voltage)
+{
+    // Structure of arrays, so that the loop over the poles is vectorised
+    std::vector<double> z_re(n_poles), z_im(n_poles);
+    std::vector<double> a_re(n_poles), a_im(n_poles);
+    std::vector<double> step_re(n_poles), step_im(n_poles);
+    for (int p = 0; p < n_poles; p++) {
+        z_re[p] = state[2 * p];
+        z_im[p] = state[2 * p + 1];
+        a_re[p] = residues[2 * p];
+        a_im[p] = residues[2 * p + 1];
+        const double decay = std::exp(poles[2 * p] * bin_size);
+        step_re[p] = decay * std::cos(poles[2 * p + 1] * bin_size);
+        step_im[p] = decay * std::sin(poles[2 * p + 1] * bin_size);
+    }
+
+    for (int i = 0; i < n_slices; i++) {
+        const double n = profile[i];
+        const bool last = i == n_slices - 1;
+        double voltage = 0.;
+        #pragma omp simd reduction(+ : voltage)
+        for (int p = 0; p < n_poles; p++) {
+            voltage += a_re[p] * (z_re[p] + 0.5 * n) - a_im[p] * z_im[p];
+            const double re = z_re[p] + n;
+            const double im = z_im[p];
+            // No propagation after the last slice
+            z_re[p] = last ? re : re * step_re[p] - im * step_im[p];
+            z_im[p] = last ? im : re * step_im[p] + im * step_re[p];
+        }
+        induced_voltage[i] = voltage;
+    }
+
+    for (int p = 0; p < n_poles; p++) {
+        state[2 * p] = z_re[p];
+        state[2 * p + 1] = z_im[p];
+    }
+}
@@ -0,0 +1,87 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines filling arrays with normal and uniform random
+// numbers of the counter-based generator of random.h; the result does not
+// depend on the number of threads
+
+#include <stdint.h>
+#include "random.h"
+
+template <typename T>
+static void random_normal_impl(T * __restrict__ result, const int n,
+                               const uint64_t seed, const uint64_t stream,
+                               const double mean, const double sigma)
+{
+
+    #pragma omp parallel for
+    for (int j = 0; j < n / 2; j++) {
+        double z0, z1;
+        philox::normal_pair(seed, stream, j, z0, z1);
+        result[2 * j] = mean + sigma * z0;
+        result[2 * j + 1] = mean + sigma * z1;
+    }
+    // Odd number of values
+    if (n % 2) {
+        double z0, z1;
+        philox::normal_pair(seed, stream, n / 2, z0, z1);
+        result[n - 1] = mean + sigma * z0;
+    }
+}
+
+template <typename T>
+static void random_uniform_impl(T * __restrict__ result, const int n,
+                                const uint64_t seed, const uint64_t stream,
+                                const double low, const double high)
+{
+    const double width = high - low;
+
+    #pragma omp parallel for
+    for (int j = 0; j < n / 2; j++) {
+        double u0, u1;
+        philox::uniform_pair(seed, stream, j, u0, u1);
+        result[2 * j] = low + width * u0;
+        result[2 * j + 1] = low + width * u1;
+    }
+    // Odd number of values
+    if (n % 2) {
+        double u0, u1;
+        philox::uniform_pair(seed, stream, n / 2, u0, u1);
+        result[n - 1] = low + width * u0;
+    }
+}
+
+extern "C" void random_normal(double * __restrict__ result, const int n,
+                              const uint64_t seed, const uint64_t stream,
+                              const double mean, const double sigma)
+{
+    random_normal_impl<double>(result, n, seed, stream, mean, sigma);
+}
+
+extern "C" void random_normalf(float * __restrict__ result, const int n,
+                               const uint64_t seed, const uint64_t stream,
+                               const double mean, const double sigma)
+{
+    random_normal_impl<float>(result, n, seed, stream, mean, sigma);
+}
+
+extern "C" void random_uniform(double * __restrict__ result, const int n,
+                               const uint64_t seed, const uint64_t stream,
+                               const double low, const double high)
+{
+    random_uniform_impl<double>(result, n, seed, stream, low, high);
+}
+
+extern "C" void random_uniformf(float * __restrict__ result, const int n,
+                                const uint64_t seed, const uint64_t stream,
+                                const double low, const double high)
+{
+    random_uniform_impl<float>(result, n, seed, stream, low, high);
+}
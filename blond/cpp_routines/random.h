@@ -0,0 +1,85 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Counter-based random number generator Philox4x32-10 (Salmon et al., "Parallel
+// random numbers: as easy as 1, 2, 3", SC11). The random numbers of a
+// macro-particle depend only on the seed, the stream (e.g. the turn) and the
+// index of the particle, so that they can be generated on the fly by any
+// thread, independently of the number of threads.
+
+#ifndef RANDOM_H_
+#define RANDOM_H_
+
+#include <stdint.h>
+#include <cmath>
+#include "cos.h"
+
+namespace philox {
+
+static const uint32_t M0 = 0xD2511F53, M1 = 0xCD9E8D57;
+static const uint32_t W0 = 0x9E3779B9, W1 = 0xBB67AE85;
+
+// Ten rounds of Philox4x32 on the counter ctr with the key (k0, k1)
+static inline void philox4x32(uint32_t ctr[4], uint32_t k0, uint32_t k1)
+{
+    for (int r = 0; r < 10; r++) {
+        const uint64_t p0 = (uint64_t) M0 * ctr[0];
+        const uint64_t p1 = (uint64_t) M1 * ctr[2];
+        const uint32_t hi0 = p0 >> 32, lo0 = (uint32_t) p0;
+        const uint32_t hi1 = p1 >> 32, lo1 = (uint32_t) p1;
+        ctr[0] = hi1 ^ ctr[1] ^ k0;
+        ctr[1] = lo1;
+        ctr[2] = hi0 ^ ctr[3] ^ k1;
+        ctr[3] = lo0;
+        k0 += W0;
+        k1 += W1;
+    }
+}
+
+// Two uniform numbers in (0, 1) of 53 bits, from the block number block of
+// the stream
+static inline void uniform_pair(const uint64_t seed, const uint64_t stream,
+                                const uint64_t block, double &u0, double &u1)
+{
+    uint32_t ctr[4] = {(uint32_t) block, (uint32_t)(block >> 32),
+                       (uint32_t) stream, (uint32_t)(stream >> 32)};
+    philox4x32(ctr, (uint32_t) seed, (uint32_t)(seed >> 32));
+    const uint64_t x0 = ((uint64_t) ctr[0] << 32) | ctr[1];
+    const uint64_t x1 = ((uint64_t) ctr[2] << 32) | ctr[3];
+    const double scale = 1. / 9007199254740992.;  // 2^-53
+    u0 = ((x0 >> 11) + 0.5) * scale;
+    u1 = ((x1 >> 11) + 0.5) * scale;
+}
+
+// Two independent standard normal numbers (Box-Muller transform)
+static inline void normal_pair(const uint64_t seed, const uint64_t stream,
+                               const uint64_t block, double &z0, double &z1)
+{
+    double u0, u1;
+    uniform_pair(seed, stream, block, u0, u1);
+    const double r = std::sqrt(-2. * std::log(u0));
+    double s, c;
+    vdt::fast_sincos(2. * M_PI * u1, s, c);
+    z0 = r * c;
+    z1 = r * s;
+}
+
+// Standard normal number of index i of the stream
+static inline double normal(const uint64_t seed, const uint64_t stream,
+                            const uint64_t i)
+{
+    double z0, z1;
+    normal_pair(seed, stream, i >> 1, z0, z1);
+    return (i & 1) ? z1 : z0;
+}
+
+}  // namespace philox
+
+#endif  // RANDOM_H_
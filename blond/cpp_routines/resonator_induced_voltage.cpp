@@ -0,0 +1,103 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine computing the induced voltage of resonators for a
+// linearly interpolated line density (see InducedVoltageResonator), with a
+// recursion in O(n_slices + n_time) per resonator instead of the sum over
+// all the pairs of times and slices
+
+#include <cmath>
+
+// For t in time, the induced voltage of the resonator r is
+//   R / (2 omega_r Q) sum_j [c_j G(t - b_j) H(t - b_j) + S_j(t)]
+// with b_j the bin centres, c_j = kappa_{j-1} - kappa_j the changes of the
+// slope of the line density (kappa_{-1} = kappa_{n_slices-1} = 0),
+// G(x) = (2 cos(omega_p x) + sin(omega_p x) / Q~) exp(-alpha x)
+//      = Re[(2 - i / Q~) exp(s x)], s = -alpha + i omega_p
+// and the sign terms S_j, equal to twice the slope inside the line density.
+// The sum over the bins before t, Z(t) = sum_{b_j < t} c_j exp(s (t - b_j)),
+// is propagated from one time to the next as
+//   Z(t') = Z(t) exp(s (t' - t)) + sum_{t <= b_j < t'} c_j exp(s (t' - b_j))
+// so that time (and bin_centers) must be sorted in increasing order.
+extern "C" void resonator_induced_voltage(const double * __restrict__ kappa,
+                                          const double * __restrict__ bin_centers,
+                                          const int n_slices,
+                                          const double * __restrict__ time,
+                                          const int n_time,
+                                          const double * __restrict__ R,
+                                          const double * __restrict__ omega_r,
+                                          const double * __restrict__ Q,
+                                          const int n_resonators,
+                                          double * __restrict__ induced_voltage)
+{
+    // Slope before bin j, zero outside of the line density
+    auto slope = [&](const int j) {
+        return (j > 0 && j < n_slices) ? kappa[j - 1] : 0.;
+    };
+
+    // Sign terms, common to all the resonators
+    double coefficient = 0.;
+    for (int r = 0; r < n_resonators; r++)
+        coefficient += R[r] / (2. * omega_r[r] * Q[r]);
+
+    int j = 0;
+    for (int i = 0; i < n_time; i++) {
+        const double t = time[i];
+        // First bin not before t
+        while (j < n_slices && bin_centers[j] < t) j++;
+        double sign_terms = 0.;
+        if (j < n_slices && bin_centers[j] == t)
+            sign_terms = slope(j) + slope(j + 1);
+        else if (j > 0 && j < n_slices)
+            sign_terms = 2. * slope(j);
+        induced_voltage[i] = coefficient * sign_terms;
+    }
+
+    for (int r = 0; r < n_resonators; r++) {
+        const double alpha = omega_r[r] / (2. * Q[r]);
+        const double Q_tilde = Q[r] * std::sqrt(1. - 1. / (4. * Q[r] * Q[r]));
+        const double omega_p = omega_r[r] * Q_tilde / Q[r];
+        const double A_imag = -1. / Q_tilde;
+        const double factor = R[r] / (2. * omega_r[r] * Q[r]);
+
+        double Z_real = 0., Z_imag = 0.;
+        double t_previous = time[0];
+        j = 0;
+        for (int i = 0; i < n_time; i++) {
+            const double t = time[i];
+
+            // Propagation of the sum from the previous time
+            const double decay = std::exp(-alpha * (t - t_previous));
+            const double cos_shift = decay * std::cos(omega_p * (t - t_previous));
+            const double sin_shift = decay * std::sin(omega_p * (t - t_previous));
+            const double real = Z_real * cos_shift - Z_imag * sin_shift;
+            Z_imag = Z_real * sin_shift + Z_imag * cos_shift;
+            Z_real = real;
+            t_previous = t;
+
+            // Bins passed since the previous time
+            while (j < n_slices && bin_centers[j] < t) {
+                const double c = slope(j) - slope(j + 1);
+                const double x = t - bin_centers[j];
+                const double weight = c * std::exp(-alpha * x);
+                Z_real += weight * std::cos(omega_p * x);
+                Z_imag += weight * std::sin(omega_p * x);
+                j++;
+            }
+
+            // Re[(2 + i A_imag) Z], plus the bins at t with H(0) = 1/2
+            double voltage = 2. * Z_real - A_imag * Z_imag;
+            for (int k = j; k < n_slices && bin_centers[k] == t; k++)
+                voltage += slope(k) - slope(k + 1);
+
+            induced_voltage[i] += factor * voltage;
+        }
+    }
+}
@@ -0,0 +1,122 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines that tabulate the total RF voltage of a station and
+// apply the kick by interpolating the table, with one table lookup per
+// particle instead of one sine evaluation per particle and RF system.
+
+#include <cmath>
+#include "sin.h"
+
+using namespace vdt;
+
+// Total voltage and its derivative at t_min + i * bin_size
+extern "C" void rf_voltage_table(const double * __restrict__ voltage,
+                                 const double * __restrict__ omega_RF,
+                                 const double * __restrict__ phi_RF,
+                                 const int n_rf,
+                                 const double t_min, const double bin_size,
+                                 const int n_points,
+                                 double * __restrict__ table,
+                                 double * __restrict__ derivative)
+{
+    #pragma omp parallel for
+    for (int i = 0; i < n_points; i++) {
+        const double t = t_min + i * bin_size;
+        double v = 0., dv = 0.;
+        for (int j = 0; j < n_rf; j++) {
+            double s, c;
+            fast_sincos(omega_RF[j] * t + phi_RF[j], s, c);
+            v += voltage[j] * s;
+            dv += voltage[j] * omega_RF[j] * c;
+        }
+        table[i] = v;
+        derivative[i] = dv;
+    }
+}
+
+// Linear (cubic = 0) or cubic Hermite (cubic = 1) interpolation of the table.
+// If periodic = 1, the table covers one period of the voltage and the arrival
+// times are wrapped into it; otherwise the kick is extrapolated with the
+// first or last interval
+template <typename T>
+static void table_kick_impl(const T * __restrict__ beam_dt,
+                            T * __restrict__ beam_dE,
+                            const double * __restrict__ table,
+                            const double * __restrict__ derivative,
+                            const double t_min, const double bin_size,
+                            const int n_points, const int cubic,
+                            const int periodic, const double acc_kick,
+                            const int n_macroparticles)
+{
+    const double inv_bin_size = 1. / bin_size;
+    const int last = n_points - 2;
+    // Number of intervals in a period
+    const double span = periodic ? n_points - 1 : 0.;
+
+    if (cubic == 0) {
+        #pragma omp parallel for
+        for (int i = 0; i < n_macroparticles; i++) {
+            double x = (beam_dt[i] - t_min) * inv_bin_size;
+            if (periodic) x -= span * std::floor(x / span);
+            int k = (int) x;
+            k = k < 0 ? 0 : (k > last ? last : k);
+            const double t = x - k;
+            beam_dE[i] = beam_dE[i] + table[k] + t * (table[k + 1] - table[k])
+                         + acc_kick;
+        }
+    } else {
+        #pragma omp parallel for
+        for (int i = 0; i < n_macroparticles; i++) {
+            double x = (beam_dt[i] - t_min) * inv_bin_size;
+            if (periodic) x -= span * std::floor(x / span);
+            int k = (int) x;
+            k = k < 0 ? 0 : (k > last ? last : k);
+            const double t = x - k;
+            const double t2 = t * t;
+            const double t3 = t2 * t;
+            beam_dE[i] = beam_dE[i]
+                         + (2. * t3 - 3. * t2 + 1.) * table[k]
+                         + (t3 - 2. * t2 + t) * bin_size * derivative[k]
+                         + (3. * t2 - 2. * t3) * table[k + 1]
+                         + (t3 - t2) * bin_size * derivative[k + 1]
+                         + acc_kick;
+        }
+    }
+}
+
+extern "C" void table_kick(const double * __restrict__ beam_dt,
+                           double * __restrict__ beam_dE,
+                           const double * __restrict__ table,
+                           const double * __restrict__ derivative,
+                           const double t_min, const double bin_size,
+                           const int n_points, const int cubic,
+                           const int periodic, const double acc_kick,
+                           const int n_macroparticles)
+{
+    table_kick_impl<double>(beam_dt, beam_dE, table, derivative, t_min,
+                            bin_size, n_points, cubic, periodic, acc_kick,
+                            n_macroparticles);
+}
+
+// Single precision coordinates, the kick is computed in double precision
+extern "C" void table_kickf(const float * __restrict__ beam_dt,
+                            float * __restrict__ beam_dE,
+                            const double * __restrict__ table,
+                            const double * __restrict__ derivative,
+                            const double t_min, const double bin_size,
+                            const int n_points, const int cubic,
+                            const int periodic, const double acc_kick,
+                            const int n_macroparticles)
+{
+    table_kick_impl<float>(beam_dt, beam_dE, table, derivative, t_min,
+                           bin_size, n_points, cubic, periodic, acc_kick,
+                           n_macroparticles);
+}
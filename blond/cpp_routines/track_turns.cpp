@@ -0,0 +1,143 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routine that tracks the beam over many turns and RF sections
+// (kick and drift only, no intensity effects). The particles are processed in
+// blocks that stay in cache for all the turns of the call.
+// The arithmetic per particle is the same as in kick.cpp and drift.cpp, so the
+// results are identical to the turn-by-turn tracking.
+
+#include <stdlib.h>     // malloc()
+#include "sin.h"
+#include "drift_block.h"
+
+using namespace vdt;
+
+// voltage, omega_RF, phi_RF: [n_turns][sum(n_rf)], the RF systems of all the
+//                            sections at the kick turn
+// acc_kick: [n_turns][n_sections] at the kick turn
+// t_rev, eta_*, beta, energy: [n_turns][n_sections] at the drift turn
+template <typename T>
+static void track_turns_impl(T * __restrict__ beam_dt,
+                             T * __restrict__ beam_dE,
+                             const int n_macroparticles,
+                             const int n_turns, const int n_sections,
+                             const int * __restrict__ n_rf,
+                             const int * __restrict__ solver,
+                             const int * __restrict__ alpha_order,
+                             const double * __restrict__ length_ratio,
+                             const double * __restrict__ voltage,
+                             const double * __restrict__ omega_RF,
+                             const double * __restrict__ phi_RF,
+                             const double * __restrict__ acc_kick,
+                             const double * __restrict__ t_rev,
+                             const double * __restrict__ eta_zero,
+                             const double * __restrict__ eta_one,
+                             const double * __restrict__ eta_two,
+                             const double * __restrict__ beta,
+                             const double * __restrict__ energy)
+{
+    // Number of particles tracked together through all the turns
+    const int STEP = 1024;
+
+    int *rf_offset = (int *) malloc((n_sections + 1) * sizeof(int));
+    rf_offset[0] = 0;
+    for (int s = 0; s < n_sections; s++)
+        rf_offset[s + 1] = rf_offset[s] + n_rf[s];
+    const int n_rf_total = rf_offset[n_sections];
+
+    #pragma omp parallel for
+    for (int start = 0; start < n_macroparticles; start += STEP) {
+
+        const int end = n_macroparticles - start > STEP ?
+                        start + STEP : n_macroparticles;
+
+        for (int t = 0; t < n_turns; t++) {
+            for (int s = 0; s < n_sections; s++) {
+                const int ts = t * n_sections + s;
+                const double *v = voltage + t * n_rf_total + rf_offset[s];
+                const double *o = omega_RF + t * n_rf_total + rf_offset[s];
+                const double *p = phi_RF + t * n_rf_total + rf_offset[s];
+
+                // KICK
+                for (int j = 0; j < n_rf[s]; j++)
+                    for (int i = start; i < end; i++)
+                        beam_dE[i] = beam_dE[i] + v[j]
+                                     * fast_sin(o[j] * beam_dt[i] + p[j]);
+
+                // SYNCHRONOUS ENERGY CHANGE
+                for (int i = start; i < end; i++)
+                    beam_dE[i] = beam_dE[i] + acc_kick[ts];
+
+                // DRIFT
+                drift_block(beam_dt, beam_dE, solver[s], alpha_order[s],
+                            t_rev[ts], length_ratio[s], eta_zero[ts],
+                            eta_one[ts], eta_two[ts], beta[ts], energy[ts],
+                            start, end);
+            }
+        }
+    }
+
+    free(rf_offset);
+}
+
+extern "C" void track_turns(double * __restrict__ beam_dt,
+                            double * __restrict__ beam_dE,
+                            const int n_macroparticles,
+                            const int n_turns, const int n_sections,
+                            const int * __restrict__ n_rf,
+                            const int * __restrict__ solver,
+                            const int * __restrict__ alpha_order,
+                            const double * __restrict__ length_ratio,
+                            const double * __restrict__ voltage,
+                            const double * __restrict__ omega_RF,
+                            const double * __restrict__ phi_RF,
+                            const double * __restrict__ acc_kick,
+                            const double * __restrict__ t_rev,
+                            const double * __restrict__ eta_zero,
+                            const double * __restrict__ eta_one,
+                            const double * __restrict__ eta_two,
+                            const double * __restrict__ beta,
+                            const double * __restrict__ energy)
+{
+    track_turns_impl<double>(beam_dt, beam_dE, n_macroparticles, n_turns,
+                             n_sections, n_rf, solver, alpha_order,
+                             length_ratio, voltage, omega_RF, phi_RF,
+                             acc_kick, t_rev, eta_zero, eta_one, eta_two,
+                             beta, energy);
+}
+
+// Single precision coordinates, kick and drift are computed in double
+// precision
+extern "C" void track_turnsf(float * __restrict__ beam_dt,
+                             float * __restrict__ beam_dE,
+                             const int n_macroparticles,
+                             const int n_turns, const int n_sections,
+                             const int * __restrict__ n_rf,
+                             const int * __restrict__ solver,
+                             const int * __restrict__ alpha_order,
+                             const double * __restrict__ length_ratio,
+                             const double * __restrict__ voltage,
+                             const double * __restrict__ omega_RF,
+                             const double * __restrict__ phi_RF,
+                             const double * __restrict__ acc_kick,
+                             const double * __restrict__ t_rev,
+                             const double * __restrict__ eta_zero,
+                             const double * __restrict__ eta_one,
+                             const double * __restrict__ eta_two,
+                             const double * __restrict__ beta,
+                             const double * __restrict__ energy)
+{
+    track_turns_impl<float>(beam_dt, beam_dE, n_macroparticles, n_turns,
+                            n_sections, n_rf, solver, alpha_order,
+                            length_ratio, voltage, omega_RF, phi_RF,
+                            acc_kick, t_rev, eta_zero, eta_one, eta_two,
+                            beta, energy);
+}
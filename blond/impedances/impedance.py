@@ -17,11 +17,14 @@
 from __future__ import division, print_function
 from builtins import range, object
 import numpy as np
-from numpy.fft import rfft, irfft, rfftfreq
+from numpy.fft import rfftfreq
 from ctypes import c_uint, c_double, c_void_p
 from scipy.constants import e
 from ..toolbox.next_regular import next_regular
 from ..utils import bmath as bm
+from ..utils import bfft
+from . import impedance_cache
+from .impedance_sources import PoleResidue, Resonators
 
 
 class TotalInducedVoltage(object):
@@ -53,6 +56,14 @@ class TotalInducedVoltage(object):
         Array to store the computed induced voltage [V]
     time_array : float array
         Time array corresponding to induced_voltage [s]
+    fft_groups : list
+        Groups of single-turn InducedVoltageTime and InducedVoltageFreq
+        objects with the same FFT size, as (FFT plan, inverse FFT plan,
+        summed impedance, objects, impedances of the objects); the induced
+        voltage of a group is computed with one beam spectrum and one
+        inverse FFT
+    ungrouped_list : object list
+        Objects computing their induced voltage themselves
     """
     def __init__(self, Beam, Profile, induced_voltage_list):
         """
@@ -73,6 +84,9 @@ class TotalInducedVoltage(object):
         # Time array of the wake in s
         self.time_array = self.profile.bin_centers
 
+        # Objects sharing the beam spectrum and the inverse FFT
+        self.group_impedances()
+
     def reprocess(self):
         """
         Reprocess the impedance contributions. To be run when profile changes
@@ -81,14 +95,72 @@ class TotalInducedVoltage(object):
         for induced_voltage_object in self.induced_voltage_list:
             induced_voltage_object.process()
 
+        self.group_impedances()
+
+    def group_impedances(self):
+        """
+        Method to group by FFT size the objects computing their induced
+        voltage of the current turn as an FFT convolution with the profile
+        (InducedVoltageTime and InducedVoltageFreq without multi-turn wake),
+        summing their impedances. Each turn, one beam spectrum and one inverse
+        FFT are computed per group, instead of one per object, and the
+        induced_voltage of the grouped objects is not updated. The groups are
+        built again by induced_voltage_sum when the impedance of one of their
+        objects is replaced, e.g. by its process() method.
+        """
+
+        groups = {}
+        self.ungrouped_list = []
+        for induced_voltage_object in self.induced_voltage_list:
+            if (type(induced_voltage_object).induced_voltage_1turn
+                    is _InducedVoltage.induced_voltage_1turn
+                    and not induced_voltage_object.multi_turn_wake
+                    and induced_voltage_object.beam is self.beam
+                    and induced_voltage_object.profile is self.profile):
+                groups.setdefault(induced_voltage_object.n_fft,
+                                  []).append(induced_voltage_object)
+            else:
+                self.ungrouped_list.append(induced_voltage_object)
+
+        self.fft_groups = []
+        for n_fft in groups:
+            objects = groups[n_fft]
+            if len(objects) == 1:
+                # Nothing to share
+                self.ungrouped_list.append(objects[0])
+                continue
+            total_impedance = 0
+            for induced_voltage_object in objects:
+                total_impedance = total_impedance + \
+                    induced_voltage_object.total_impedance
+            self.fft_groups.append((objects[0].fft, objects[0].ifft,
+                                    total_impedance, objects,
+                                    [induced_voltage_object.total_impedance
+                                     for induced_voltage_object in objects]))
+
     def induced_voltage_sum(self):
         """
         Method to sum all the induced voltages in one single array.
         """
 
+        # Objects processed again since the groups were built
+        for group in self.fft_groups:
+            if any(induced_voltage_object.total_impedance is not impedance
+                   for induced_voltage_object, impedance
+                   in zip(group[3], group[4])):
+                self.group_impedances()
+                break
+
         temp_induced_voltage = 0
 
-        for induced_voltage_object in self.induced_voltage_list:
+        for fft, ifft, total_impedance, objects, _ in self.fft_groups:
+            self.profile.beam_spectrum_generation(fft.n, fft)
+            temp_induced_voltage += - (
+                self.beam.Particle.charge * e * self.beam.ratio *
+                ifft.irfft(total_impedance * self.profile.beam_spectrum)
+            )[:self.profile.n_slices]
+
+        for induced_voltage_object in self.ungrouped_list:
             induced_voltage_object.induced_voltage_generation()
             temp_induced_voltage += \
                 induced_voltage_object.induced_voltage[:self.profile.n_slices]
@@ -153,7 +225,8 @@ class _InducedVoltage(object):
     multi_turn_wake : boolean, optional
         Multi-turn wake enable flag
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'freq_resident' or 'time'
+        (default)
     RFParams : object, optional
         RFStation object for turn counter and revolution period
 
@@ -174,7 +247,8 @@ class _InducedVoltage(object):
     multi_turn_wake : boolean
         Multi-turn wake enable flag
     mtw_mode : boolean
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'freq_resident' or 'time'
+        (default)
     """
 
     def __init__(self, Beam, Profile, frequency_resolution=None,
@@ -202,11 +276,18 @@ class _InducedVoltage(object):
         # Multi-turn wake enable flag
         self.multi_turn_wake = multi_turn_wake
 
-        # Multi-turn wake mode can be 'freq' or 'time' (default). If 'freq'
-        # is used, each turn the induced voltage of previous turns is shifted
-        # in the frequency domain. For 'time', a linear interpolation is used.
+        # Multi-turn wake mode can be 'freq', 'freq_resident' or 'time'
+        # (default). If 'freq' is used, each turn the induced voltage of
+        # previous turns is shifted in the frequency domain. With
+        # 'freq_resident', the memory stays in the frequency domain and only
+        # the kick window is transformed back. For 'time', a linear
+        # interpolation is used.
         self.mtw_mode = mtw_mode
 
+        # Extra length of the memory in s, for the front wake, in the 'freq'
+        # and 'freq_resident' multi-turn wake modes
+        self.buffer_extra = 0
+
         self.process()
 
     def process(self):
@@ -265,13 +346,51 @@ class _InducedVoltage(object):
                     np.ceil(np.max(self.buffer_extra) / self.profile.bin_size)
                 self.n_mtw_memory += int(self.buffer_size)
                 # Using next regular for FFTs speedup
-                self.n_mtw_fft = next_regular(self.n_mtw_memory)
-                # Frequency and omega arrays
-                self.freq_mtw = \
-                    rfftfreq(self.n_mtw_fft, d=self.profile.bin_size)
-                self.omegaj_mtw = 2.0j * np.pi * self.freq_mtw
+                self.mtw_frequencies(next_regular(self.n_mtw_memory))
                 # Selecting time-shift method
                 self.shift_trev = self.shift_trev_freq
+            elif self.mtw_mode == 'freq_resident':
+                # The contributions of the previous turns are dropped once
+                # they are older than the wake length plus the profile length
+                self.mtw_horizon = (self.n_induced_voltage +
+                                    self.profile.n_slices) * \
+                    self.profile.bin_size
+                # The period of the FFTs covers the kick window, the horizon
+                # and the front wake, so that the circular shifts never bring
+                # a contribution back into the kick window
+                self.buffer_size = \
+                    np.ceil(np.max(self.buffer_extra) / self.profile.bin_size)
+                self.mtw_frequencies(next_regular(
+                    2 * self.n_induced_voltage + int(self.profile.n_slices) +
+                    int(self.buffer_size)))
+                # Spectra of the contributions of the turns within the
+                # horizon (zero once dropped), their ages in s and their sum.
+                # The spectra are stored in a frame rotating with the time
+                # modulo the period of the FFTs, so that the turns are not
+                # rotated one by one
+                n_turns = int(np.ceil(self.mtw_horizon /
+                                      np.min(self.RFParams.t_rev))) + 1
+                self.mtw_contributions = np.zeros(
+                    (n_turns, self.fft_mtw.n_spectrum), dtype=complex)
+                self.mtw_ages = np.full(n_turns, np.inf)
+                self.mtw_sum = np.zeros(self.fft_mtw.n_spectrum,
+                                        dtype=complex)
+                self.mtw_period = self.n_mtw_fft * self.profile.bin_size
+                self.mtw_time = 0.
+                self.mtw_rotation = np.ones(self.fft_mtw.n_spectrum,
+                                            dtype=complex)
+                # Phase factor of a revolution period
+                self.mtw_t_rev = None
+                self.mtw_step = np.zeros(self.fft_mtw.n_spectrum,
+                                         dtype=complex)
+                # Turns between two exact computations of the rotation and
+                # of the sum, keeping the rounding errors small
+                self.mtw_turns = 0
+                self.mtw_resync = 100
+                self.mtw_voltage = np.zeros(self.ifft_mtw.n)
+                # Select induced voltage generation method to be used
+                self.induced_voltage_generation = self.induced_voltage_mtw_freq
+                return
             else:
                 # Selecting time-shift method
                 self.shift_trev = self.shift_trev_time
@@ -287,16 +406,43 @@ class _InducedVoltage(object):
         else:
             self.induced_voltage_generation = self.induced_voltage_1turn
 
+    def mtw_frequencies(self, n_mtw_fft):
+        """
+        Method to set the frequency arrays and the FFT plans of the memory
+        for the multi-turn wake in frequency domain
+        """
+
+        self.n_mtw_fft = n_mtw_fft
+        # Frequency and omega arrays
+        self.freq_mtw = rfftfreq(self.n_mtw_fft, d=self.profile.bin_size)
+        self.omegaj_mtw = 2.0j * np.pi * self.freq_mtw
+        # FFT plans of the memory, the inverse FFT having an even size as
+        # numpy.fft.irfft
+        self.fft_mtw = bfft.real_fft(self.n_mtw_fft)
+        self.ifft_mtw = bfft.real_fft(2 * (self.n_mtw_fft // 2))
+        self.mtw_spectrum = np.zeros(self.fft_mtw.n_spectrum, dtype=complex)
+
+    def fft_plans(self):
+        """
+        Method to select the FFT plans of the beam spectrum and of the induced
+        voltage, with the backend of bfft.set_backend, once n_fft is known.
+        The inverse FFT has an even size, as numpy.fft.irfft.
+        """
+
+        self.fft = bfft.real_fft(self.n_fft)
+        self.ifft = bfft.real_fft(2 * (self.n_fft // 2))
+
     def induced_voltage_1turn(self):
         """
         Method to calculate the induced voltage at the current turn. DFTs are 
         used for calculations in time and frequency domain (see classes below)
         """
 
-        self.profile.beam_spectrum_generation(self.n_fft)
+        self.profile.beam_spectrum_generation(self.n_fft, self.fft)
 
         induced_voltage = - (self.beam.Particle.charge * e * self.beam.ratio *
-                             irfft(self.total_impedance * self.profile.beam_spectrum))
+                             self.ifft.irfft(self.total_impedance *
+                                             self.profile.beam_spectrum))
 
         self.induced_voltage = induced_voltage[:self.n_induced_voltage]
 
@@ -323,6 +469,60 @@ class _InducedVoltage(object):
 
         self.induced_voltage = self.mtw_memory[:self.n_induced_voltage]
 
+    def induced_voltage_mtw_freq(self):
+        """
+        Method to calculate the induced voltage taking into account the effect
+        from previous passages (multi-turn wake), with the memory kept in the
+        frequency domain: the spectrum of the previous turns is phase-rotated
+        by the revolution period, the one of the current turn is added and
+        only the kick window is transformed back to time domain
+        """
+
+        t_rev = self.RFParams.t_rev[self.RFParams.counter[0]]
+        # The contributions beyond the horizon no longer reach the kick
+        # window; their slots are reused
+        self.mtw_ages += t_rev
+        for slot in np.flatnonzero(self.mtw_ages >= self.mtw_horizon):
+            self.mtw_sum -= self.mtw_contributions[slot]
+            self.mtw_contributions[slot] = 0
+            self.mtw_ages[slot] = np.inf
+        slot = np.argmax(self.mtw_ages)
+
+        # Shift of the previous turns in frequency domain, i.e. rotation of
+        # the frame of the stored spectra. The phase factor of a revolution
+        # period is computed again only when the revolution period changes,
+        # and the rotation is computed exactly from time to time
+        self.mtw_time = (self.mtw_time + t_rev) % self.mtw_period
+        self.mtw_turns += 1
+        resync = self.mtw_turns % self.mtw_resync == 0
+        if resync or t_rev != self.mtw_t_rev:
+            np.multiply(self.omegaj_mtw, self.mtw_time, out=self.mtw_rotation)
+            np.exp(self.mtw_rotation, out=self.mtw_rotation)
+            np.multiply(self.omegaj_mtw, t_rev, out=self.mtw_step)
+            np.exp(self.mtw_step, out=self.mtw_step)
+            self.mtw_t_rev = t_rev
+        else:
+            self.mtw_rotation *= self.mtw_step
+
+        # Contribution of the current turn, in the rotating frame
+        self.profile.beam_spectrum_generation(self.n_mtw_fft, self.fft_mtw)
+        contribution = self.mtw_contributions[slot]
+        np.multiply(self.total_impedance_mtw, self.profile.beam_spectrum,
+                    out=contribution)
+        contribution /= self.mtw_rotation
+        self.mtw_ages[slot] = 0
+        if resync:
+            np.sum(self.mtw_contributions, axis=0, out=self.mtw_sum)
+        else:
+            self.mtw_sum += contribution
+
+        np.multiply(self.mtw_sum, self.mtw_rotation, out=self.mtw_spectrum)
+        self.mtw_voltage = self.ifft_mtw.irfft(self.mtw_spectrum,
+                                               out=self.mtw_voltage)
+        self.induced_voltage = - (self.beam.Particle.charge * e *
+                                  self.beam.ratio *
+                                  self.mtw_voltage[:self.n_induced_voltage])
+
     def shift_trev_freq(self):
         """
         Method to shift the induced voltage by a revolution period in the
@@ -331,9 +531,11 @@ class _InducedVoltage(object):
 
         t_rev = self.RFParams.t_rev[self.RFParams.counter[0]]
         # Shift in frequency domain
-        induced_voltage_f = rfft(self.mtw_memory, self.n_mtw_fft)
+        induced_voltage_f = self.fft_mtw.rfft(self.mtw_memory,
+                                              out=self.mtw_spectrum)
         induced_voltage_f *= np.exp(self.omegaj_mtw * t_rev)
-        self.mtw_memory = irfft(induced_voltage_f)[:self.n_mtw_memory]
+        self.mtw_memory = \
+            self.ifft_mtw.irfft(induced_voltage_f)[:self.n_mtw_memory]
         # Setting to zero to the last part to remove the contribution from the
         # circular convolution
         self.mtw_memory[-int(self.buffer_size):] = 0
@@ -390,7 +592,8 @@ class InducedVoltageTime(_InducedVoltage):
     RFParams : object, optional
         RFStation object for turn counter and revolution period
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'freq_resident' or 'time'
+        (default)
 
     Attributes
     ----------
@@ -428,6 +631,7 @@ class InducedVoltageTime(_InducedVoltage):
         # the input value
         self.n_fft = next_regular(int(self.n_induced_voltage) +
                                   int(self.profile.n_slices) - 1)
+        self.fft_plans()
 
         # Time array of the wake in s
         self.time = np.arange(0, self.wake_length, self.wake_length /
@@ -436,19 +640,30 @@ class InducedVoltageTime(_InducedVoltage):
         # Processing the wakes
         self.sum_wakes(self.time)
 
+        if self.multi_turn_wake and self.mtw_mode == 'freq_resident':
+            # Pseudo-impedance of the wake on the frequencies of the memory
+            self.total_impedance_mtw = self.fft_mtw.rfft(self.total_wake)
+
     def sum_wakes(self, time_array):
         """
         Summing all the wake contributions in one total wake.
         """
 
-        self.total_wake = np.zeros(time_array.shape)
-        for wake_object in self.wake_source_list:
-            wake_object.wake_calc(time_array)
-            self.total_wake += wake_object.wake
+        def calculate():
+            total_wake = np.zeros(time_array.shape)
+            for wake_object in self.wake_source_list:
+                wake_object.wake_calc(time_array)
+                total_wake += wake_object.wake
+            return total_wake
+
+        # Taken from the cache if the sources were already processed on the
+        # same time array
+        self.total_wake = impedance_cache.cached_sum(
+            'wake', time_array, self.wake_source_list, calculate)
 
         # Pseudo-impedance used to calculate linear convolution in the
         # frequency domain (padding zeros)
-        self.total_impedance = rfft(self.total_wake, self.n_fft)
+        self.total_impedance = self.fft.rfft(self.total_wake)
 
 
 class InducedVoltageFreq(_InducedVoltage):
@@ -472,7 +687,8 @@ class InducedVoltageFreq(_InducedVoltage):
     RFParams : object, optional
         RFStation object for turn counter and revolution period
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'freq_resident' or 'time'
+        (default)
 
     Attributes
     ----------
@@ -511,12 +727,16 @@ class InducedVoltageFreq(_InducedVoltage):
         Reprocess the impedance contributions. To be run when profile change
         """
 
+        # Extra length of the multi-turn wake memory for the front wake
+        self.buffer_extra = self.front_wake_length
+
         _InducedVoltage.process(self)
 
         # Number of points for the FFT. The next regular number is used for
         # speed, therefore the frequency resolution is always equal or finer
         # than the input value
         self.n_fft = next_regular(self.n_induced_voltage)
+        self.fft_plans()
 
         self.profile.beam_spectrum_freq_generation(self.n_fft)
 
@@ -528,6 +748,11 @@ class InducedVoltageFreq(_InducedVoltage):
             self.front_wake_buffer = int(np.ceil(
                 np.max(self.front_wake_length) / self.profile.bin_size))
 
+        if self.multi_turn_wake and self.mtw_mode == 'freq_resident':
+            # Impedance on the frequencies of the memory
+            self.sum_impedances(self.freq_mtw)
+            self.total_impedance_mtw = self.total_impedance
+
         # Processing the impedances
         self.sum_impedances(self.freq)
 
@@ -536,11 +761,17 @@ class InducedVoltageFreq(_InducedVoltage):
         Summing all the wake contributions in one total impedance.
         """
 
-        self.total_impedance = np.zeros(freq.shape, complex)
+        def calculate():
+            total_impedance = np.zeros(freq.shape, complex)
+            for impedance_object in self.impedance_source_list:
+                impedance_object.imped_calc(freq)
+                total_impedance += impedance_object.impedance
+            return total_impedance
 
-        for i in range(len(self.impedance_source_list)):
-            self.impedance_source_list[i].imped_calc(freq)
-            self.total_impedance += self.impedance_source_list[i].impedance
+        # Taken from the cache if the sources were already processed on the
+        # same frequency array
+        self.total_impedance = impedance_cache.cached_sum(
+            'impedance', freq, self.impedance_source_list, calculate)
 
         # Factor relating Fourier transform and DFT
         self.total_impedance /= self.profile.bin_size
@@ -610,7 +841,9 @@ class InducedVoltageResonator(_InducedVoltage):
     evaluated at the points of the line density. This is nececassry of 
     compatability with other functions that calculate the induced voltage.
     Currently, it requires the all quality factors :math:`Q>0.5`
-    Currently, only works for single turn.*
+    Currently, only works for single turn.
+    The convolution is computed by a recursion over the sorted times, in
+    O(n_slices + n_time) operations per resonator.*
 
     Parameters
     ----------
@@ -681,20 +914,11 @@ class InducedVoltageResonator(_InducedVoltage):
         # Number of resonators
         self.n_resonators = len(self.R)
 
-        # For internal use
-        self._Qtilde = self.Q * np.sqrt(1. - 1./(4.*self.Q**2.))
-        self._reOmegaP = self.omega_r * self._Qtilde / self.Q
-        self._imOmegaP = self.omega_r / (2.*self.Q)
-
-        # Each the 'n_resonator' rows of the matrix holds the induced voltage
-        # at the 'n_time' time-values of one cavity. For internal use.
-        self._tmp_matrix = np.ones((self.n_resonators, self.n_time))
-
-        # Slopes of the line segments. For internal use.
-        self._kappa1 = np.zeros(int(self.profile.n_slices-1))
-
-        # Matrix to hold n_times many tArray[t]-bin_centers arrays.
-        self._deltaT = np.zeros((self.n_time, self.profile.n_slices))
+        # Each turn, the induced voltage is computed by a recursion over the
+        # sorted times, in O(n_slices + n_time) per resonator
+        self._R = np.ascontiguousarray(self.R, dtype=float)
+        self._omega_r = np.ascontiguousarray(self.omega_r, dtype=float)
+        self._Q = np.ascontiguousarray(self.Q, dtype=float)
 
         # Call the __init__ method of the parent class [calls process()]
         _InducedVoltage.__init__(self, Beam, Profile, wake_length=None,
@@ -708,10 +932,21 @@ class InducedVoltageResonator(_InducedVoltage):
 
         _InducedVoltage.process(self)
 
-        # Since profile object changed, need to assign the proper dimensions to
-        # _kappa1 and _deltaT
+        if self.atLineDensityTimes:
+            self.tArray = self.profile.bin_centers
+            self.n_time = len(self.tArray)
+
+        # Order of the times for the recursion, None if already sorted
+        self._time_order = None
+        if np.any(np.diff(self.tArray) < 0):
+            self._time_order = np.argsort(self.tArray, kind='mergesort')
+        self._sorted_time = np.ascontiguousarray(
+            self.tArray if self._time_order is None
+            else self.tArray[self._time_order], dtype=float)
+
+        # Slopes of the line segments. For internal use.
         self._kappa1 = np.zeros(int(self.profile.n_slices-1))
-        self._deltaT = np.zeros((self.n_time, self.profile.n_slices))
+        self._voltage = np.zeros(self.n_time)
 
     def induced_voltage_1turn(self):
         r"""
@@ -727,24 +962,17 @@ class InducedVoltageResonator(_InducedVoltage):
             / (self.beam.n_macroparticles*self.profile.bin_size)
         # [:] makes kappa pass by reference
 
-        for t in range(self.n_time):
-            self._deltaT[t] = self.tArray[t]-self.profile.bin_centers
-
-        # For each cavity compute the induced voltage and store in the r-th row
-        for r in range(self.n_resonators):
-            tmp_sum = ((((2
-                          * np.cos(self._reOmegaP[r] * self._deltaT)
-                          + np.sin(self._reOmegaP[r] * self._deltaT)/self._Qtilde[r])
-                         * np.exp(-self._imOmegaP[r] * self._deltaT))
-                        * self.Heaviside(self._deltaT))
-                       - np.sign(self._deltaT))
-            # np.sum performs the sum over the points of the line density
-            self._tmp_matrix[r] = self.R[r]/(2*self.omega_r[r]*self.Q[r]) \
-                * np.sum(self._kappa1 * np.diff(tmp_sum), axis=1)
-
-        # To obtain the voltage, sum the contribution of each cavity...
-        self.induced_voltage = self._tmp_matrix.sum(axis=0)
-        # ... and multiply with bunch charge
+        # Sum of the contributions of each cavity...
+        bm.resonator_induced_voltage(self._kappa1, self.profile.bin_centers,
+                                     self._sorted_time, self._R,
+                                     self._omega_r, self._Q,
+                                     result=self._voltage)
+        if self._time_order is None:
+            self.induced_voltage = self._voltage.copy()
+        else:
+            self.induced_voltage = np.empty(self.n_time)
+            self.induced_voltage[self._time_order] = self._voltage
+        # ... multiplied with bunch charge
         self.induced_voltage *= -self.beam.Particle.charge*e*self.beam.intensity
 
     # Implementation of Heaviside function
@@ -753,3 +981,99 @@ class InducedVoltageResonator(_InducedVoltage):
         Heaviside function, which returns 1 if x>1, 0 if x<0, and 1/2 if x=0
         """
         return 0.5*(np.sign(x) + 1.)
+
+
+class InducedVoltagePoleResidue(_InducedVoltage):
+    r"""
+    Induced voltage of impedances described by poles and residues
+    (PoleResidue, Resonators are converted). The wake of each pole is
+    propagated from one slice to the next and, with multi-turn wake, from one
+    turn to the next, exactly and without wake length or memory buffer, in
+    O(n_slices * n_poles) operations per turn. Suited to long-memory
+    impedances such as high-Q cavity modes.
+
+    Parameters
+    ----------
+    Beam : object
+        Beam object
+    Profile : object
+        Profile object
+    impedance_source_list : list
+        PoleResidue or Resonators objects
+    multi_turn_wake : boolean, optional
+        Multi-turn wake enable flag
+    RFParams : object, optional
+        RFStation object for turn counter and revolution period
+
+    Attributes
+    ----------
+    impedance_source_list : list
+        Impedance sources
+    poles : complex array
+        Poles of all the sources in 1/s
+    residues : complex array
+        Residues of all the sources in :math:`\Omega / s`
+    wake_state : complex array
+        Wake of the previous slices and turns, for each pole, at the last
+        slice of the previous turn
+    """
+
+    def __init__(self, Beam, Profile, impedance_source_list,
+                 multi_turn_wake=False, RFParams=None):
+
+        # Impedance sources inputed as a list (eg: list of PoleResidue objects)
+        self.impedance_source_list = impedance_source_list
+
+        # Call the __init__ method of the parent class [calls process()]
+        _InducedVoltage.__init__(self, Beam, Profile, wake_length=None,
+                                 frequency_resolution=None,
+                                 multi_turn_wake=multi_turn_wake,
+                                 RFParams=RFParams, mtw_mode=None)
+
+    def process(self):
+        r"""
+        Reprocess the impedance contributions. To be run when slicing changes
+        """
+
+        if self.multi_turn_wake and self.RFParams is None:
+            raise RuntimeError('ERROR in InducedVoltagePoleResidue: RFParams' +
+                               ' is needed for the multi-turn wake')
+
+        sources = [PoleResidue.from_resonators(source)
+                   if isinstance(source, Resonators) else source
+                   for source in self.impedance_source_list]
+        self.poles = np.concatenate([source.poles for source in sources])
+        self.residues = np.concatenate([source.residues
+                                        for source in sources])
+
+        # The induced voltage is computed at the slices
+        self.n_induced_voltage = int(self.profile.n_slices)
+        self.wake_state = np.zeros(len(self.poles), dtype=complex)
+        self._last_time = None
+        self._voltage = np.zeros(self.n_induced_voltage)
+
+        self.induced_voltage_generation = self.induced_voltage_1turn
+
+    def induced_voltage_1turn(self):
+        r"""
+        Method to calculate the induced voltage of the current turn, and of
+        the previous ones with multi-turn wake.
+        """
+
+        if self.multi_turn_wake and self._last_time is not None:
+            # Propagation from the last slice of the previous turn to the
+            # first slice of this turn
+            t_rev = self.RFParams.t_rev[self.RFParams.counter[0]]
+            self.wake_state *= np.exp(self.poles * (
+                t_rev + self.profile.bin_centers[0] - self._last_time))
+        else:
+            self.wake_state[:] = 0
+        self._last_time = self.profile.bin_centers[-1]
+
+        bm.pole_residue_induced_voltage(self.profile.n_macroparticles,
+                                        self.profile.bin_size, self.poles,
+                                        self.residues, self.wake_state,
+                                        result=self._voltage)
+
+        self.induced_voltage = - (self.beam.Particle.charge * e *
+                                  self.beam.ratio * self._voltage)
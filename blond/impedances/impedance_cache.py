@@ -0,0 +1,256 @@
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+'''
+**Cache of the total wakes and impedances**
+
+The sum of the wakes (InducedVoltageTime) or of the impedances
+(InducedVoltageFreq) of the sources is stored under a key computed from the
+time or frequency array and from the parameters of the sources, so that
+processing again the same sources on the same array (reprocess(), a new
+simulation) does not call wake_calc() or imped_calc(). The tables are kept
+in memory and, if a directory is given, on disk, the least recently used
+ones being removed when the size limits are reached.
+
+The cache is disabled by default:
+
+>>> from blond.impedances import impedance_cache
+>>> impedance_cache.set_cache(directory='impedance_tables')
+'''
+
+from __future__ import division
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+# Cache used by the induced voltage objects, None if disabled
+_cache = None
+
+
+def set_cache(memory_size=512e6, directory=None, disk_size=4e9):
+    '''
+    Enables the cache of the total wakes and impedances, used by the induced
+    voltage objects processed afterwards
+
+    Args:
+        memory_size Maximum size in bytes of the tables kept in memory
+        directory Directory of the tables kept on disk, or None to keep them
+            in memory only
+        disk_size Maximum size in bytes of the tables kept on disk
+    '''
+    global _cache
+    _cache = ImpedanceCache(memory_size, directory, disk_size)
+    return _cache
+
+
+def disable_cache():
+    '''
+    Disables the cache; the tables already on disk are kept
+    '''
+    global _cache
+    _cache = None
+
+
+def get_cache():
+    '''
+    Returns the ImpedanceCache in use, None if disabled
+    '''
+    return _cache
+
+
+def cache_key(kind, array, sources):
+    '''
+    Key of the sum of the wakes (kind 'wake') or impedances (kind
+    'impedance') of the sources on the time or frequency array. None if one
+    of the sources does not declare its parameters (_cache_parameters
+    attribute of its own class, see impedance_sources), e.g. a user defined
+    source, since its table cannot be identified.
+    '''
+    digest = hashlib.sha256()
+    _update(digest, kind)
+    _update(digest, array)
+    for source in sources:
+        parameters = type(source).__dict__.get('_cache_parameters')
+        if parameters is None:
+            return None
+        _update(digest, type(source).__module__ + '.' +
+                type(source).__name__)
+        for name in parameters:
+            _update(digest, name)
+            _update(digest, getattr(source, name, None))
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    # Values of different types, shapes or dtypes give different keys
+    value = np.ascontiguousarray(value)
+    if value.dtype.hasobject:
+        value = np.array(repr(value.tolist()))
+    digest.update(('%s%s' % (value.dtype.str, value.shape)).encode())
+    digest.update(value.tobytes())
+
+
+def cached_sum(kind, array, sources, calculate):
+    '''
+    Returns the table of the key cache_key(kind, array, sources) from the
+    cache if present, otherwise calculate() which is then stored. The
+    sources are not evaluated, and their wake or impedance attributes are
+    not updated, if the table is in the cache.
+    '''
+    if _cache is None:
+        return calculate()
+    key = cache_key(kind, array, sources)
+    if key is None:
+        return calculate()
+    table = _cache.get(key)
+    if table is None:
+        table = calculate()
+        _cache.put(key, table)
+    return table
+
+
+class ImpedanceCache(object):
+    '''
+    Tables stored under a key, in memory and optionally on disk (one .npy
+    file per table), with least recently used eviction
+
+    Args:
+        memory_size Maximum size in bytes of the tables kept in memory
+        directory Directory of the tables kept on disk, or None to keep them
+            in memory only
+        disk_size Maximum size in bytes of the tables kept on disk
+    '''
+
+    def __init__(self, memory_size=512e6, directory=None, disk_size=4e9):
+        self.memory_size = memory_size
+        self.directory = directory
+        self.disk_size = disk_size
+        if self.directory is not None and not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        # Tables in memory, from the least to the most recently used
+        self._tables = OrderedDict()
+        self._memory_used = 0
+
+        # Number of tables found and not found in the cache
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        '''
+        Returns a copy of the table of the key, None if not in the cache
+        '''
+        if key in self._tables:
+            self._tables.move_to_end(key)
+            self._touch(key)
+            self.hits += 1
+            return self._tables[key].copy()
+
+        table = self._load(key)
+        if table is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._store(key, table)
+        return table.copy()
+
+    def put(self, key, table):
+        '''
+        Stores a copy of the table under the key
+        '''
+        table = np.array(table)
+        self._store(key, table)
+        self._save(key, table)
+
+    def clear(self):
+        '''
+        Removes all the tables, in memory and on disk
+        '''
+        self._tables.clear()
+        self._memory_used = 0
+        for path, size, time in self._disk_tables():
+            self._remove(path)
+
+    def _store(self, key, table):
+        if key in self._tables:
+            self._memory_used -= self._tables.pop(key).nbytes
+        if table.nbytes > self.memory_size:
+            return
+        self._tables[key] = table
+        self._memory_used += table.nbytes
+        while self._memory_used > self.memory_size:
+            self._memory_used -= self._tables.popitem(last=False)[1].nbytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            table = np.load(self._path(key))
+        except (IOError, OSError, ValueError):
+            return None
+        self._touch(key)
+        return table
+
+    def _touch(self, key):
+        # Most recently used table on disk
+        if self.directory is None:
+            return
+        try:
+            os.utime(self._path(key), None)
+        except OSError:
+            pass
+
+    def _save(self, key, table):
+        if self.directory is None or table.nbytes > self.disk_size:
+            return
+        path = self._path(key)
+        # Written under another name first, a process reading the directory
+        # never sees a partial table
+        temporary = path + '.%d.tmp' % os.getpid()
+        try:
+            with open(temporary, 'wb') as file:
+                np.save(file, table)
+            os.replace(temporary, path)
+        except (IOError, OSError):
+            self._remove(temporary)
+            return
+
+        tables = sorted(self._disk_tables(), key=lambda table: table[2])
+        disk_used = sum(size for path, size, time in tables)
+        for path, size, time in tables:
+            if disk_used <= self.disk_size:
+                break
+            self._remove(path)
+            disk_used -= size
+
+    def _disk_tables(self):
+        # Path, size and time of last use of the tables on disk
+        if self.directory is None:
+            return []
+        tables = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            tables.append((path, status.st_size, status.st_mtime))
+        return tables
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
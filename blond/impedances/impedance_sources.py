@@ -34,6 +34,11 @@ class _ImpedanceObject(object):
     they are overwritten by float arrays when the child classes are used.
     """
     
+    # Names of the attributes on which the wake and impedance depend, used
+    # to identify them in impedance_cache. Classes which do not define it are
+    # not cached.
+    _cache_parameters = None
+
     def __init__(self):        
         # Time array of the wake in s
         self.time_array = 0
@@ -127,6 +132,10 @@ class InputTable(_ImpedanceObject):
     
     """
     
+    # Parameters identifying the tables (see impedance_cache)
+    _cache_parameters = ('time_array', 'wake_array', 'frequency_array_loaded',
+                         'Re_Z_array_loaded', 'Im_Z_array_loaded')
+
     def __init__(self, input_1, input_2, input_3 = None):    
         
         _ImpedanceObject.__init__(self)   
@@ -269,6 +278,9 @@ class Resonators(_ImpedanceObject):
     >>> resonators.imped_calc(frequency)
     """
     
+    # Parameters identifying the wake and impedance (see impedance_cache)
+    _cache_parameters = ('R_S', 'frequency_R', 'Q')
+
     def __init__(self, R_S, frequency_R, Q, method='c++'):
         
         _ImpedanceObject.__init__(self)
@@ -456,6 +468,9 @@ class TravelingWaveCavity(_ImpedanceObject):
     """
     
     
+    # Parameters identifying the wake and impedance (see impedance_cache)
+    _cache_parameters = ('R_S', 'frequency_R', 'a_factor')
+
     def __init__(self, R_S, frequency_R, a_factor):
         
         _ImpedanceObject.__init__(self)
@@ -589,6 +604,9 @@ class ResistiveWall(_ImpedanceObject):
     >>> rw.imped_calc(frequency)
     """
     
+    # Parameters identifying the impedance (see impedance_cache)
+    _cache_parameters = ('pipe_radius', 'pipe_length', 'conductivity')
+
     def __init__(self, pipe_radius, pipe_length, resistivity = None, 
                  conductivity = None):
         
@@ -656,3 +674,224 @@ class ResistiveWall(_ImpedanceObject):
             + 1j * self.pipe_radius**2.0 * 2.0 * np.pi * self.frequency_array))
 
         self.impedance[np.isnan(self.impedance)]= 0.0
+
+
+class PoleResidue(_ImpedanceObject):
+    r"""
+    Impedance described as a sum of poles, for example the modes of a cavity,
+    either converted from the parameters of Resonators or fitted on an
+    impedance table (vector fitting). Used by InducedVoltagePoleResidue, the
+    wake of the previous turns is propagated exactly at each turn, without
+    wake length.
+
+    The model is the following, with complex poles :math:`s_p` (in the upper
+    half-plane or real) and residues :math:`a_p`:
+
+    .. math::
+        W(t>0) &= \mathrm{Re} \sum_p a_p e^{s_p t} \\
+        Z(\omega) &= \sum_p \frac{a_p / 2}{j\omega - s_p} +
+            \frac{a_p^* / 2}{j\omega - s_p^*}
+
+    Parameters
+    ----------
+    poles : complex array
+        Poles in 1/s, with negative real parts
+    residues : complex array
+        Residues in :math:`\Omega / s`
+
+    Attributes
+    ----------
+    poles : complex array
+        Poles in 1/s
+    residues : complex array
+        Residues in :math:`\Omega / s`
+    n_poles : int
+        Number of poles
+
+    Examples
+    ----------
+    >>> poles = PoleResidue.from_resonators(Resonators(1e6, 1e9, 1e4))
+    >>> table = InputTable(frequency, real_part, imaginary_part)
+    >>> fitted_poles = PoleResidue.from_table(table, 3)
+    """
+
+    # Parameters identifying the wake and impedance (see impedance_cache)
+    _cache_parameters = ('poles', 'residues')
+
+    def __init__(self, poles, residues):
+
+        _ImpedanceObject.__init__(self)
+
+        # Poles in 1/s
+        self.poles = np.array([poles], dtype=complex).flatten()
+
+        # Residues in :math:`\Omega / s`
+        self.residues = np.array([residues], dtype=complex).flatten()
+
+        # Number of poles
+        self.n_poles = len(self.poles)
+
+        if len(self.residues) != self.n_poles:
+            raise RuntimeError('ERROR in PoleResidue: the number of residues' +
+                               ' should be equal to the number of poles')
+        if np.any(self.poles.real >= 0):
+            raise RuntimeError('ERROR in PoleResidue: the poles should have' +
+                               ' negative real parts')
+
+    @classmethod
+    def from_resonators(cls, resonators):
+        r"""
+        Poles of Resonators; two real poles for the resonators with Q < 1/2.
+        """
+
+        alpha = resonators.omega_R / (2 * resonators.Q)
+        poles = []
+        residues = []
+        for i in range(resonators.n_resonators):
+            if resonators.Q[i] > 0.5:
+                omega_bar = np.sqrt(resonators.omega_R[i]**2 - alpha[i]**2)
+                poles.append(-alpha[i] + 1j * omega_bar)
+                residues.append(2 * resonators.R_S[i] * alpha[i] *
+                                (1 + 1j * alpha[i] / omega_bar))
+            elif resonators.Q[i] < 0.5:
+                gamma = np.sqrt(alpha[i]**2 - resonators.omega_R[i]**2)
+                poles += [-alpha[i] + gamma, -alpha[i] - gamma]
+                residues += [resonators.R_S[i] * alpha[i] *
+                             (1 - alpha[i] / gamma),
+                             resonators.R_S[i] * alpha[i] *
+                             (1 + alpha[i] / gamma)]
+            else:
+                raise RuntimeError('ERROR in PoleResidue: quality factors ' +
+                                   'equal to 1/2 are not supported')
+        return cls(poles, residues)
+
+    @classmethod
+    def from_table(cls, table, n_poles, n_iterations=20):
+        r"""
+        Poles fitted on an impedance table (InputTable with frequency, real
+        and imaginary parts) with the vector fitting algorithm, using
+        n_poles pairs of complex conjugate poles.
+        """
+
+        omega = 2 * np.pi * np.asarray(table.frequency_array_loaded,
+                                       dtype=float)
+        impedance = (np.asarray(table.Re_Z_array_loaded, dtype=float) + 1j *
+                     np.asarray(table.Im_Z_array_loaded, dtype=float))
+        poles, residues = _vector_fit(omega, impedance, n_poles,
+                                      n_iterations)
+        # Z = c / (j omega - s) + conj, so that a = 2 c
+        return cls(poles, 2 * residues)
+
+    def wake_calc(self, time_array):
+        r"""
+        Wake calculation method as a function of time.
+
+        Parameters
+        ----------
+        time_array : float array
+            Input time array in s
+
+        Attributes
+        ----------
+        time_array : float array
+            Input time array in s
+        wake : float array
+            Output wake in :math:`\Omega / s`
+        """
+
+        self.time_array = time_array
+        self.wake = np.zeros(self.time_array.shape)
+
+        for i in range(self.n_poles):
+            self.wake += (0.5 * (np.sign(self.time_array) + 1) *
+                          (self.residues[i] *
+                           np.exp(self.poles[i] * self.time_array)).real)
+
+    def imped_calc(self, frequency_array):
+        r"""
+        Impedance calculation method as a function of frequency.
+
+        Parameters
+        ----------
+        frequency_array : float array
+            Input frequency array in Hz
+
+        Attributes
+        ----------
+        frequency_array : float array
+            Input frequency array in Hz
+        impedance : complex array
+            Output impedance in :math:`\Omega + j \Omega`
+        """
+
+        self.frequency_array = frequency_array
+        self.impedance = np.zeros(len(self.frequency_array), complex)
+
+        s = 2j * np.pi * self.frequency_array
+        for i in range(self.n_poles):
+            self.impedance += 0.5 * (
+                self.residues[i] / (s - self.poles[i]) +
+                np.conj(self.residues[i]) / (s - np.conj(self.poles[i])))
+
+
+def _vector_fit(omega, impedance, n_pairs, n_iterations):
+    r"""
+    Vector fitting (B. Gustavsen and A. Semlyen, IEEE Trans. Power Delivery
+    14, 1999) of the impedance at the angular frequencies omega by n_pairs
+    pairs of complex conjugate poles, Z = sum c / (j omega - s) + conj.
+    Returns the poles s in the upper half-plane and the residues c.
+    """
+
+    s = 1j * omega
+
+    def basis(poles):
+        # Real basis of each pair of conjugate poles
+        first = 1 / (s[:, np.newaxis] - poles)
+        second = 1 / (s[:, np.newaxis] - np.conj(poles))
+        return np.hstack((first + second, 1j * (first - second)))
+
+    def solve(matrix, vector):
+        # Real least squares with normalised columns
+        matrix = np.vstack((matrix.real, matrix.imag))
+        vector = np.concatenate((vector.real, vector.imag))
+        norms = np.linalg.norm(matrix, axis=0)
+        norms[norms == 0] = 1
+        return np.linalg.lstsq(matrix / norms, vector, rcond=None)[0] / norms
+
+    # Starting poles with a small damping, spread over the frequency range
+    omega_positive = omega[omega > 0]
+    omega_start = np.linspace(omega_positive[0], omega_positive[-1], n_pairs)
+    poles = -omega_start / 100 + 1j * omega_start
+
+    for iteration in range(n_iterations):
+        # Relocation of the poles to the zeros of the weight function
+        # sigma = 1 + sum c~ / (j omega - s) + conj, with sigma Z fitted
+        phi = basis(poles)
+        solution = solve(np.hstack((phi, -impedance[:, np.newaxis] * phi)),
+                         impedance)
+        c_tilde = solution[2 * n_pairs:]
+        matrix = np.zeros((2 * n_pairs, 2 * n_pairs))
+        weights = np.zeros(2 * n_pairs)
+        for p in range(n_pairs):
+            matrix[2 * p:2 * p + 2, 2 * p:2 * p + 2] = \
+                [[poles[p].real, poles[p].imag],
+                 [-poles[p].imag, poles[p].real]]
+            weights[2 * p] = 2
+        row = np.empty(2 * n_pairs)
+        row[0::2] = c_tilde[:n_pairs]
+        row[1::2] = c_tilde[n_pairs:]
+        zeros = np.linalg.eigvals(matrix - np.outer(weights, row))
+
+        # Poles in the upper half-plane; two real zeros make one more pair
+        poles = list(zeros[zeros.imag > 0])
+        real = np.sort(zeros[zeros.imag == 0].real)
+        for i in range(0, len(real) - 1, 2):
+            poles.append(0.5 * (real[i] + real[i + 1]) +
+                         0.5j * abs(real[i + 1] - real[i]))
+        poles = np.array(poles)
+        # Stable poles
+        poles = -np.abs(poles.real) + 1j * poles.imag
+
+    solution = solve(basis(poles), impedance)
+    residues = solution[:n_pairs] + 1j * solution[n_pairs:]
+    return poles, residues
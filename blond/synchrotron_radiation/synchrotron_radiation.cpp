@@ -8,29 +8,105 @@ submit itself to any jurisdiction.
 Project website: http://blond.web.cern.ch/
 */
 
-// Optimised C++ routine that calculates and applies synchrotron radiation (SR)
-// damping term
+// Optimised C++ routines that calculate and apply synchrotron radiation (SR)
+// damping and quantum excitation terms
+// The random numbers of the quantum excitation are generated on the fly with
+// the counter-based generator of random.h: they depend only on the seed, the
+// kick and the index of the particle, not on the number of threads
 // Author: Juan F. Esteban Mueller
 
 #include <stdlib.h>
+#include <stdint.h>
+#include "../cpp_routines/random.h"
 
-// This function calculates and applies only the synchrotron radiation damping term
-extern "C" void synchrotron_radiation(double * __restrict__ beam_dE, const double U0, 
-                            const int n_macroparticles, const double tau_z, 
-                            const int n_kicks){
-
+template <typename T>
+static void synchrotron_radiation_impl(T * __restrict__ beam_dE,
+                                       const double U0,
+                                       const int n_macroparticles,
+                                       const double tau_z, const int n_kicks)
+{
     // SR damping constant
     const double const_synch_rad = 2.0 / tau_z;
 
-    for (int j=0; j<n_kicks; j++){
+    for (int j = 0; j < n_kicks; j++) {
         // SR damping term due to energy spread
         #pragma omp parallel for
         for (int i = 0; i < n_macroparticles; i++)
             beam_dE[i] -= const_synch_rad * beam_dE[i];
-    
+
         // Average energy change due to SR
         #pragma omp parallel for
         for (int i = 0; i < n_macroparticles; i++)
             beam_dE[i] -= U0;
     }
 }
+
+template <typename T>
+static void synchrotron_radiation_full_impl(T * __restrict__ beam_dE,
+                                            const double U0,
+                                            const int n_macroparticles,
+                                            const double sigma_dE,
+                                            const double tau_z,
+                                            const double energy,
+                                            const uint64_t seed,
+                                            const uint64_t stream,
+                                            const int n_kicks)
+{
+    // SR damping and quantum excitation constants
+    const double const_synch_rad = 2.0 / tau_z;
+    const double const_quantum_exc = 2.0 * sigma_dE / sqrt(tau_z) * energy;
+    const int n_blocks = (n_macroparticles + 1) / 2;
+
+    for (int j = 0; j < n_kicks; j++) {
+        // Each block of the random generator gives the Gaussian numbers of
+        // two particles
+        #pragma omp parallel for
+        for (int k = 0; k < n_blocks; k++) {
+            double z[2];
+            philox::normal_pair(seed, stream + j, k, z[0], z[1]);
+            const int end = 2 * k + 2 < n_macroparticles ?
+                            2 * k + 2 : n_macroparticles;
+            for (int i = 2 * k; i < end; i++)
+                beam_dE[i] += const_quantum_exc * z[i - 2 * k]
+                              - (const_synch_rad * beam_dE[i] + U0);
+        }
+    }
+}
+
+// This function calculates and applies only the synchrotron radiation damping term
+extern "C" void synchrotron_radiation(double * __restrict__ beam_dE, const double U0, 
+                            const int n_macroparticles, const double tau_z, 
+                            const int n_kicks){
+    synchrotron_radiation_impl<double>(beam_dE, U0, n_macroparticles, tau_z,
+                                       n_kicks);
+}
+
+extern "C" void synchrotron_radiationf(float * __restrict__ beam_dE, const double U0, 
+                            const int n_macroparticles, const double tau_z, 
+                            const int n_kicks){
+    synchrotron_radiation_impl<float>(beam_dE, U0, n_macroparticles, tau_z,
+                                      n_kicks);
+}
+
+// This function calculates and applies synchrotron radiation damping and
+// quantum excitation terms; the kick j uses the stream (stream + j) of the
+// random generator
+extern "C" void synchrotron_radiation_full(double * __restrict__ beam_dE, const double U0,
+                                        const int n_macroparticles, const double sigma_dE,
+                                        const double tau_z, const double energy,
+                                        const uint64_t seed, const uint64_t stream,
+                                        const int n_kicks){
+    synchrotron_radiation_full_impl<double>(beam_dE, U0, n_macroparticles,
+                                            sigma_dE, tau_z, energy, seed,
+                                            stream, n_kicks);
+}
+
+extern "C" void synchrotron_radiation_fullf(float * __restrict__ beam_dE, const double U0,
+                                        const int n_macroparticles, const double sigma_dE,
+                                        const double tau_z, const double energy,
+                                        const uint64_t seed, const uint64_t stream,
+                                        const int n_kicks){
+    synchrotron_radiation_full_impl<float>(beam_dE, U0, n_macroparticles,
+                                           sigma_dE, tau_z, energy, seed,
+                                           stream, n_kicks);
+}
@@ -37,7 +37,16 @@ class SynchrotronRadiation(object):
         self.beam = Beam
         self.rho = bending_radius
         self.n_kicks = n_kicks  # To apply SR in several kicks
-        np.random.seed(seed=seed)
+        
+        # Seed and counter of the random generator of the C implementation;
+        # the random numbers of a kick depend only on the seed, the number of
+        # previous kicks and the particle index (not on the number of threads)
+        if python:
+            np.random.seed(seed=seed)
+        if seed is None:
+            seed = np.random.randint(np.iinfo(np.int64).max, dtype=np.int64)
+        self.seed = int(seed)
+        self.random_counter = 0
         
         # Calculate static parameters
         self.Cgamma = 1.0 / (e**2.0 * 3.0 * epsilon_0 *
@@ -54,10 +63,6 @@ class SynchrotronRadiation(object):
         # Calculate synchrotron radiation parameters
         self.calculate_SR_params()
         
-        # Initialize the random number array if quantum excitation is included
-        if quantum_excitation:
-            self.random_array = np.zeros(self.beam.n_macroparticles)
-        
         # Displace the beam in phase to account for the energy loss due to 
         # synchrotron radiation (temporary until bunch generation is updated)
         if self.rf_params.section_index == 0:
@@ -0,0 +1,290 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+**Module to track the beam with several processes on one node, the
+macro-particles being split between the processes and stored in shared
+memory.**
+"""
+
+from __future__ import division
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from ..utils import bmath as bm
+
+
+def _shared_memory_worker(worker, n_workers, start, end, n_macroparticles,
+                          dtype, id_dtype, names, objects, barrier,
+                          connection):
+    """Tracking loop of one worker process. The worker tracks the particles
+    [start, end) of the shared coordinate arrays; the profile of the whole
+    beam is the sum of the profiles of all the workers.
+    """
+
+    tracker, profile, total_induced_voltage = objects
+    beam = tracker.beam
+
+    shm_dt, shm_dE, shm_id, shm_histograms = [SharedMemory(name=name)
+                                              for name in names]
+    dt = np.ndarray(n_macroparticles, dtype=dtype, buffer=shm_dt.buf)
+    dE = np.ndarray(n_macroparticles, dtype=dtype, buffer=shm_dE.buf)
+    ids = np.ndarray(n_macroparticles, dtype=id_dtype, buffer=shm_id.buf)
+    histograms = np.ndarray((n_workers, profile.n_slices), dtype=float,
+                            buffer=shm_histograms.buf)
+
+    beam.dt = dt[start:end]
+    beam.dE = dE[start:end]
+    beam.id = ids[start:end]
+    beam.n_macroparticles = end - start
+    # The fit and filter operations are applied to the total profile
+    operations = [op for op in profile.operations if op != profile._slice]
+
+    while True:
+        n_turns = connection.recv()
+        if n_turns is None:
+            break
+        try:
+            for i in range(n_turns):
+                tracker.track()
+                bm.slice(profile)
+                histograms[worker] = profile.n_macroparticles
+                barrier.wait()
+                # Same summation order in all the workers
+                np.sum(histograms, axis=0, out=profile.n_macroparticles)
+                barrier.wait()
+                for op in operations:
+                    op()
+                if total_induced_voltage is not None:
+                    total_induced_voltage.track()
+            if total_induced_voltage is not None:
+                connection.send((None, total_induced_voltage.induced_voltage))
+            else:
+                connection.send((None, None))
+        except Exception as error:
+            barrier.abort()
+            connection.send((repr(error), None))
+
+    # Release the views of the shared memory before closing it
+    beam.dt = np.empty(0, dtype=dtype)
+    beam.dE = np.empty(0, dtype=dtype)
+    beam.id = np.empty(0, dtype=id_dtype)
+    del dt, dE, ids, histograms
+    for shm in [shm_dt, shm_dE, shm_id, shm_histograms]:
+        shm.close()
+
+
+class SharedMemoryTracker(object):
+    r"""Class tracking the beam with several worker processes on one node.
+    The macro-particles are split in contiguous blocks between the workers
+    and stored in shared memory; each worker applies the kick and the drift
+    of the RingAndRFTracker and the slicing to its own block. The profiles of
+    the workers are summed (all-reduce) before the induced voltage is
+    computed, so that the collective effects are the same as for the whole
+    beam, and the coordinates are identical to those obtained calling, in
+    each turn:
+
+    >>> tracker.track()
+    >>> profile.track()
+    >>> total_induced_voltage.track()
+
+    The worker processes are started with copies of the tracking objects.
+    After each call of track(), the turn counter, the energy-related variables
+    of the Beam, the profile (and the operations applied to it) and the
+    induced voltage are updated in the main process; other internal states,
+    e.g. of feedbacks, only evolve in the workers. The beam coordinates and
+    particle ids of the main process are views of the shared memory until
+    close() is called, so that the losses flagged in the main process or in
+    a worker are seen by all the processes.
+
+    The OpenMP routines of each worker use OMP_NUM_THREADS threads, which
+    should be set so that the total number of threads does not exceed the
+    number of cores.
+
+    Parameters
+    ----------
+    RingAndRFTracker : class
+        A RingAndRFTracker type class
+    Profile : class
+        A Profile type class, with the standard (non-smooth) slicing
+    TotalInducedVoltage : class (optional)
+        A TotalInducedVoltage type class; default is None
+    n_workers : int (optional)
+        Number of worker processes; default is 2
+    start_method : str (optional)
+        multiprocessing start method of the workers; default is 'spawn',
+        'fork' is faster to start but not safe with OpenMP
+
+    """
+
+    def __init__(self, RingAndRFTracker, Profile, TotalInducedVoltage=None,
+                 n_workers=2, start_method='spawn'):
+
+        self.tracker = RingAndRFTracker
+        self.beam = RingAndRFTracker.beam
+        self.profile = Profile
+        self.totalInducedVoltage = TotalInducedVoltage
+        self.n_workers = int(n_workers)
+
+        if self.n_workers < 1:
+            raise RuntimeError("ERROR in SharedMemoryTracker: n_workers" +
+                               " should be a positive number!")
+        if self.profile.Beam is not self.beam:
+            raise RuntimeError("ERROR in SharedMemoryTracker: the Profile" +
+                               " should slice the tracked Beam!")
+        if self.profile._slice not in self.profile.operations:
+            raise RuntimeError("ERROR in SharedMemoryTracker: only the" +
+                               " standard (non-smooth) Profile slicing is" +
+                               " available!")
+        if self.beam.compaction_threshold > 0:
+            raise RuntimeError("ERROR in SharedMemoryTracker: the lost" +
+                               " particles cannot be eliminated from the" +
+                               " shared coordinates!")
+        if self.tracker.periodicity or self.tracker.fused_slicing:
+            raise RuntimeError("ERROR in SharedMemoryTracker: periodicity" +
+                               " and fused slicing are not available!")
+
+        # Coordinates, ids and profiles of the workers in shared memory
+        n_macroparticles = self.beam.n_macroparticles
+        dtype = self.beam.dtype
+        id_dtype = self.beam.id.dtype
+        self.shm = [SharedMemory(create=True,
+                                 size=n_macroparticles *
+                                 np.dtype(dtype).itemsize)
+                    for i in range(2)]
+        self.shm.append(SharedMemory(create=True,
+                                     size=n_macroparticles *
+                                     np.dtype(id_dtype).itemsize))
+        self.shm.append(SharedMemory(create=True,
+                                     size=self.n_workers *
+                                     self.profile.n_slices *
+                                     np.dtype(float).itemsize))
+        dt = np.ndarray(n_macroparticles, dtype=dtype,
+                        buffer=self.shm[0].buf)
+        dE = np.ndarray(n_macroparticles, dtype=dtype,
+                        buffer=self.shm[1].buf)
+        ids = np.ndarray(n_macroparticles, dtype=id_dtype,
+                         buffer=self.shm[2].buf)
+        dt[:] = self.beam.dt
+        dE[:] = self.beam.dE
+        ids[:] = self.beam.id
+        self.histograms = np.ndarray((self.n_workers, self.profile.n_slices),
+                                     dtype=float, buffer=self.shm[3].buf)
+
+        # The coordinates and ids are not sent to the workers
+        self.beam.dt = np.empty(0, dtype=dtype)
+        self.beam.dE = np.empty(0, dtype=dtype)
+        self.beam.id = np.empty(0, dtype=id_dtype)
+
+        context = mp.get_context(start_method)
+        # Kept as attribute, the workers unpickle it when they start
+        self.barrier = context.Barrier(self.n_workers)
+        bounds = np.linspace(0, n_macroparticles, self.n_workers + 1,
+                             dtype=int)
+        self.connections = []
+        self.workers = []
+        for worker in range(self.n_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=_shared_memory_worker,
+                args=(worker, self.n_workers, bounds[worker],
+                      bounds[worker + 1], n_macroparticles, dtype, id_dtype,
+                      [shm.name for shm in self.shm],
+                      (self.tracker, self.profile, self.totalInducedVoltage),
+                      self.barrier, worker_connection),
+                daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.workers.append(process)
+
+        self.beam.dt = dt
+        self.beam.dE = dE
+        self.beam.id = ids
+
+    def track(self, n_turns=1):
+        """Tracking method over n_turns turns; the workers track their
+        particles in parallel and the state of the main process is updated at
+        the end.
+
+        Parameters
+        ----------
+        n_turns : int (optional)
+            Number of turns to track; default is 1
+
+        """
+
+        if self.workers is None:
+            raise RuntimeError("ERROR in SharedMemoryTracker: the workers" +
+                               " have been closed!")
+
+        n_turns = int(n_turns)
+        for connection in self.connections:
+            connection.send(n_turns)
+        results = [self._receive(connection, process) for connection, process
+                   in zip(self.connections, self.workers)]
+
+        errors = [error for error, voltage in results if error is not None]
+        if len(errors) > 0:
+            self.close()
+            raise RuntimeError("ERROR in SharedMemoryTracker: tracking" +
+                               " failed in a worker process: " + errors[0])
+
+        # Turn counter and beam synchronous momentum etc.
+        self.tracker.counter[0] += n_turns
+        rf_params = self.tracker.rf_params
+        self.beam.beta = rf_params.beta[self.tracker.counter[0]]
+        self.beam.gamma = rf_params.gamma[self.tracker.counter[0]]
+        self.beam.energy = rf_params.energy[self.tracker.counter[0]]
+        self.beam.momentum = rf_params.momentum[self.tracker.counter[0]]
+
+        # Profile and induced voltage of the last turn
+        np.sum(self.histograms, axis=0, out=self.profile.n_macroparticles)
+        for op in self.profile.operations:
+            if op != self.profile._slice:
+                op()
+        if self.totalInducedVoltage is not None:
+            self.totalInducedVoltage.induced_voltage = results[0][1]
+
+    def _receive(self, connection, process):
+        """Waits for the result of a worker, checking that the worker process
+        is still running.
+        """
+
+        while not connection.poll(1.):
+            if not process.is_alive():
+                return ("worker process terminated with exit code " +
+                        str(process.exitcode), None)
+        return connection.recv()
+
+    def close(self):
+        """Stops the worker processes and releases the shared memory; the
+        beam coordinates and particle ids are copied back to private arrays.
+        """
+
+        if self.workers is None:
+            return
+
+        for connection, process in zip(self.connections, self.workers):
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.workers = None
+
+        self.beam.dt = np.array(self.beam.dt)
+        self.beam.dE = np.array(self.beam.dE)
+        self.beam.id = np.array(self.beam.id)
+        del self.histograms
+        for shm in self.shm:
+            shm.close()
+            shm.unlink()
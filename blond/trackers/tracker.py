@@ -24,13 +24,86 @@ import logging
 from ..utils import bmath as bm
 
 
+# Maximum number of turns tracked per call to the compiled library, which
+# bounds the size of the RF programs copied for the call
+max_turns_per_call = 10000
+
+
+def _track_turns(RingAndRFSection_list, n_turns, callback, dt_callback):
+    """Function tracking the beam over n_turns turns through all the
+    RingAndRFSection objects with a single call to the compiled library per
+    dt_callback turns (and at most max_turns_per_call turns). Only the RF
+    kick and the drift are applied; the turn counters and the energy-related
+    variables of the Beam are updated as in RingAndRFTracker.track.
+    """
+
+    n_turns = int(n_turns)
+    dt_callback = int(dt_callback)
+    if dt_callback < 1:
+        raise RuntimeError("ERROR in track_turns: dt_callback should be a" +
+                           " positive number of turns!")
+
+    beam = RingAndRFSection_list[0].beam
+    for RingAndRFSectionElement in RingAndRFSection_list:
+        RingAndRFSectionElement.check_track_turns(n_turns)
+        if RingAndRFSectionElement.beam is not beam:
+            raise RuntimeError("ERROR in track_turns: All the sections" +
+                               " should track the same Beam!")
+
+    turns_left = n_turns
+    turns_to_callback = dt_callback
+    while turns_left > 0:
+        n_turns_call = min(turns_left, int(max_turns_per_call))
+        if callback is not None:
+            n_turns_call = min(n_turns_call, turns_to_callback)
+
+        turn = RingAndRFSection_list[0].counter[0]
+        # Add phase noise directly to the cavity RF phase
+        for RingAndRFSectionElement in RingAndRFSection_list:
+            if RingAndRFSectionElement.phi_noise is not None:
+                RingAndRFSectionElement.phi_rf[:, turn:turn+n_turns_call] += \
+                    RingAndRFSectionElement.phi_noise[:, turn:turn+n_turns_call]
+
+        bm.track_turns(RingAndRFSection_list, beam.dt, beam.dE, turn,
+                       n_turns_call)
+
+        for RingAndRFSectionElement in RingAndRFSection_list:
+            RingAndRFSectionElement.counter[0] += n_turns_call
+        turns_left -= n_turns_call
+        turns_to_callback -= n_turns_call
+
+        # Updating the beam synchronous momentum etc.
+        rf_params = RingAndRFSection_list[-1].rf_params
+        beam.beta = rf_params.beta[rf_params.counter[0]]
+        beam.gamma = rf_params.gamma[rf_params.counter[0]]
+        beam.energy = rf_params.energy[rf_params.counter[0]]
+        beam.momentum = rf_params.momentum[rf_params.counter[0]]
+
+        if callback is not None and (turns_to_callback == 0 or
+                                     turns_left == 0):
+            callback()
+            turns_to_callback = dt_callback
+
+
 class FullRingAndRF(object):
     """
     *Definition of the full ring and RF parameters in order to be able to have
     a full turn information (used in the hamiltonian for example).*
+
+    Parameters
+    ----------
+    RingAndRFSection_list : list
+        List of RingAndRFTracker objects, one per RF section
+    fused_sections : bool (optional)
+        Option to track the particles through all the sections in a single
+        pass over the coordinates: blocks of particles that fit in the cache
+        get the kicks and drifts of all the sections before moving on to the
+        next block; default is False. Only available for sections without
+        feedbacks, periodicity, interpolation or fused slicing, see
+        RingAndRFTracker.track_turns
     """
 
-    def __init__(self, RingAndRFSection_list):
+    def __init__(self, RingAndRFSection_list, fused_sections=False):
 
         #: *List of the total RingAndRFSection objects*
         self.RingAndRFSection_list = RingAndRFSection_list
@@ -49,6 +122,12 @@ class FullRingAndRF(object):
         #: *Ring radius in [m]*
         self.ring_radius = self.ring_circumference / (2*np.pi)
 
+        #: *Fused tracking of all the sections*
+        self.fused_sections = bool(fused_sections)
+        if self.fused_sections:
+            for RingAndRFSectionElement in self.RingAndRFSection_list:
+                RingAndRFSectionElement.check_track_turns(0)
+
     def potential_well_generation(self, turn=0, n_points=1e5,
                                   main_harmonic_option='lowest_freq',
                                   dt_margin_percent=0., time_array=None):
@@ -122,11 +201,26 @@ class FullRingAndRF(object):
         self.potential_well = potential_well
 
     def track(self):
-        """Function to loop over all the RingAndRFSection.track methods
+        """Function to loop over all the RingAndRFSection.track methods, or
+        to track one turn through all the sections in the compiled library
+        if fused_sections is set
         """
 
-        for RingAndRFSectionElement in self.RingAndRFSection_list:
-            RingAndRFSectionElement.track()
+        if self.fused_sections:
+            _track_turns(self.RingAndRFSection_list, 1, None, 1)
+        else:
+            for RingAndRFSectionElement in self.RingAndRFSection_list:
+                RingAndRFSectionElement.track()
+
+    def track_turns(self, n_turns, callback=None, dt_callback=1):
+        """Function tracking the beam over n_turns turns through all the
+        RingAndRFSection objects, with the turn loop executed in the compiled
+        library. Only for intensity-free tracking without feedbacks; see
+        RingAndRFTracker.track_turns.
+        """
+
+        _track_turns(self.RingAndRFSection_list, n_turns, callback,
+                     dt_callback)
 
 
 class RingAndRFTracker(object):
@@ -220,12 +314,29 @@ class RingAndRFTracker(object):
     interpolation : bool (optional)
         Option to use sliced and interpolated voltage for the kicker; default 
         is False
+    fused_slicing : bool (optional)
+        Option to apply the kick, the drift and the slicing of the Profile in
+        a single pass over the particle coordinates; default is False. The
+        next call of Profile.track() then skips the slicing and only applies
+        the fit/filter options
+    voltage_table : str (optional)
+        Option to apply the RF kick by interpolating a table of the total RF
+        voltage, built every turn over one period of the RF voltage,
+        instead of evaluating every RF system for every particle;
+        'linear' or 'cubic' (Hermite) interpolation; default is None (exact
+        kick)
+    voltage_table_accuracy : float (optional)
+        Target of the maximum interpolation error of the voltage table,
+        relative to the sum of the RF voltage amplitudes; the spacing of the
+        table is derived from it. Default is 1e-6
 
     """
 
     def __init__(self, RFStation, Beam, solver='simple', BeamFeedback=None,
                  NoiseFeedback=None, CavityFeedback=None, periodicity=False,
-                 interpolation=False, Profile=None, TotalInducedVoltage=None):
+                 interpolation=False, Profile=None, TotalInducedVoltage=None,
+                 fused_slicing=False, voltage_table=None,
+                 voltage_table_accuracy=1e-6):
 
         # Set up logging
         self.logger = logging.getLogger(__class__.__name__)
@@ -261,6 +372,8 @@ class RingAndRFTracker(object):
         if self.alpha_order > 1:  # Set exact solver for higher orders of eta
             self.solver = 'exact'
         self.solver = self.solver.encode(encoding='utf_8')
+        # Solver identifier passed to the compiled drift routines
+        self.solver_id = 0 if self.solver == b'simple' else 1
 
         # Options
         self.beamFB = BeamFeedback
@@ -291,6 +404,38 @@ class RingAndRFTracker(object):
             self.interpolation = True
             self.logger.warning("Setting interpolation to TRUE")
 
+        # Fused kick, drift and slicing
+        self.fused_slicing = bool(fused_slicing)
+        if self.fused_slicing:
+            if self.profile is None:
+                raise RuntimeError("ERROR in RingAndRFTracker: Please specify" +
+                                   " a Profile object to use the fused" +
+                                   " slicing option")
+            if self.periodicity or self.interpolation:
+                raise RuntimeError("ERROR in RingAndRFTracker: Fused slicing" +
+                                   " not compatible with periodicity or" +
+                                   " interpolation!")
+            if self.profile._slice not in self.profile.operations:
+                raise RuntimeError("ERROR in RingAndRFTracker: Fused slicing" +
+                                   " only available for the standard" +
+                                   " (non-smooth) Profile slicing!")
+
+        # Kick from a table of the total RF voltage
+        self.voltage_table = voltage_table
+        self.voltage_table_accuracy = float(voltage_table_accuracy)
+        if self.voltage_table is not None:
+            if self.voltage_table not in ['linear', 'cubic']:
+                raise RuntimeError("ERROR in RingAndRFTracker: Choice of" +
+                                   " voltage table interpolation not" +
+                                   " recognised!")
+            if self.periodicity or self.interpolation or self.fused_slicing:
+                raise RuntimeError("ERROR in RingAndRFTracker: Voltage table" +
+                                   " not compatible with periodicity," +
+                                   " interpolation or fused slicing!")
+            if self.voltage_table_accuracy <= 0:
+                raise RuntimeError("ERROR in RingAndRFTracker: Voltage table" +
+                                   " accuracy should be positive!")
+
     def kick(self, beam_dt, beam_dE, index):
         """Function updating the particle energy due to the RF kick in a given
         RF station. The kicks are summed over the different harmonic RF systems
@@ -327,6 +472,172 @@ class RingAndRFTracker(object):
         """
         bm.drift(self, beam_dt, beam_dE, index)
 
+    def check_track_turns(self, n_turns):
+        """Function checking that the section can be tracked over n_turns
+        turns with track_turns, i.e. that no feedback, intensity effect or
+        option requiring Python operations every turn is used.
+
+        """
+
+        if (self.beamFB is not None) or (self.noiseFB is not None) or \
+                (self.cavityFB is not None):
+            raise RuntimeError("ERROR in RingAndRFTracker: track_turns not" +
+                               " available with feedbacks!")
+        if self.periodicity or self.interpolation or self.fused_slicing or \
+                (self.voltage_table is not None):
+            raise RuntimeError("ERROR in RingAndRFTracker: track_turns not" +
+                               " available with periodicity, interpolation," +
+                               " fused slicing or voltage table!")
+        if self.counter[0] + n_turns > self.rf_params.n_turns:
+            raise RuntimeError("ERROR in RingAndRFTracker: Number of turns" +
+                               " exceeds the length of the RF programs!")
+
+    def track_turns(self, n_turns, callback=None, dt_callback=1):
+        """Tracking method for the section over n_turns turns. The turn
+        loop, with kick and drift, is executed in the compiled library, which
+        removes the per-turn Python overhead of track() for intensity-free
+        simulations. The particles are identical to those obtained calling
+        track() n_turns times.
+
+        Parameters
+        ----------
+        n_turns : int
+            Number of turns to track
+        callback : callable (optional)
+            Function without arguments called every dt_callback turns, e.g.
+            the track method of a monitor; default is None
+        dt_callback : int (optional)
+            Number of turns between two calls of callback; default is 1
+
+        """
+
+        _track_turns([self], n_turns, callback, dt_callback)
+
+    def kick_drift_slice(self, beam_dt, beam_dE, index):
+        """Function applying the RF kick at turn index, the drift to the next
+        RF station at turn index + 1 and the slicing of the drifted
+        coordinates into the Profile, in a single pass over the particles.
+        The result is identical to calling kick(), drift() and
+        Profile.track() in sequence.
+
+        """
+        bm.kick_drift_slice(self, beam_dt, beam_dE, self.profile, index)
+
+    def kick_drift_periodic(self, beam_dt, beam_dE, index):
+        """Function applying the kick at turn index and the drift at turn
+        index + 1 with the periodic solver. The frame is the revolution period
+        at turn index + 1; particles on its right are shifted back by one
+        period without kick and drift, particles that drift to its left are
+        shifted forward by one period and kicked and drifted a second time.
+
+        """
+        bm.kick_drift_periodic(self, beam_dt, beam_dE, index)
+
+    def voltage_table_period(self, index):
+        """Function returning the period of the total RF voltage at turn
+        index, the revolution period of the lowest common harmonic, or None
+        if the RF frequencies are not in the ratio of integer harmonics.
+
+        """
+
+        harmonics = self.harmonic[:, index]
+        omega_rf = self.omega_rf[:, index]
+        if np.any(harmonics != np.round(harmonics)) or \
+                not np.allclose(omega_rf / omega_rf[0],
+                                harmonics / harmonics[0], rtol=1e-12, atol=0):
+            return None
+        common_harmonic = np.gcd.reduce(np.round(harmonics).astype(np.int64))
+
+        return 2*np.pi * harmonics[0] / (common_harmonic * omega_rf[0])
+
+    def voltage_table_generation(self, index, t_min, t_max):
+        """Function tabulating the total RF voltage (times the charge) and its
+        derivative at turn index between t_min and t_max. The spacing is
+        chosen from the bound of the interpolation error,
+        :math:`h^2 \\max|V^{(2)}|/8` for linear and
+        :math:`h^4 \\max|V^{(4)}|/384` for cubic Hermite interpolation, to
+        reach voltage_table_accuracy.
+
+        """
+
+        voltages = np.abs(self.charge*self.voltage[:, index])
+        omega_rf = self.omega_rf[:, index]
+        if self.voltage_table == 'linear':
+            bin_size = np.sqrt(8*self.voltage_table_accuracy*np.sum(voltages) /
+                               np.sum(voltages*omega_rf**2))
+        else:
+            bin_size = (384*self.voltage_table_accuracy*np.sum(voltages) /
+                        np.sum(voltages*omega_rf**4))**0.25
+        n_points = max(int(np.ceil((t_max - t_min) / bin_size)) + 1, 2)
+        if t_max > t_min:
+            bin_size = (t_max - t_min) / (n_points - 1)
+
+        self.voltage_table_turn = index
+        self.voltage_table_t_min = t_min
+        self.voltage_table_bin_size = bin_size
+        self.voltage_table_array, self.voltage_table_derivative = \
+            bm.rf_voltage_table(self, index, t_min, bin_size, n_points)
+
+    def voltage_table_kick(self, beam_dt, beam_dE, index):
+        """Function applying the RF kick at turn index, and the change of
+        synchronous energy, by interpolating the total RF voltage tabulated
+        over one period, into which the arrival times are wrapped. If the RF
+        frequencies are not harmonics of a common frequency, the table covers
+        the range of the arrival times of the particles not lost. Without RF
+        voltage, only the change of synchronous energy is applied.
+
+        """
+
+        if not np.any(self.voltage[:, index]):
+            beam_dE += self.acceleration_kick[index]
+            return
+
+        period = self.voltage_table_period(index)
+        if period is not None:
+            t_min, t_max = 0., period
+        else:
+            alive = beam_dt[self.beam.id != 0]
+            if len(alive) == 0:
+                alive = beam_dt
+            t_min, t_max = np.min(alive), np.max(alive)
+
+        self.voltage_table_generation(index, t_min, t_max)
+        bm.table_kick(beam_dt, beam_dE, self.voltage_table_array,
+                      self.voltage_table_derivative,
+                      self.voltage_table_t_min, self.voltage_table_bin_size,
+                      self.voltage_table == 'cubic',
+                      self.acceleration_kick[index],
+                      periodic=period is not None)
+
+    def voltage_table_error(self, n_points=100000):
+        """Function comparing the kick interpolated from the last voltage
+        table with the exact kick, on n_points arrival times spread over the
+        range of the table.
+
+        Returns
+        -------
+        error : float
+            Maximum error of the interpolated kick, relative to the sum of the
+            RF voltage amplitudes
+
+        """
+
+        index = self.voltage_table_turn
+        dt = np.linspace(self.voltage_table_t_min, self.voltage_table_t_min +
+                         self.voltage_table_bin_size *
+                         (len(self.voltage_table_array) - 1), int(n_points))
+        dE = np.zeros(len(dt))
+        bm.table_kick(dt, dE, self.voltage_table_array,
+                      self.voltage_table_derivative,
+                      self.voltage_table_t_min, self.voltage_table_bin_size,
+                      self.voltage_table == 'cubic', 0.)
+        voltages = self.charge*self.voltage[:, index]
+        exact = np.sum(voltages[:, np.newaxis] *
+                       np.sin(self.omega_rf[:, index, np.newaxis]*dt +
+                              self.phi_rf[:, index, np.newaxis]), axis=0)
+
+        return np.max(np.abs(dE - exact)) / np.sum(np.abs(voltages))
+
     def rf_voltage_calculation(self):
         """Function calculating the total, discretised RF voltage seen by the
         beam at a given turn. Requires a Profile object.
@@ -367,56 +678,22 @@ class RingAndRFTracker(object):
 
         if self.periodicity:
 
-            # Distinguish the particles inside the frame from the particles on
-            # the right-hand side of the frame.
-            self.indices_right_outside = \
-                np.where(self.beam.dt > self.t_rev[self.counter[0] + 1])[0]
-            self.indices_inside_frame = \
-                np.where(self.beam.dt < self.t_rev[self.counter[0] + 1])[0]
-
-            if len(self.indices_right_outside) > 0:
-                # Change reference of all the particles on the right of the
-                # current frame; these particles skip one kick and drift
-                self.beam.dt[self.indices_right_outside] -= \
-                    self.t_rev[self.counter[0] + 1]
-                # Synchronize the bunch with the particles that are on the
-                # RHS of the current frame applying kick and drift to the
-                # bunch
-                # After that all the particles are in the new updated frame
-                self.insiders_dt = np.ascontiguousarray(
-                    self.beam.dt[self.indices_inside_frame])
-                self.insiders_dE = np.ascontiguousarray(
-                    self.beam.dE[self.indices_inside_frame])
-                self.kick(self.insiders_dt, self.insiders_dE, self.counter[0])
-                self.drift(self.insiders_dt, self.insiders_dE,
-                           self.counter[0]+1)
-                self.beam.dt[self.indices_inside_frame] = self.insiders_dt
-                self.beam.dE[self.indices_inside_frame] = self.insiders_dE
-                # Check all the particles on the left of the just updated
-                # frame and apply a second kick and drift to them with the
-                # previous wave after having changed reference.
-                self.indices_left_outside = np.where(self.beam.dt < 0)[0]
+            # Particles on the right of the frame change reference and skip
+            # one kick and drift; particles on the left of the updated frame
+            # change reference and get a second kick and drift. The
+            # coordinates are updated in place, without temporary arrays.
+            self.kick_drift_periodic(self.beam.dt, self.beam.dE,
+                                     self.counter[0])
 
+        elif self.fused_slicing:
+
+            if self.rf_params.empty is False:
+                self.kick_drift_slice(self.beam.dt, self.beam.dE,
+                                      self.counter[0])
             else:
-                self.kick(self.beam.dt, self.beam.dE, self.counter[0])
                 self.drift(self.beam.dt, self.beam.dE, self.counter[0] + 1)
-                # Check all the particles on the left of the just updated
-                # frame and apply a second kick and drift to them with the
-                # previous wave after having changed reference.
-                self.indices_left_outside = np.where(self.beam.dt < 0)[0]
-
-            if len(self.indices_left_outside) > 0:
-                left_outsiders_dt = np.ascontiguousarray(
-                    self.beam.dt[self.indices_left_outside])
-                left_outsiders_dE = np.ascontiguousarray(
-                    self.beam.dE[self.indices_left_outside])
-                left_outsiders_dt += self.t_rev[self.counter[0]+1]
-                self.kick(left_outsiders_dt, left_outsiders_dE,
-                          self.counter[0])
-                self.drift(left_outsiders_dt, left_outsiders_dE,
-                           self.counter[0]+1)
-                self.beam.dt[self.indices_left_outside] = left_outsiders_dt
-                self.beam.dE[self.indices_left_outside] = left_outsiders_dE
+                bm.slice(self.profile)
+            self.profile.sliced_by_tracker = True
 
         else:
 
@@ -447,6 +724,9 @@ class RingAndRFTracker(object):
                     #      ctypes.c_double(
                     #          self.acceleration_kick[self.counter[0]]))
 
+                elif self.voltage_table is not None:
+                    self.voltage_table_kick(self.beam.dt, self.beam.dE,
+                                            self.counter[0])
                 else:
                     self.kick(self.beam.dt, self.beam.dE, self.counter[0])
 
@@ -460,3 +740,176 @@ class RingAndRFTracker(object):
         self.beam.gamma = self.rf_params.gamma[self.counter[0]]
         self.beam.energy = self.rf_params.energy[self.counter[0]]
         self.beam.momentum = self.rf_params.momentum[self.counter[0]]
+
+
+class EnsembleTracker(object):
+    r"""Class tracking all the beams of a BeamEnsemble through one RF station
+    and the ring, with one call to the compiled library per turn for the
+    kick, the drift and, optionally, the slicing of all the members.
+
+    Each member is tracked with its own RFStation, e.g. to scan the voltage,
+    or all the members share one RFStation, e.g. to scan the seed of the
+    distribution. The kick and drift are identical to those of a
+    RingAndRFTracker tracking each member separately; feedbacks, intensity
+    effects, periodicity and interpolation are not available.
+
+    Parameters
+    ----------
+    RFStation : class or list
+        A RFStation type class shared by all the members, or a list with
+        one RFStation per member
+    BeamEnsemble : class
+        A BeamEnsemble type class
+    solver : str (optional)
+        Drift solver, 'simple' (default) or 'exact', see RingAndRFTracker
+    Profile : list (optional)
+        One Profile per member, with the same number of slices; the standard
+        slicing of the profiles is then done by the tracker, after the drift,
+        and skipped by the next call of Profile.track()
+
+    """
+
+    def __init__(self, RFStation, BeamEnsemble, solver='simple',
+                 Profile=None):
+
+        self.ensemble = BeamEnsemble
+        n_ensemble = self.ensemble.n_ensemble
+        if isinstance(RFStation, (list, tuple)):
+            if len(RFStation) != n_ensemble:
+                raise RuntimeError("ERROR in EnsembleTracker: One RFStation" +
+                                   " per member of the ensemble expected!")
+            rf_list = list(RFStation)
+        else:
+            rf_list = [RFStation] * n_ensemble
+
+        # RF stations shared by several members are updated once per turn
+        self.rf_stations = []
+        self.rf_index = np.empty(n_ensemble, dtype=int)
+        for i, rf in enumerate(rf_list):
+            for j, station in enumerate(self.rf_stations):
+                if station is rf:
+                    self.rf_index[i] = j
+                    break
+            else:
+                self.rf_index[i] = len(self.rf_stations)
+                self.rf_stations.append(rf)
+        self.rf_params = rf_list
+        self.n_rf = max(rf.n_rf for rf in self.rf_stations)
+
+        self.solver = str(solver)
+        if self.solver not in ['simple', 'exact']:
+            raise RuntimeError("ERROR in EnsembleTracker: Choice of" +
+                               " longitudinal solver not recognised!")
+        # Higher orders of eta use the exact solver, as in RingAndRFTracker
+        self.solver_id = np.array([0 if self.solver == 'simple' and
+                                   rf.alpha_order <= 1 else 1
+                                   for rf in self.rf_stations], dtype=np.int32)
+        self.alpha_order = np.array([rf.alpha_order for rf in
+                                     self.rf_stations], dtype=np.int32)
+        self.length_ratio = np.array([rf.length_ratio for rf in
+                                      self.rf_stations], dtype=float)
+
+        self.profiles = Profile
+        if self.profiles is not None:
+            if len(self.profiles) != n_ensemble:
+                raise RuntimeError("ERROR in EnsembleTracker: One Profile" +
+                                   " per member of the ensemble expected!")
+            self.n_slices = self.profiles[0].n_slices
+            for profile, beam in zip(self.profiles, self.ensemble.members):
+                if profile.Beam is not beam:
+                    raise RuntimeError("ERROR in EnsembleTracker: Each" +
+                                       " Profile should slice its member of" +
+                                       " the ensemble!")
+                if profile.n_slices != self.n_slices:
+                    raise RuntimeError("ERROR in EnsembleTracker: All the" +
+                                       " profiles should have the same" +
+                                       " number of slices!")
+                if profile._slice not in profile.operations:
+                    raise RuntimeError("ERROR in EnsembleTracker: Only" +
+                                       " available for the standard" +
+                                       " (non-smooth) Profile slicing!")
+            self.histograms = np.zeros((n_ensemble, self.n_slices))
+
+    def kick_parameters(self):
+        """Function returning the RF voltage, frequency and phase
+        [n_ensemble, n_rf] and the acceleration kick [n_ensemble] of the
+        members at their current turn; the RF systems missing in a station
+        have zero voltage.
+
+        """
+
+        n_stations = len(self.rf_stations)
+        voltage = np.zeros((n_stations, self.n_rf))
+        omega_rf = np.zeros((n_stations, self.n_rf))
+        phi_rf = np.zeros((n_stations, self.n_rf))
+        acc_kick = np.zeros(n_stations)
+        for j, rf in enumerate(self.rf_stations):
+            if rf.empty:
+                continue
+            turn = rf.counter[0]
+            voltage[j, :rf.n_rf] = rf.Particle.charge * rf.voltage[:, turn]
+            omega_rf[j, :rf.n_rf] = rf.omega_rf[:, turn]
+            phi_rf[j, :rf.n_rf] = rf.phi_rf[:, turn]
+            acc_kick[j] = - rf.delta_E[turn]
+
+        return voltage[self.rf_index], omega_rf[self.rf_index], \
+            phi_rf[self.rf_index], acc_kick[self.rf_index]
+
+    def drift_parameters(self):
+        """Function returning the parameters of the drift of the members to
+        the next turn, as a dictionary of [n_ensemble] arrays.
+
+        """
+
+        def per_station(attribute):
+            return np.array([getattr(rf, attribute)[rf.counter[0] + 1]
+                             for rf in self.rf_stations])[self.rf_index]
+
+        return {'solver': self.solver_id[self.rf_index],
+                'alpha_order': self.alpha_order[self.rf_index],
+                't_rev': per_station('t_rev'),
+                'length_ratio': self.length_ratio[self.rf_index],
+                'eta_0': per_station('eta_0'),
+                'eta_1': per_station('eta_1'),
+                'eta_2': per_station('eta_2'),
+                'beta': per_station('beta'),
+                'energy': per_station('energy')}
+
+    def track(self):
+        """Tracking method of the ensemble: applies the kick and the drift to
+        all the members, slices them if profiles are given, and updates the
+        counters of the RFStations and the energy-related variables of the
+        members.
+
+        """
+
+        # Add phase noise directly to the cavity RF phase
+        for rf in self.rf_stations:
+            if rf.phi_noise is not None:
+                rf.phi_rf[:, rf.counter[0]] += rf.phi_noise[:, rf.counter[0]]
+
+        bm.ensemble_kick(self.ensemble.dt, self.ensemble.dE,
+                         *self.kick_parameters())
+        bm.ensemble_drift(self.ensemble.dt, self.ensemble.dE,
+                          **self.drift_parameters())
+
+        if self.profiles is not None:
+            bm.ensemble_histogram(
+                self.ensemble.dt,
+                [profile.cut_left for profile in self.profiles],
+                [profile.cut_right for profile in self.profiles],
+                self.n_slices, result=self.histograms)
+            for profile, histogram in zip(self.profiles, self.histograms):
+                profile.n_macroparticles[:] = histogram
+                profile.sliced_by_tracker = True
+
+        # Increment by one the turn counters
+        for rf in self.rf_stations:
+            rf.counter[0] += 1
+
+        # Updating the beam synchronous momentum etc.
+        for beam, rf in zip(self.ensemble.members, self.rf_params):
+            beam.beta = rf.beta[rf.counter[0]]
+            beam.gamma = rf.gamma[rf.counter[0]]
+            beam.energy = rf.energy[rf.counter[0]]
+            beam.momentum = rf.momentum[rf.counter[0]]
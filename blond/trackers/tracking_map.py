@@ -0,0 +1,170 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+**Module to schedule the elements tracked every turn and to measure the time
+spent in each of them.**
+"""
+
+from __future__ import division
+from builtins import range, object
+import time
+import numpy as np
+
+
+class TrackingMap(object):
+    r"""Class calling the track methods of a list of elements (trackers,
+    profiles, induced voltages, monitors, plots, ...) every turn, in the
+    order of the list. Expensive elements can be called every N turns only,
+    and the wall-time spent in each element is recorded. The loop
+
+    >>> for i in range(1, n_turns + 1):
+    >>>     tracker.track()
+    >>>     profile.track()
+    >>>     if (i % 100) == 0:
+    >>>         plots.track()
+
+    is replaced by
+
+    >>> tracking_map = TrackingMap([tracker, profile, (plots, 100)])
+    >>> tracking_map.track(n_turns)
+
+    Parameters
+    ----------
+    elements : list
+        Objects with a track() method or functions without arguments; an
+        element given as a tuple (element, N) is called every N turns only
+    timing : bool (optional)
+        Option to record the wall-time of each element; default is True
+    record_turns : bool (optional)
+        Option to record the wall-time of each element in each turn, in
+        addition to the total; default is False
+
+    Attributes
+    ----------
+    counter : int
+        Number of turns tracked; an element called every N turns is called
+        when counter is a multiple of N, counting from 1
+    names : list of str
+        Names of the elements, from their class or function names
+    periods : int array
+        Number of turns between two calls of each element
+    elapsed : float array
+        Total wall-time spent in each element [s]
+    calls : int array
+        Number of calls of each element
+    turn_timing : list of float arrays
+        Wall-time spent in each element in each turn [s], if record_turns
+
+    """
+
+    def __init__(self, elements, timing=True, record_turns=False):
+
+        self.elements = []
+        self.periods = []
+        self.names = []
+        self._operations = []
+        for element in elements:
+            if isinstance(element, tuple):
+                element, period = element
+            else:
+                period = 1
+            period = int(period)
+            if period < 1:
+                raise RuntimeError("ERROR in TrackingMap: the number of" +
+                                   " turns between two calls should be" +
+                                   " positive!")
+
+            if hasattr(element, 'track'):
+                operation = element.track
+                name = element.__class__.__name__
+            elif callable(element):
+                operation = element
+                name = getattr(element, '__name__', repr(element))
+            else:
+                raise RuntimeError("ERROR in TrackingMap: " + repr(element) +
+                                   " has no track method and is not" +
+                                   " callable!")
+            if name in self.names:
+                name += ' (' + str(self.names.count(name) + 1) + ')'
+
+            self.elements.append(element)
+            self.periods.append(period)
+            self.names.append(name)
+            self._operations.append((operation, period))
+
+        self.periods = np.array(self.periods, dtype=int)
+        self.timing = bool(timing)
+        self.record_turns = bool(record_turns)
+        self.counter = 0
+        self.reset_timing()
+
+    def reset_timing(self):
+        """Function resetting the recorded wall-times.
+        """
+
+        self.elapsed = np.zeros(len(self.elements))
+        self.calls = np.zeros(len(self.elements), dtype=int)
+        self.turn_timing = []
+
+    def track(self, n_turns=1):
+        """Tracking method calling the elements over n_turns turns.
+
+        Parameters
+        ----------
+        n_turns : int (optional)
+            Number of turns to track; default is 1
+
+        """
+
+        operations = self._operations
+        for i in range(int(n_turns)):
+            self.counter += 1
+            counter = self.counter
+
+            if not self.timing:
+                for operation, period in operations:
+                    if (counter % period) == 0:
+                        operation()
+                continue
+
+            turn_time = np.zeros(len(operations))
+            for k, (operation, period) in enumerate(operations):
+                if (counter % period) == 0:
+                    t0 = time.perf_counter()
+                    operation()
+                    turn_time[k] = time.perf_counter() - t0
+                    self.calls[k] += 1
+            self.elapsed += turn_time
+            if self.record_turns:
+                self.turn_timing.append(turn_time)
+
+    def timing_report(self):
+        """Function returning a table with the total wall-time, the number of
+        calls, the time per call and the share of the total time of each
+        element.
+
+        Returns
+        -------
+        report : str
+            Table of the recorded wall-times
+
+        """
+
+        total = np.sum(self.elapsed)
+        width = max([len(name) for name in self.names] + [7])
+        report = "%-*s %12s %8s %14s %8s\n" % (width, "element", "total [s]",
+                                                "calls", "per call [s]", "%")
+        for name, elapsed, calls in zip(self.names, self.elapsed, self.calls):
+            report += "%-*s %12.4e %8d %14.4e %8.2f\n" % (
+                width, name, elapsed, calls,
+                elapsed / calls if calls > 0 else 0.,
+                100 * elapsed / total if total > 0 else 0.)
+        report += "%-*s %12.4e\n" % (width, "total", total)
+        return report
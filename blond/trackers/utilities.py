@@ -22,6 +22,7 @@ import numpy as np
 import copy
 from scipy.constants import c
 from scipy.integrate import cumtrapz
+from ..utils import bmath as bm
 
 
 
@@ -524,7 +525,8 @@ def separatrix(Ring, RFStation, dt):
 def is_in_separatrix(Ring, RFStation, Beam, dt, dE, 
                      total_voltage = None):
     r"""Function checking whether coordinate pair(s) are inside the separatrix. 
-    Uses the single-RF sinusoidal Hamiltonian.
+    Uses the single-RF sinusoidal Hamiltonian; see HamiltonianTable for
+    several RF systems.
     
     Parameters
     ---------- 
@@ -572,6 +574,228 @@ def is_in_separatrix(Ring, RFStation, Beam, dt, dE,
         
 
 
+def separatrix_parameters(Ring, RFStation, Beam):
+    r"""Function returning the coefficients of the single-RF sinusoidal
+    Hamiltonian of the current turn and its value on the separatrix, as used
+    by the loss detection routine of the compiled library. Same assumptions
+    as is_in_separatrix().
+
+    Parameters
+    ----------
+    Ring : class
+        A Ring type class
+    RFStation : class
+        An RFStation type class
+    Beam : class
+        A Beam type class
+
+    Returns
+    -------
+    float array
+        eta_0, eta_1, eta_2, 1/(beta^2 E), c pi/(C beta E), c2, omega_rf,
+        phi_rf_d, phi_s, abs(H_sep), sign of eta_0
+
+    """
+
+    warnings.filterwarnings("once")
+
+    if Ring.n_sections > 1:
+        warnings.warn("WARNING in separatrix_parameters(): the usage of" +
+                      " several sections is not yet implemented!")
+    if RFStation.n_rf > 1:
+        warnings.warn("WARNING in separatrix_parameters(): taking into" +
+                      " account the first harmonic only!")
+
+    counter = RFStation.counter[0]
+    dt_sep = (np.pi - RFStation.phi_s[counter]
+              - RFStation.phi_rf_d[0,counter])/ \
+              RFStation.omega_rf[0,counter]
+    Hsep = hamiltonian(Ring, RFStation, Beam, dt_sep, 0,
+                       total_voltage = None)
+
+    eta = [getattr(RFStation, 'eta_' + str(i))[counter]
+           if i <= RFStation.alpha_order else 0. for i in range(3)]
+    V0 = RFStation.voltage[0,counter]*RFStation.Particle.charge
+
+    return np.array(eta + [
+        1./(Beam.beta**2*Beam.energy),
+        c*np.pi/(Ring.ring_circumference*Beam.beta*Beam.energy),
+        c*Beam.beta*V0/(RFStation.harmonic[0,counter]*
+                        Ring.ring_circumference),
+        RFStation.omega_rf[0,counter], RFStation.phi_rf_d[0,counter],
+        RFStation.phi_s[counter], np.fabs(Hsep),
+        np.sign(RFStation.eta_0[counter])], dtype=float)
+
+
+
+class HamiltonianTable(object):
+    r"""Class evaluating the Hamiltonian and the separatrix membership of
+    particles for any number of RF systems, from the tabulated potential
+    well of FullRingAndRF.potential_well_generation:
+
+    .. math::
+        H(\Delta t, \Delta E) = \frac{|\eta_0|}{2 \beta^2 E} \Delta E^2
+        + U(\Delta t)
+
+    where U is linearly interpolated in the table. The separatrix is obtained
+    cutting the well with potential_well_cut(): a particle is inside if its
+    arrival time is in the cut frame and if H is below the potential of the
+    limiting maximum. The table is computed by update() and the particles
+    are then processed in the compiled library without temporary arrays. By
+    default the table follows the turn counter of the RFStation: it is
+    computed again when the counter has changed, e.g. during acceleration.
+    Only one RF section is supported.
+
+    Parameters
+    ----------
+    FullRingAndRF : class
+        A FullRingAndRF type class, with a single RingAndRFSection
+    turn : int (optional)
+        Fixed turn of the RF program; default is None, the turn counter of
+        the RFStation is then followed
+    n_points : int (optional)
+        Number of points of the potential well table; default is 1e5
+    main_harmonic_option : str or float (optional)
+        See FullRingAndRF.potential_well_generation
+    dt_margin_percent : float (optional)
+        Margin of the table around the RF period of the main harmonic, to
+        find the maxima of the potential well on the edges; default is 0.4
+
+    Attributes
+    ----------
+    potential_well : float array
+        Tabulated potential well [eV], minimum at 0
+    turn : int
+        Turn of the RF program of the table
+    t_min, bin_size : float
+        First time and spacing of the table [s]
+    t_left, t_right : float
+        Time frame of the separatrix [s]
+    H_sep : float
+        Hamiltonian on the separatrix [eV]
+    eom_factor_dE : float
+        Coefficient of dE^2 in the Hamiltonian [1/eV]
+
+    """
+
+    def __init__(self, FullRingAndRF, turn=None, n_points=1e5,
+                 main_harmonic_option='lowest_freq', dt_margin_percent=0.4):
+
+        if len(FullRingAndRF.RingAndRFSection_list) > 1:
+            raise RuntimeError("ERROR in HamiltonianTable: several RF" +
+                               " sections are not supported!")
+
+        self.full_ring = FullRingAndRF
+        self.counter = FullRingAndRF.RingAndRFSection_list[0].counter
+        self.follow_counter = turn is None
+        self.n_points = int(n_points)
+        self.main_harmonic_option = main_harmonic_option
+        self.dt_margin_percent = dt_margin_percent
+        self.update(self.counter[0] if turn is None else turn)
+
+    def update(self, turn):
+        """Method computing the potential well table and the separatrix of
+        the given turn.
+
+        Parameters
+        ----------
+        turn : int
+            Turn of the RF program
+
+        """
+
+        self.full_ring.potential_well_generation(
+            turn=turn, n_points=self.n_points,
+            main_harmonic_option=self.main_harmonic_option,
+            dt_margin_percent=self.dt_margin_percent)
+        time_array = self.full_ring.potential_well_coordinates
+        self.potential_well = np.ascontiguousarray(
+            self.full_ring.potential_well, dtype=float)
+        self.t_min = time_array[0]
+        self.bin_size = time_array[1] - time_array[0]
+
+        time_sep, potential_sep = potential_well_cut(time_array,
+                                                     self.potential_well)
+        self.t_left = time_sep[0]
+        self.t_right = time_sep[-1]
+        self.H_sep = np.max(potential_sep)
+
+        section = self.full_ring.RingAndRFSection_list[0]
+        self.eom_factor_dE = (abs(section.eta_0[turn]) /
+                              (2*section.rf_params.beta[turn]**2 *
+                               section.rf_params.energy[turn]))
+        self.turn = turn
+
+    def _check_turn(self):
+        # Table of the current turn of the RF program
+        if self.follow_counter and self.counter[0] != self.turn:
+            self.update(self.counter[0])
+
+    def hamiltonian(self, dt, dE):
+        """Hamiltonian of the particles; infinite outside of the table.
+
+        Parameters
+        ----------
+        dt, dE : float arrays
+            Coordinates of the particles
+
+        Returns
+        -------
+        float array
+            Hamiltonian [eV]
+
+        """
+
+        self._check_turn()
+        return bm.hamiltonian_table(dt, dE, self.potential_well, self.t_min,
+                                    self.bin_size, self.eom_factor_dE)
+
+    def is_in_separatrix(self, dt, dE):
+        """Separatrix membership of the particles.
+
+        Parameters
+        ----------
+        dt, dE : float arrays
+            Coordinates of the particles
+
+        Returns
+        -------
+        bool array
+            True for the particles inside the separatrix
+
+        """
+
+        self._check_turn()
+        is_in = np.empty(len(dt), dtype=np.uint8)
+        bm.separatrix_table(dt, dE, None, self.potential_well, self.t_min,
+                            self.bin_size, self.eom_factor_dE, self.t_left,
+                            self.t_right, self.H_sep, is_in)
+        return is_in.view(bool)
+
+    def losses(self, Beam):
+        """Flags as lost (id 0) the macro-particles outside the separatrix,
+        in place and without temporary arrays.
+
+        Parameters
+        ----------
+        Beam : class
+            A Beam type class
+
+        Returns
+        -------
+        int
+            Number of newly lost macro-particles
+
+        """
+
+        self._check_turn()
+        return bm.separatrix_table(Beam.dt, Beam.dE, Beam.id,
+                                   self.potential_well, self.t_min,
+                                   self.bin_size, self.eom_factor_dE,
+                                   self.t_left, self.t_right, self.H_sep)
+
+
+
 def minmax_location(x,f):
     '''
     *Function to locate the minima and maxima of the f(x) numerical function.*
@@ -0,0 +1,107 @@
+'''
+BLonD autotuning of the number of threads of the compiled kernels
+'''
+
+import time
+import numpy as np
+from ..utils import butils_wrap
+
+
+def thread_counts(max_threads):
+    '''
+    Default candidate numbers of threads: the powers of two up to
+    max_threads, and max_threads
+    '''
+    counts = []
+    n = 1
+    while n < max_threads:
+        counts.append(n)
+        n *= 2
+    counts.append(max_threads)
+    return counts
+
+
+class AutotunedKernel(object):
+    '''
+    Wrapper of a kernel measuring its wall-time with each candidate number
+    of threads during its first calls at each problem size, i.e. at the
+    array sizes of the simulation. The kernel is then always called with the
+    fastest number of threads found for the size. The sizes are bucketed by
+    powers of two of the length of the largest array argument, so that a
+    tuning done on small arrays is not reused for large ones.
+
+    Args:
+        name Name of the kernel
+        function Function calling the kernel
+        counts Candidate numbers of threads
+        default Number of threads of the other kernels, restored after
+            each call
+        n_calls Number of timed calls per candidate; the minimum wall-time
+            is kept
+    '''
+
+    def __init__(self, name, function, counts, default, n_calls=3):
+        self.name = name
+        self.function = function
+        self.counts = list(counts)
+        self.default = int(default)
+        self.n_calls = int(n_calls)
+        # Per size bucket, the minimum wall-time of each number of threads,
+        # the number of timed calls and the fastest number of threads
+        self.timings = {}
+        self.num_threads = {}
+        self._trials = {}
+
+    @staticmethod
+    def size_bucket(*args, **kwargs):
+        '''
+        Upper bound, a power of two, of the length of the largest array
+        argument, the coordinates of a Beam argument (or of the Beam of a
+        Profile etc.) included; 1 if there is no array argument
+        '''
+        size = 0
+        for arg in list(args) + list(kwargs.values()):
+            if not isinstance(arg, np.ndarray):
+                beam = getattr(arg, 'Beam', getattr(arg, 'beam', arg))
+                arg = getattr(beam, 'dt', None)
+            if isinstance(arg, np.ndarray):
+                size = max(size, arg.size)
+        return 1 << int(size).bit_length()
+
+    def reset(self):
+        '''
+        Discards the numbers of threads found, the kernel is tuned again
+        during its next calls
+        '''
+        self.timings = {}
+        self.num_threads = {}
+        self._trials = {}
+
+    def __call__(self, *args, **kwargs):
+        bucket = self.size_bucket(*args, **kwargs)
+        num_threads = self.num_threads.get(bucket)
+        if num_threads is not None:
+            if num_threads == self.default:
+                return self.function(*args, **kwargs)
+            butils_wrap.set_num_threads(num_threads)
+            try:
+                return self.function(*args, **kwargs)
+            finally:
+                butils_wrap.set_num_threads(self.default)
+
+        trial = self._trials.get(bucket, 0)
+        count = self.counts[trial // self.n_calls]
+        butils_wrap.set_num_threads(count)
+        try:
+            t0 = time.perf_counter()
+            result = self.function(*args, **kwargs)
+            elapsed = time.perf_counter() - t0
+        finally:
+            butils_wrap.set_num_threads(self.default)
+
+        timings = self.timings.setdefault(bucket, {})
+        timings[count] = min(timings.get(count, elapsed), elapsed)
+        self._trials[bucket] = trial + 1
+        if trial + 1 == self.n_calls * len(self.counts):
+            self.num_threads[bucket] = min(timings, key=timings.get)
+        return result
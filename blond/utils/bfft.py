@@ -0,0 +1,230 @@
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+'''
+BLonD FFT backends
+
+Real FFTs of a fixed size. The backend is 'numpy' (default, numpy.fft, a
+new array per transform), 'scipy' (scipy.fft, whose workers parallelise
+batches of transforms, a new array per transform) or 'pyfftw' (FFTW plans
+with threads, created once with their buffers and reused every turn, the
+wisdom being cached on disk).
+'''
+
+import os
+import pickle
+import numpy as np
+
+try:
+    import scipy.fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+
+backends = ['numpy', 'scipy', 'pyfftw']
+
+# Backend and number of threads of the plans created by real_fft(); None
+# threads means the number of threads of libblond
+_backend = 'numpy'
+_workers = 1
+
+# Plans created by real_fft(), shared by the objects using the same size
+_plans = {}
+
+# File of the FFTW wisdom, which makes the planning of known sizes fast
+wisdom_file = os.environ.get('BLOND_FFTW_WISDOM', os.path.join(
+    os.path.expanduser('~'), '.cache', 'blond', 'fftw_wisdom.pickle'))
+_wisdom_loaded = False
+
+
+def available_backends():
+    '''
+    The backends that can be used, i.e. whose module is installed
+    '''
+    available = ['numpy']
+    if scipy_fft is not None:
+        available.append('scipy')
+    if pyfftw is not None:
+        available.append('pyfftw')
+    return available
+
+
+def set_backend(backend='numpy', workers=1):
+    '''
+    Selects the backend and the number of threads of the FFTs; the induced
+    voltage objects pick them when they are (re)processed.
+
+    Args:
+        backend 'numpy', 'scipy' or 'pyfftw'
+        workers Number of threads, or None for the number of threads of
+            libblond, see bmath.set_num_threads
+    '''
+    global _backend, _workers
+    if backend not in backends:
+        raise RuntimeError('[set_backend] FFT backend %s not recognised'
+                           % backend)
+    if backend not in available_backends():
+        raise RuntimeError('[set_backend] FFT backend %s not available,'
+                           ' the module is not installed' % backend)
+    if workers is not None and int(workers) < 1:
+        raise RuntimeError('[set_backend] The number of workers should be'
+                           ' positive')
+    _backend = backend
+    _workers = None if workers is None else int(workers)
+
+
+def get_backend():
+    '''
+    Returns the selected backend and number of threads
+    '''
+    return _backend, _workers
+
+
+def real_fft(n, backend=None, workers=None):
+    '''
+    Returns the RealFFT plan of size n of the selected (or given) backend,
+    shared by all the callers of the same size
+    '''
+    backend = _backend if backend is None else backend
+    workers = _workers if workers is None else workers
+    if workers is None:
+        from . import bmath as bm
+        workers = bm.get_num_threads()
+    key = (int(n), backend, int(workers))
+    if key not in _plans:
+        _plans[key] = RealFFT(*key)
+    return _plans[key]
+
+
+def _load_wisdom():
+    global _wisdom_loaded
+    if _wisdom_loaded:
+        return
+    _wisdom_loaded = True
+    try:
+        with open(wisdom_file, 'rb') as file:
+            pyfftw.import_wisdom(pickle.load(file))
+    except (IOError, OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+
+def _save_wisdom():
+    try:
+        directory = os.path.dirname(wisdom_file)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        temporary = wisdom_file + '.%d.tmp' % os.getpid()
+        with open(temporary, 'wb') as file:
+            pickle.dump(pyfftw.export_wisdom(), file)
+        os.replace(temporary, wisdom_file)
+    except (IOError, OSError):
+        pass
+
+
+class RealFFT(object):
+    '''
+    Forward and inverse real FFTs of size n: rfft transforms n real values
+    (the input is zero-padded or truncated as numpy.fft.rfft) into n//2 + 1
+    complex values, irfft transforms n//2 + 1 complex values into n real
+    values.
+
+    Args:
+        n Size of the transforms
+        backend 'numpy', 'scipy' or 'pyfftw'
+        workers Number of threads (not used by numpy)
+    '''
+
+    def __init__(self, n, backend='numpy', workers=1):
+        self.n = int(n)
+        self.n_spectrum = self.n // 2 + 1
+        self.backend = backend
+        self.workers = int(workers)
+        if self.backend not in available_backends():
+            raise RuntimeError('ERROR in RealFFT: FFT backend %s not' %
+                               self.backend + ' available!')
+        self._plan()
+
+    def _plan(self):
+        if self.backend != 'pyfftw':
+            return
+        _load_wisdom()
+        self._real = pyfftw.empty_aligned(self.n, dtype=np.float64)
+        self._complex = pyfftw.empty_aligned(self.n_spectrum,
+                                             dtype=np.complex128)
+        self._forward = pyfftw.FFTW(self._real, self._complex,
+                                    direction='FFTW_FORWARD',
+                                    flags=('FFTW_MEASURE',),
+                                    threads=self.workers)
+        self._backward = pyfftw.FFTW(self._complex, self._real,
+                                     direction='FFTW_BACKWARD',
+                                     flags=('FFTW_MEASURE',),
+                                     threads=self.workers)
+        _save_wisdom()
+
+    def __getstate__(self):
+        # The FFTW plans are not picklable, they are created again
+        state = self.__dict__.copy()
+        for key in ['_real', '_complex', '_forward', '_backward']:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._plan()
+
+    def rfft(self, x, out=None):
+        '''
+        Forward transform of the last axis of x. The pyfftw plan writes a
+        one-dimensional result in out if given; the other backends return
+        a new array, the result should always be taken from the returned
+        value.
+        '''
+        if self.backend == 'numpy':
+            return np.fft.rfft(x, self.n)
+        elif self.backend == 'scipy':
+            return scipy_fft.rfft(x, self.n, workers=self.workers)
+        elif np.ndim(x) == 1:
+            n = min(len(x), self.n)
+            self._real[:n] = x[:n]
+            self._real[n:] = 0.
+            self._forward()
+            if out is None:
+                return self._complex.copy()
+            out[:] = self._complex
+            return out
+        else:
+            return pyfftw.interfaces.numpy_fft.rfft(
+                x, self.n, threads=self.workers)
+
+    def irfft(self, X, out=None):
+        '''
+        Inverse transform of the last axis of X. The pyfftw plan writes a
+        one-dimensional result in out if given; the other backends return
+        a new array, the result should always be taken from the returned
+        value.
+        '''
+        if self.backend == 'numpy':
+            return np.fft.irfft(X, self.n)
+        elif self.backend == 'scipy':
+            return scipy_fft.irfft(X, self.n, workers=self.workers)
+        elif np.ndim(X) == 1:
+            self._complex[:] = X
+            # Normalised as numpy.fft.irfft
+            self._backward(normalise_idft=True)
+            if out is None:
+                return self._real.copy()
+            out[:] = self._real
+            return out
+        else:
+            return pyfftw.interfaces.numpy_fft.irfft(
+                X, self.n, threads=self.workers)
@@ -8,6 +8,7 @@ BLonD math and physics core functions
 import numpy as np
 from ..utils import butils_wrap
 from ..utils import bphysics_wrap
+from ..utils import autotuner
 
 # dictionary storing the CPU versions of the desired functions #
 _CPU_func_dict = {
@@ -26,17 +27,35 @@ _CPU_func_dict = {
     'arange': butils_wrap.arange,
     'sum': butils_wrap.sum,
     'sort': butils_wrap.sort,
+    'random_normal': butils_wrap.random_normal,
+    'random_uniform': butils_wrap.random_uniform,
     'kick': bphysics_wrap.kick,
     'rf_volt_comp': bphysics_wrap.rf_volt_comp,
+    'rf_voltage_table': bphysics_wrap.rf_voltage_table,
+    'table_kick': bphysics_wrap.table_kick,
     'drift': bphysics_wrap.drift,
+    'kick_drift_slice': bphysics_wrap.kick_drift_slice,
+    'ensemble_kick': bphysics_wrap.ensemble_kick,
+    'ensemble_drift': bphysics_wrap.ensemble_drift,
+    'ensemble_histogram': bphysics_wrap.ensemble_histogram,
+    'kick_drift_periodic': bphysics_wrap.kick_drift_periodic,
+    'track_turns': bphysics_wrap.track_turns,
     'linear_interp_kick': bphysics_wrap.linear_interp_kick,
     'synchrotron_radiation': bphysics_wrap.synchrotron_radiation,
     'synchrotron_radiation_full': bphysics_wrap.synchrotron_radiation_full,
     # 'linear_interp_time_translation': bphysics_wrap.linear_interp_time_translation,
     'slice': bphysics_wrap.slice,
     'slice_smooth': bphysics_wrap.slice_smooth,
+    'beam_statistics': bphysics_wrap.beam_statistics,
+    'compact_lost_particles': bphysics_wrap.compact_lost_particles,
+    'beam_losses': bphysics_wrap.beam_losses,
+    'hamiltonian_table': bphysics_wrap.hamiltonian_table,
+    'separatrix_table': bphysics_wrap.separatrix_table,
     'music_track': bphysics_wrap.music_track,
     'music_track_multiturn': bphysics_wrap.music_track_multiturn,
+    'resonator_induced_voltage': bphysics_wrap.resonator_induced_voltage,
+    'pole_residue_induced_voltage':
+        bphysics_wrap.pole_residue_induced_voltage,
     'diff': np.diff,
     'cumsum': np.cumsum,
     'cumprod': np.cumprod,
@@ -57,7 +76,7 @@ def update_active_dict(new_dict):
     if not hasattr(update_active_dict, 'active_dict'):
         update_active_dict.active_dict = new_dict
     # delete all old implementations/references from globals()
-    for key in globals().keys():
+    for key in list(globals().keys()):
         if key in update_active_dict.active_dict.keys():
             del globals()[key]
     # add the new active dict to the globals()
@@ -65,6 +84,82 @@ def update_active_dict(new_dict):
     update_active_dict.active_dict = new_dict
 
 
+def set_num_threads(n):
+    '''
+    Set the number of OpenMP threads of the compiled kernels, in place of
+    OMP_NUM_THREADS. The kernels tuned by enable_autotuning() keep their
+    own number of threads.
+    Args:
+        n Number of threads
+    '''
+    if int(n) < 1:
+        raise RuntimeError('[set_num_threads] The number of threads should'
+                           ' be positive')
+    butils_wrap.set_num_threads(n)
+    for function in update_active_dict.active_dict.values():
+        if isinstance(function, autotuner.AutotunedKernel):
+            function.default = int(n)
+
+
+def get_num_threads():
+    '''
+    Returns the number of OpenMP threads of the compiled kernels (1 for the
+    serial library)
+    '''
+    return butils_wrap.get_num_threads()
+
+
+def enable_autotuning(kernels=None, thread_counts=None, n_calls=3):
+    '''
+    Tune the number of threads of each compiled kernel: during the first
+    calls of a kernel at a given problem size (array length bucketed by
+    powers of two), i.e. the first turns of the simulation, its wall-time is
+    measured with each candidate number of threads, and the fastest one is
+    used from then on for this size. The numbers of threads found are
+    returned by autotuning_report().
+    Args:
+        kernels Names of the kernels to tune; default are all the kernels of
+            the compiled library
+        thread_counts Candidate numbers of threads; default are the powers
+            of two up to the current number of threads, and the current
+            number of threads
+        n_calls Number of timed calls per candidate
+    '''
+    default = get_num_threads()
+    if kernels is None:
+        kernels = [name for name, function in _CPU_func_dict.items()
+                   if getattr(function, '__module__', None) in
+                   [butils_wrap.__name__, bphysics_wrap.__name__]]
+    if thread_counts is None:
+        thread_counts = autotuner.thread_counts(default)
+
+    new_dict = dict(_CPU_func_dict)
+    for name in kernels:
+        if name not in _CPU_func_dict:
+            raise RuntimeError('[enable_autotuning] Unknown kernel %s' % name)
+        new_dict[name] = autotuner.AutotunedKernel(
+            name, _CPU_func_dict[name], thread_counts, default, n_calls)
+    update_active_dict(new_dict)
+
+
+def disable_autotuning():
+    '''
+    Call all the kernels with the current number of threads again
+    '''
+    update_active_dict(_CPU_func_dict)
+
+
+def autotuning_report():
+    '''
+    Returns a dictionary with, for each tuned kernel, the numbers of threads
+    chosen per size bucket {upper bound of the array length: threads}; empty
+    while the kernel is still being tuned
+    '''
+    return {name: function.num_threads for name, function in
+            update_active_dict.active_dict.items()
+            if isinstance(function, autotuner.AutotunedKernel)}
+
+
 ################################################################################
 update_active_dict(_CPU_func_dict)
 ################################################################################
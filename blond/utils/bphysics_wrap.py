@@ -19,6 +19,13 @@ def __getLen(x):
     return ct.c_int(len(x))
 
 
+def __getFunc(name, x):
+    # Single precision variant of the routine for float32 coordinates
+    if x.dtype == np.float32:
+        return getattr(__lib, name + 'f')
+    return getattr(__lib, name)
+
+
 def rf_volt_comp(voltages, omega_rf, phi_rf, ring):
     # voltages = np.ascontiguousarray(ring.voltage[:, ring.counter[0]])
     # omega_rf = np.ascontiguousarray(ring.omega_rf[:, ring.counter[0]])
@@ -41,43 +48,253 @@ def kick(ring, dt, dE, turn):
     omegarf_kick = np.ascontiguousarray(ring.omega_rf[:, turn])
     phirf_kick = np.ascontiguousarray(ring.phi_rf[:, turn])
 
-    __lib.kick(__getPointer(dt),
-               __getPointer(dE),
-               ct.c_int(ring.n_rf),
-               __getPointer(voltage_kick),
-               __getPointer(omegarf_kick),
-               __getPointer(phirf_kick),
-               __getLen(dt),
-               ct.c_double(ring.acceleration_kick[turn]))
+    __getFunc('kick', dt)(__getPointer(dt),
+                          __getPointer(dE),
+                          ct.c_int(ring.n_rf),
+                          __getPointer(voltage_kick),
+                          __getPointer(omegarf_kick),
+                          __getPointer(phirf_kick),
+                          __getLen(dt),
+                          ct.c_double(ring.acceleration_kick[turn]))
+
+
+def rf_voltage_table(ring, turn, t_min, bin_size, n_points):
+    voltage_kick = np.ascontiguousarray(ring.charge*ring.voltage[:, turn])
+    omegarf_kick = np.ascontiguousarray(ring.omega_rf[:, turn])
+    phirf_kick = np.ascontiguousarray(ring.phi_rf[:, turn])
+    table = np.empty(n_points)
+    derivative = np.empty(n_points)
+
+    __lib.rf_voltage_table(__getPointer(voltage_kick),
+                           __getPointer(omegarf_kick),
+                           __getPointer(phirf_kick),
+                           ct.c_int(ring.n_rf),
+                           ct.c_double(t_min),
+                           ct.c_double(bin_size),
+                           ct.c_int(n_points),
+                           __getPointer(table),
+                           __getPointer(derivative))
+    return table, derivative
+
+
+def table_kick(dt, dE, table, derivative, t_min, bin_size, cubic,
+               acceleration_kick, periodic=False):
+
+    __getFunc('table_kick', dt)(__getPointer(dt),
+                                __getPointer(dE),
+                                __getPointer(table),
+                                __getPointer(derivative),
+                                ct.c_double(t_min),
+                                ct.c_double(bin_size),
+                                __getLen(table),
+                                ct.c_int(int(cubic)),
+                                ct.c_int(int(periodic)),
+                                ct.c_double(acceleration_kick),
+                                __getLen(dt))
 
 
 def drift(ring, dt, dE, turn):
 
-    __lib.drift(__getPointer(dt),
-                __getPointer(dE),
-                ct.c_char_p(ring.solver),
-                ct.c_double(ring.t_rev[turn]),
-                ct.c_double(ring.length_ratio),
-                ct.c_double(ring.alpha_order),
-                ct.c_double(ring.eta_0[turn]),
-                ct.c_double(ring.eta_1[turn]),
-                ct.c_double(ring.eta_2[turn]),
-                ct.c_double(ring.rf_params.beta[turn]),
-                ct.c_double(ring.rf_params.energy[turn]),
-                __getLen(dt))
+    __getFunc('drift', dt)(__getPointer(dt),
+                           __getPointer(dE),
+                           ct.c_int(ring.solver_id),
+                           ct.c_double(ring.t_rev[turn]),
+                           ct.c_double(ring.length_ratio),
+                           ct.c_int(ring.alpha_order),
+                           ct.c_double(ring.eta_0[turn]),
+                           ct.c_double(ring.eta_1[turn]),
+                           ct.c_double(ring.eta_2[turn]),
+                           ct.c_double(ring.rf_params.beta[turn]),
+                           ct.c_double(ring.rf_params.energy[turn]),
+                           __getLen(dt))
+
+
+def ensemble_kick(dt, dE, voltage, omega_rf, phi_rf, acc_kick):
+    # dt, dE: [n_ensemble, n_macroparticles]; voltage, omega_rf, phi_rf:
+    # [n_ensemble, n_rf]; acc_kick: [n_ensemble]
+    voltage = np.ascontiguousarray(voltage, dtype=float)
+    omega_rf = np.ascontiguousarray(omega_rf, dtype=float)
+    phi_rf = np.ascontiguousarray(phi_rf, dtype=float)
+    acc_kick = np.ascontiguousarray(acc_kick, dtype=float)
+
+    __getFunc('ensemble_kick', dt)(__getPointer(dt),
+                                   __getPointer(dE),
+                                   ct.c_int(dt.shape[0]),
+                                   ct.c_int(dt.shape[1]),
+                                   ct.c_int(voltage.shape[1]),
+                                   __getPointer(voltage),
+                                   __getPointer(omega_rf),
+                                   __getPointer(phi_rf),
+                                   __getPointer(acc_kick))
+
+
+def ensemble_drift(dt, dE, solver, alpha_order, t_rev, length_ratio, eta_0,
+                   eta_1, eta_2, beta, energy):
+    # dt, dE: [n_ensemble, n_macroparticles]; the other arguments:
+    # [n_ensemble]
+    def doubles(x):
+        return np.ascontiguousarray(x, dtype=float)
+    solver = np.ascontiguousarray(solver, dtype=np.int32)
+    alpha_order = np.ascontiguousarray(alpha_order, dtype=np.int32)
+    t_rev = doubles(t_rev)
+    length_ratio = doubles(length_ratio)
+    eta_0 = doubles(eta_0)
+    eta_1 = doubles(eta_1)
+    eta_2 = doubles(eta_2)
+    beta = doubles(beta)
+    energy = doubles(energy)
+
+    __getFunc('ensemble_drift', dt)(__getPointer(dt),
+                                    __getPointer(dE),
+                                    ct.c_int(dt.shape[0]),
+                                    ct.c_int(dt.shape[1]),
+                                    __getPointer(solver),
+                                    __getPointer(alpha_order),
+                                    __getPointer(t_rev),
+                                    __getPointer(length_ratio),
+                                    __getPointer(eta_0),
+                                    __getPointer(eta_1),
+                                    __getPointer(eta_2),
+                                    __getPointer(beta),
+                                    __getPointer(energy))
+
+
+def ensemble_histogram(dt, cut_left, cut_right, n_slices, result=None):
+    # One histogram of n_slices bins per member: [n_ensemble, n_slices]
+    cut_left = np.ascontiguousarray(cut_left, dtype=float)
+    cut_right = np.ascontiguousarray(cut_right, dtype=float)
+    if result is None:
+        result = np.empty((dt.shape[0], int(n_slices)), dtype=float)
+
+    __getFunc('ensemble_histogram', dt)(__getPointer(dt),
+                                        __getPointer(result),
+                                        ct.c_int(dt.shape[0]),
+                                        ct.c_int(dt.shape[1]),
+                                        __getPointer(cut_left),
+                                        __getPointer(cut_right),
+                                        ct.c_int(int(n_slices)))
+    return result
+
+
+def kick_drift_slice(ring, dt, dE, profile, turn):
+    voltage_kick = np.ascontiguousarray(ring.charge*ring.voltage[:, turn])
+    omegarf_kick = np.ascontiguousarray(ring.omega_rf[:, turn])
+    phirf_kick = np.ascontiguousarray(ring.phi_rf[:, turn])
+
+    __getFunc('kick_drift_histogram', dt)(__getPointer(dt),
+                                          __getPointer(dE),
+                                          ct.c_int(ring.n_rf),
+                                          __getPointer(voltage_kick),
+                                          __getPointer(omegarf_kick),
+                                          __getPointer(phirf_kick),
+                                          ct.c_double(ring.acceleration_kick[turn]),
+                                          ct.c_int(ring.solver_id),
+                                          ct.c_double(ring.t_rev[turn + 1]),
+                                          ct.c_double(ring.length_ratio),
+                                          ct.c_int(ring.alpha_order),
+                                          ct.c_double(ring.eta_0[turn + 1]),
+                                          ct.c_double(ring.eta_1[turn + 1]),
+                                          ct.c_double(ring.eta_2[turn + 1]),
+                                          ct.c_double(ring.rf_params.beta[turn + 1]),
+                                          ct.c_double(ring.rf_params.energy[turn + 1]),
+                                          __getPointer(profile.n_macroparticles),
+                                          ct.c_double(profile.cut_left),
+                                          ct.c_double(profile.cut_right),
+                                          ct.c_int(profile.n_slices),
+                                          __getLen(dt))
+
+
+def kick_drift_periodic(ring, dt, dE, turn):
+    voltage_kick = np.ascontiguousarray(ring.charge*ring.voltage[:, turn])
+    omegarf_kick = np.ascontiguousarray(ring.omega_rf[:, turn])
+    phirf_kick = np.ascontiguousarray(ring.phi_rf[:, turn])
+
+    __getFunc('kick_drift_periodic', dt)(__getPointer(dt),
+                                         __getPointer(dE),
+                                         ct.c_double(ring.t_rev[turn + 1]),
+                                         ct.c_int(ring.n_rf),
+                                         __getPointer(voltage_kick),
+                                         __getPointer(omegarf_kick),
+                                         __getPointer(phirf_kick),
+                                         ct.c_double(ring.acceleration_kick[turn]),
+                                         ct.c_int(ring.solver_id),
+                                         ct.c_double(ring.t_rev[turn + 1]),
+                                         ct.c_double(ring.length_ratio),
+                                         ct.c_int(ring.alpha_order),
+                                         ct.c_double(ring.eta_0[turn + 1]),
+                                         ct.c_double(ring.eta_1[turn + 1]),
+                                         ct.c_double(ring.eta_2[turn + 1]),
+                                         ct.c_double(ring.rf_params.beta[turn + 1]),
+                                         ct.c_double(ring.rf_params.energy[turn + 1]),
+                                         __getLen(dt))
+
+
+def track_turns(rings, dt, dE, turn, n_turns):
+    # RF programs of all the sections, shaped [n_turns, n_rf/n_sections]
+    kick_turns = np.s_[turn:turn + n_turns]
+    drift_turns = np.s_[turn + 1:turn + n_turns + 1]
+    n_rf = np.array([0 if ring.rf_params.empty else ring.n_rf
+                     for ring in rings], dtype=np.int32)
+    voltage = np.ascontiguousarray(np.vstack(
+        [ring.charge*ring.voltage[:n, kick_turns]
+         for ring, n in zip(rings, n_rf)]).T)
+    omega_rf = np.ascontiguousarray(np.vstack(
+        [ring.omega_rf[:n, kick_turns] for ring, n in zip(rings, n_rf)]).T)
+    phi_rf = np.ascontiguousarray(np.vstack(
+        [ring.phi_rf[:n, kick_turns] for ring, n in zip(rings, n_rf)]).T)
+    acc_kick = np.ascontiguousarray(np.vstack(
+        [ring.acceleration_kick[kick_turns] * (n > 0)
+         for ring, n in zip(rings, n_rf)]).T)
+
+    def per_section(attribute):
+        return np.ascontiguousarray(np.vstack(
+            [attribute(ring)[drift_turns] for ring in rings]).T)
+
+    t_rev = per_section(lambda ring: ring.t_rev)
+    eta_0 = per_section(lambda ring: ring.eta_0)
+    eta_1 = per_section(lambda ring: ring.eta_1)
+    eta_2 = per_section(lambda ring: ring.eta_2)
+    beta = per_section(lambda ring: ring.rf_params.beta)
+    energy = per_section(lambda ring: ring.rf_params.energy)
+
+    solver = np.array([ring.solver_id for ring in rings], dtype=np.int32)
+    alpha_order = np.array([ring.alpha_order for ring in rings],
+                           dtype=np.int32)
+    length_ratio = np.array([ring.length_ratio for ring in rings],
+                            dtype=float)
+
+    __getFunc('track_turns', dt)(__getPointer(dt),
+                                 __getPointer(dE),
+                                 __getLen(dt),
+                                 ct.c_int(n_turns),
+                                 ct.c_int(len(rings)),
+                                 __getPointer(n_rf),
+                                 __getPointer(solver),
+                                 __getPointer(alpha_order),
+                                 __getPointer(length_ratio),
+                                 __getPointer(voltage),
+                                 __getPointer(omega_rf),
+                                 __getPointer(phi_rf),
+                                 __getPointer(acc_kick),
+                                 __getPointer(t_rev),
+                                 __getPointer(eta_0),
+                                 __getPointer(eta_1),
+                                 __getPointer(eta_2),
+                                 __getPointer(beta),
+                                 __getPointer(energy))
 
 
 def linear_interp_kick(dt, dE, voltage,
                        bin_centers, charge,
                        acceleration_kick):
-    __lib.linear_interp_kick(__getPointer(dt),
-                             __getPointer(dE),
-                             __getPointer(voltage),
-                             __getPointer(bin_centers),
-                             ct.c_double(charge),
-                             __getLen(bin_centers),
-                             __getLen(dt),
-                             ct.c_double(acceleration_kick))
+    __getFunc('linear_interp_kick', dt)(__getPointer(dt),
+                                        __getPointer(dE),
+                                        __getPointer(voltage),
+                                        __getPointer(bin_centers),
+                                        ct.c_double(charge),
+                                        __getLen(bin_centers),
+                                        __getLen(dt),
+                                        ct.c_double(acceleration_kick))
 
 
 def linear_interp_time_translation(ring, dt, dE, turn):
@@ -85,21 +302,112 @@ def linear_interp_time_translation(ring, dt, dE, turn):
 
 
 def slice(profile):
-    __lib.histogram(__getPointer(profile.Beam.dt),
-                    __getPointer(profile.n_macroparticles),
-                    ct.c_double(profile.cut_left),
-                    ct.c_double(profile.cut_right),
-                    ct.c_int(profile.n_slices),
-                    ct.c_int(profile.Beam.n_macroparticles))
+    __getFunc('histogram', profile.Beam.dt)(
+        __getPointer(profile.Beam.dt),
+        __getPointer(profile.n_macroparticles),
+        ct.c_double(profile.cut_left),
+        ct.c_double(profile.cut_right),
+        ct.c_int(profile.n_slices),
+        ct.c_int(profile.Beam.n_macroparticles))
 
 
 def slice_smooth(profile):
-    __lib.smooth_histogram(__getPointer(profile.Beam.dt),
-                           __getPointer(profile.n_macroparticles),
-                           ct.c_double(profile.cut_left),
-                           ct.c_double(profile.cut_right),
-                           ct.c_int(profile.n_slices),
-                           ct.c_int(profile.Beam.n_macroparticles))
+    __getFunc('smooth_histogram', profile.Beam.dt)(
+        __getPointer(profile.Beam.dt),
+        __getPointer(profile.n_macroparticles),
+        ct.c_double(profile.cut_left),
+        ct.c_double(profile.cut_right),
+        ct.c_int(profile.n_slices),
+        ct.c_int(profile.Beam.n_macroparticles))
+
+
+def beam_statistics(beam):
+    # n_alive, mean_dt, mean_dE, sigma_dt, sigma_dE, skewness_dt,
+    # skewness_dE, kurtosis_dt, kurtosis_dE
+    result = np.zeros(9)
+    beam_id = np.ascontiguousarray(beam.id, dtype=np.int64)
+    __getFunc('beam_statistics', beam.dt)(__getPointer(beam.dt),
+                                          __getPointer(beam.dE),
+                                          __getPointer(beam_id),
+                                          __getLen(beam.dt),
+                                          __getPointer(result))
+    return result
+
+
+def compact_lost_particles(beam):
+    # The alive particles are moved to the beginning of the arrays, their
+    # number is returned
+    if beam.id.dtype != np.int64:
+        alive = beam.id != 0
+        n_alive = int(np.count_nonzero(alive))
+        beam.dt[:n_alive] = beam.dt[alive]
+        beam.dE[:n_alive] = beam.dE[alive]
+        beam.id[:n_alive] = beam.id[alive]
+        return n_alive
+    __getFunc('compact_lost_particles', beam.dt).restype = ct.c_int
+    return __getFunc('compact_lost_particles', beam.dt)(
+        __getPointer(beam.dt),
+        __getPointer(beam.dE),
+        __getPointer(beam.id),
+        __getLen(beam.dt))
+
+
+def beam_losses(beam, criteria, cuts, separatrix, alpha_order, mask=None):
+    # Number of newly lost particles: total, longitudinal cut, energy cut,
+    # below energy, separatrix
+    counts = np.zeros(5, dtype=np.int64)
+    cuts = np.ascontiguousarray(cuts, dtype=np.float64)
+    separatrix = np.ascontiguousarray(separatrix, dtype=np.float64)
+    beam_id = np.ascontiguousarray(beam.id, dtype=np.int64)
+    __getFunc('beam_losses', beam.dt)(
+        __getPointer(beam.dt),
+        __getPointer(beam.dE),
+        __getPointer(beam_id),
+        __getLen(beam.dt),
+        ct.c_int(criteria),
+        __getPointer(cuts),
+        __getPointer(separatrix),
+        ct.c_int(alpha_order),
+        None if mask is None else __getPointer(mask),
+        __getPointer(counts))
+    if beam_id is not beam.id:
+        beam.id[:] = beam_id
+    return counts
+
+
+def hamiltonian_table(dt, dE, well, t_min, bin_size, eom_factor_dE):
+    hamiltonian = np.empty(len(dt))
+    __getFunc('hamiltonian_table', dt)(__getPointer(dt),
+                                       __getPointer(dE),
+                                       __getPointer(well),
+                                       __getLen(well),
+                                       ct.c_double(t_min),
+                                       ct.c_double(bin_size),
+                                       ct.c_double(eom_factor_dE),
+                                       __getPointer(hamiltonian),
+                                       __getLen(dt))
+    return hamiltonian
+
+
+def separatrix_table(dt, dE, beam_id, well, t_min, bin_size, eom_factor_dE,
+                     t_left, t_right, H_sep, is_in=None):
+    # The particles outside are flagged as lost in beam_id (if not None), and
+    # their number is returned
+    __getFunc('separatrix_table', dt).restype = ct.c_int
+    return __getFunc('separatrix_table', dt)(
+        __getPointer(dt),
+        __getPointer(dE),
+        None if beam_id is None else __getPointer(beam_id),
+        __getPointer(well),
+        __getLen(well),
+        ct.c_double(t_min),
+        ct.c_double(bin_size),
+        ct.c_double(eom_factor_dE),
+        ct.c_double(t_left),
+        ct.c_double(t_right),
+        ct.c_double(H_sep),
+        None if is_in is None else __getPointer(is_in),
+        __getLen(dt))
 
 
 def music_track(music):
@@ -132,8 +440,44 @@ def music_track_multiturn(music):
                                 ct.c_double(music.coeff4))
 
 
+def resonator_induced_voltage(kappa, bin_centers, time, R, omega_r, Q,
+                              result=None):
+    # time and bin_centers sorted in increasing order; the result is not
+    # multiplied by the bunch charge
+    if result is None:
+        result = np.empty(len(time))
+    __lib.resonator_induced_voltage(__getPointer(kappa),
+                                    __getPointer(bin_centers),
+                                    __getLen(bin_centers),
+                                    __getPointer(time),
+                                    __getLen(time),
+                                    __getPointer(R),
+                                    __getPointer(omega_r),
+                                    __getPointer(Q),
+                                    __getLen(R),
+                                    __getPointer(result))
+    return result
+
+
+def pole_residue_induced_voltage(profile, bin_size, poles, residues, state,
+                                 result=None):
+    # state (complex) is updated in place, from the first slice to the last
+    # one; the result is not multiplied by the bunch charge
+    if result is None:
+        result = np.empty(len(profile))
+    __lib.pole_residue_induced_voltage(__getPointer(profile),
+                                       __getLen(profile),
+                                       ct.c_double(bin_size),
+                                       __getPointer(poles),
+                                       __getPointer(residues),
+                                       __getLen(poles),
+                                       __getPointer(state),
+                                       __getPointer(result))
+    return result
+
+
 def synchrotron_radiation(SyncRad, turn):
-    __lib.synchrotron_radiation(
+    __getFunc('synchrotron_radiation', SyncRad.beam.dE)(
         __getPointer(SyncRad.beam.dE),
         ct.c_double(SyncRad.U0 / SyncRad.n_kicks),
         ct.c_int(SyncRad.beam.n_macroparticles),
@@ -142,12 +486,15 @@ def synchrotron_radiation(SyncRad, turn):
 
 
 def synchrotron_radiation_full(SyncRad, turn):
-    __lib.synchrotron_radiation_full(
+    # The kicks use the next streams of the random generator
+    __getFunc('synchrotron_radiation_full', SyncRad.beam.dE)(
         __getPointer(SyncRad.beam.dE),
         ct.c_double(SyncRad.U0 / SyncRad.n_kicks),
         ct.c_int(SyncRad.beam.n_macroparticles),
         ct.c_double(SyncRad.sigma_dE),
         ct.c_double(SyncRad.tau_z * SyncRad.n_kicks),
         ct.c_double(SyncRad.general_params.energy[0, turn]),
-        __getPointer(SyncRad.random_array),
+        ct.c_uint64(SyncRad.seed),
+        ct.c_uint64(SyncRad.random_counter),
         ct.c_int(SyncRad.n_kicks))
+    SyncRad.random_counter += SyncRad.n_kicks
@@ -172,3 +172,46 @@ def sort(x, reverse=False):
     else:
         raise RuntimeError('[sort] Datatype %s not supported' % x.dtype)
     return x
+
+
+def random_normal(n, seed, stream=0, loc=0., scale=1., result=None):
+    # Counter-based generator: the numbers depend only on seed, stream and
+    # their index, not on the number of threads
+    if result is None:
+        result = np.empty(int(n), dtype=float)
+    if result.dtype == np.float32:
+        func = __lib.random_normalf
+    elif result.dtype == np.float64:
+        func = __lib.random_normal
+    else:
+        raise RuntimeError('[random_normal] Datatype %s not supported'
+                           % result.dtype)
+    func(__getPointer(result), __getLen(result),
+         ct.c_uint64(int(seed) % 2**64), ct.c_uint64(int(stream) % 2**64),
+         ct.c_double(loc), ct.c_double(scale))
+    return result
+
+
+def random_uniform(n, seed, stream=0, low=0., high=1., result=None):
+    if result is None:
+        result = np.empty(int(n), dtype=float)
+    if result.dtype == np.float32:
+        func = __lib.random_uniformf
+    elif result.dtype == np.float64:
+        func = __lib.random_uniform
+    else:
+        raise RuntimeError('[random_uniform] Datatype %s not supported'
+                           % result.dtype)
+    func(__getPointer(result), __getLen(result),
+         ct.c_uint64(int(seed) % 2**64), ct.c_uint64(int(stream) % 2**64),
+         ct.c_double(low), ct.c_double(high))
+    return result
+
+
+def set_num_threads(n):
+    __lib.set_num_threads(ct.c_int(int(n)))
+
+
+def get_num_threads():
+    __lib.get_num_threads.restype = ct.c_int
+    return __lib.get_num_threads()
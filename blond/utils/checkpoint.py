@@ -0,0 +1,159 @@
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+'''
+BLonD checkpoint and restart of a simulation
+
+The objects of a simulation (Beam, RFStation, trackers, Profile, induced
+voltages, feedbacks, ...) are pickled together, so that the references
+between them are preserved. The large arrays, in particular the coordinates
+of the macro-particles, are written separately as raw .npy files that are
+memory-mapped at restart, without copy.
+'''
+
+import os
+import pickle
+import uuid
+import numpy as np
+
+# File of the pickled objects in the checkpoint directory
+state_file = 'state.pkl'
+
+
+class _CheckpointPickler(pickle.Pickler):
+    '''
+    Pickler writing the arrays larger than min_array_size bytes to .npy
+    files, once per array even if it is referenced by several objects
+    '''
+
+    def __init__(self, file, directory, min_array_size, prefix='array'):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.directory = directory
+        self.min_array_size = min_array_size
+        self.prefix = prefix
+        self.array_files = {}
+        # Keeps the arrays alive, so that their ids are not reused
+        self.arrays = []
+
+    def persistent_id(self, obj):
+        if (type(obj) not in (np.ndarray, np.memmap)
+                or obj.dtype.hasobject or obj.nbytes < self.min_array_size):
+            return None
+        key = id(obj)
+        if key not in self.array_files:
+            file_name = '%s_%d.npy' % (self.prefix, len(self.array_files))
+            np.save(os.path.join(self.directory, file_name),
+                    np.asarray(obj))
+            self.array_files[key] = file_name
+            self.arrays.append(obj)
+        return self.array_files[key]
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    '''
+    Unpickler loading, or memory-mapping, the arrays of the .npy files
+    '''
+
+    def __init__(self, file, directory, mmap_mode):
+        pickle.Unpickler.__init__(self, file)
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        self.arrays = {}
+
+    def persistent_load(self, pid):
+        if pid not in self.arrays:
+            self.arrays[pid] = np.load(os.path.join(self.directory, pid),
+                                       mmap_mode=self.mmap_mode)
+        return self.arrays[pid]
+
+
+def save_checkpoint(directory, objects, random_state=True,
+                    min_array_size=1 << 16):
+    '''
+    Writes the state of the simulation objects to a checkpoint directory.
+    The arrays are written to new files and the pickled objects to a
+    temporary file, which then replaces the state file of the previous
+    checkpoint in a single os.replace, so that an interrupted job always
+    leaves a complete checkpoint behind. The array files of the previous
+    checkpoint are removed afterwards.
+
+    Args:
+        directory Path of the checkpoint directory
+        objects Dictionary of the simulation objects, e.g.
+            {'tracker': long_tracker, 'profile': profile, ...}; all the
+            objects they reference are saved as well
+        random_state Whether the state of the NumPy global random generator
+            is saved, and restored by load_checkpoint
+        min_array_size Arrays of at least this number of bytes are written
+            to separate .npy files
+    '''
+    directory = os.path.abspath(directory)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # Names not used by the previous checkpoint, still complete until the
+    # state file is replaced
+    prefix = 'array_' + uuid.uuid4().hex
+    temporary = os.path.join(directory, state_file + '.%d.tmp' % os.getpid())
+
+    state = {'objects': objects,
+             'random_state': np.random.get_state() if random_state else None}
+    try:
+        with open(temporary, 'wb') as file:
+            pickler = _CheckpointPickler(file, directory, min_array_size,
+                                         prefix)
+            pickler.dump(state)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, os.path.join(directory, state_file))
+    except BaseException:
+        _remove_files(directory, lambda name: name == os.path.basename(
+            temporary) or name.startswith(prefix + '_'))
+        raise
+
+    # Arrays of the previous checkpoints and files of interrupted jobs
+    array_files = set(pickler.array_files.values())
+    _remove_files(directory, lambda name: name not in array_files and (
+        (name.startswith('array_') and name.endswith('.npy')) or
+        (name.startswith(state_file + '.') and name.endswith('.tmp'))))
+
+
+def _remove_files(directory, condition):
+    for name in os.listdir(directory):
+        if condition(name):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def load_checkpoint(directory, mmap_mode='c'):
+    '''
+    Restores the simulation objects of a checkpoint directory; tracking the
+    restored objects gives the same results, bit for bit, as tracking the
+    objects at the time of the checkpoint.
+
+    Args:
+        directory Path of the checkpoint directory
+        mmap_mode Memory-map mode of the large arrays, see numpy.load. With
+            the default 'c' (copy-on-write) the arrays are read lazily and
+            modified in memory only, so that the checkpoint can be restored
+            many times, e.g. to fork several scenarios. 'r+' writes the
+            modifications back to the checkpoint, and None reads the arrays
+            in memory.
+
+    Returns:
+        The dictionary of the simulation objects given to save_checkpoint
+    '''
+    directory = os.path.abspath(directory)
+    with open(os.path.join(directory, state_file), 'rb') as file:
+        state = _CheckpointUnpickler(file, directory, mmap_mode).load()
+
+    if state['random_state'] is not None:
+        np.random.set_state(state['random_state'])
+    return state['objects']
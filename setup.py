@@ -16,7 +16,8 @@ class Compile(distutils.cmd.Command):
     user_options = [
         ('openmp', 'o', 'Enable Multi-threaded code'),
         ('compiler=', 'c', 'Specify the compiler type'),
-        ('boost=', None, 'Compile with the Boost Library')]
+        ('boost=', None, 'Compile with the Boost Library'),
+        ('variants', None, 'Also compile the AVX2 and AVX-512 libraries')]
 
 
     def initialize_options(self):
@@ -25,6 +26,7 @@ class Compile(distutils.cmd.Command):
         self.openmp = None
         self.boost = None
         self.compiler = None
+        self.variants = None
 
     def finalize_options(self):
         """Post-process options."""
@@ -42,6 +44,8 @@ class Compile(distutils.cmd.Command):
             cmd += ['-b', self.boost]
         if self.compiler:
             cmd += ['-c', self.compiler]
+        if self.variants:
+            cmd.append('-v')
 
         subprocess.call(cmd)
 
@@ -27,6 +27,8 @@ from blond.input_parameters.rf_parameters import RFStation
 from blond.beam.beam import Beam
 from blond.beam.distributions import matched_from_distribution_function
 from blond.trackers.tracker import FullRingAndRF, RingAndRFTracker
+from blond.trackers.utilities import is_in_separatrix
+from blond.beam.losses import BeamLosses
 
 
 class testBeamClass(unittest.TestCase):
@@ -130,6 +132,205 @@ class testBeamClass(unittest.TestCase):
         self.assertAlmostEqual(self.beam.mean_dE, 0., delta=1e-2,
                                msg='Beam: Failed statistic mean_dE')
 
+    def test_beam_statistics_lost_particles(self):
+
+        beam = Beam(self.general_params, 100001, 1e9)
+        beam.dt = 2.5e-9 + 1e-10*numpy.random.exponential(
+            size=beam.n_macroparticles)
+        beam.dE = 1e6*numpy.random.randn(beam.n_macroparticles)**3
+        beam.id[::3] = 0
+        alive = beam.id != 0
+
+        beam.statistics()
+
+        self.assertEqual(beam.n_alive, beam.n_macroparticles_alive,
+                         msg='Beam: Failed statistic n_alive')
+        for coordinate in ['dt', 'dE']:
+            x = getattr(beam, coordinate)[alive]
+            deviation = x - numpy.mean(x)
+            sigma = numpy.std(x)
+            numpy.testing.assert_allclose(
+                [getattr(beam, 'mean_' + coordinate),
+                 getattr(beam, 'sigma_' + coordinate),
+                 getattr(beam, 'skewness_' + coordinate),
+                 getattr(beam, 'kurtosis_' + coordinate)],
+                [numpy.mean(x), sigma,
+                 numpy.mean(deviation**3) / sigma**3,
+                 numpy.mean(deviation**4) / sigma**4 - 3],
+                rtol=1e-9, err_msg='Beam: Failed statistic of ' + coordinate)
+        self.assertAlmostEqual(beam.epsn_rms_l,
+                               numpy.pi*beam.sigma_dt*beam.sigma_dE,
+                               msg='Beam: Failed statistic epsn_rms_l')
+
+    def test_beam_single_precision(self):
+
+        beam = Beam(self.general_params, 1000, 1e9, precision='single')
+        self.assertEqual(beam.dt.dtype, numpy.float32,
+                         msg='Beam: dt is not single precision')
+        beam.dt = numpy.random.randn(beam.n_macroparticles)
+        beam.dE = numpy.random.randn(beam.n_macroparticles)
+        self.assertEqual(beam.dt.dtype, numpy.float32,
+                         msg='Beam: dt precision lost after assignment')
+        self.assertEqual(beam.dE.dtype, numpy.float32,
+                         msg='Beam: dE precision lost after assignment')
+
+        beam.statistics()
+        self.assertAlmostEqual(beam.sigma_dt,
+                               numpy.std(beam.dt.astype(numpy.float64)),
+                               delta=1e-12,
+                               msg='Beam: Failed single precision statistic')
+
+        with self.assertRaises(RuntimeError):
+            Beam(self.general_params, 1000, 1e9, precision='half')
+
+    def test_beam_sort_particles(self):
+
+        beam = Beam(self.general_params, 1000, 1e9, sort_period=3)
+        # Spacing larger than the sorting buckets
+        beam.dt = numpy.random.permutation(beam.n_macroparticles) * 1e-9
+        beam.dE = 2 * beam.dt + 1
+        beam.id[::2] = 0
+        dt = beam.dt
+        pairs = set(zip(beam.dt, beam.dE, beam.id))
+
+        beam.track()
+        beam.track()
+        self.assertFalse(numpy.all(numpy.diff(beam.dt) >= 0),
+                         msg='Beam: particles sorted before sort_period')
+        beam.track()
+        self.assertTrue(numpy.all(numpy.diff(beam.dt) >= 0),
+                        msg='Beam: particles not sorted after sort_period')
+        self.assertIs(beam.dt, dt, msg='Beam: sorting is not in place')
+        self.assertEqual(set(zip(beam.dt, beam.dE, beam.id)), pairs,
+                         msg='Beam: dt, dE and id not sorted together')
+
+    def test_eliminate_lost_particles(self):
+
+        for precision in ['double', 'single']:
+            beam = Beam(self.general_params, 1000, 1e9, precision=precision)
+            beam.dt = numpy.random.randn(beam.n_macroparticles)
+            beam.dE = numpy.random.randn(beam.n_macroparticles)
+            lost = numpy.random.rand(beam.n_macroparticles) < 0.3
+            lost[0] = True
+            beam.id[lost] = 0
+            dt = beam.dt[~lost].copy()
+            dE = beam.dE[~lost].copy()
+            ids = beam.id[~lost].copy()
+            buffer = beam.dt
+
+            beam.eliminate_lost_particles()
+
+            numpy.testing.assert_array_equal(beam.dt, dt)
+            numpy.testing.assert_array_equal(beam.dE, dE)
+            numpy.testing.assert_array_equal(beam.id, ids)
+            self.assertTrue(numpy.shares_memory(beam.dt, buffer),
+                            msg='Beam: elimination is not in place')
+            self.assertEqual(beam.n_macroparticles, len(dt))
+            self.assertEqual(beam.n_macroparticles_eliminated,
+                             numpy.count_nonzero(lost))
+            self.assertEqual(beam.n_macroparticles_lost,
+                             numpy.count_nonzero(lost))
+            self.assertEqual(beam.n_macroparticles_alive, len(dt))
+            self.assertAlmostEqual(beam.ratio * beam.n_macroparticles,
+                                   beam.intensity)
+
+        beam.id[:] = 0
+        with self.assertRaises(RuntimeError):
+            beam.eliminate_lost_particles()
+
+    def test_compaction_threshold(self):
+
+        beam = Beam(self.general_params, 1000, 1e9, compaction_threshold=0.1)
+        beam.id[:50] = 0
+        beam.track()
+        self.assertEqual(beam.n_macroparticles, 1000,
+                         msg='Beam: particles eliminated below threshold')
+        beam.id[50:150] = 0
+        beam.track()
+        self.assertEqual(beam.n_macroparticles, 850,
+                         msg='Beam: particles not eliminated above threshold')
+        self.assertEqual(beam.n_macroparticles_lost, 150)
+
+        with self.assertRaises(RuntimeError):
+            Beam(self.general_params, 1000, 1e9, compaction_threshold=1.5)
+
+    def test_eliminated_particles_not_tracked(self):
+
+        beam = Beam(self.general_params, 1000, 1e9)
+        beam.dt = 1e-9 * numpy.random.rand(beam.n_macroparticles)
+        beam.dE = 1e6 * numpy.random.randn(beam.n_macroparticles)
+        beam.id[::2] = 0
+        reference = Beam(self.general_params, 500, 1e9)
+        reference.dt = beam.dt[1::2].copy()
+        reference.dE = beam.dE[1::2].copy()
+
+        beam.eliminate_lost_particles()
+        tracker = RingAndRFTracker(self.rf_params, beam)
+        tracker_reference = RingAndRFTracker(self.rf_params, reference)
+        for i in range(10):
+            tracker.track()
+            tracker_reference.track()
+
+        numpy.testing.assert_array_equal(beam.dt, reference.dt)
+        numpy.testing.assert_array_equal(beam.dE, reference.dE)
+
+    def test_losses_fused(self):
+
+        for precision in ['double', 'single']:
+            beam = Beam(self.general_params, 10000, 1e9, precision=precision)
+            beam.dt = 1e-9 + 1.5e-9*numpy.random.randn(beam.n_macroparticles)
+            beam.dE = 3e8*numpy.random.randn(beam.n_macroparticles)
+            beam.id[::7] = 0
+            lost_before = beam.id == 0
+
+            dt = beam.dt.astype(float)
+            dE = beam.dE.astype(float)
+            longitudinal = (dt < 0.) | (dt > 2.5e-9)
+            energy = (dE < -4e8) | (dE > 5e8)
+            below = dE < -2e8
+            outside = ~is_in_separatrix(self.general_params, self.rf_params,
+                                        beam, beam.dt, beam.dE)
+            criteria = [longitudinal, energy, below, outside]
+
+            mask = numpy.zeros(beam.n_macroparticles, dtype=numpy.uint8)
+            counts = beam.losses(longitudinal_cut=(0., 2.5e-9),
+                                 energy_cut=(-4e8, 5e8), below_energy=-2e8,
+                                 separatrix=(self.general_params,
+                                             self.rf_params),
+                                 mask=mask)
+
+            lost = longitudinal | energy | below | outside
+            numpy.testing.assert_array_equal(beam.id == 0, lost | lost_before)
+            new = lost & ~lost_before
+            self.assertEqual(counts[0], numpy.count_nonzero(new))
+            for i, criterion in enumerate(criteria):
+                self.assertEqual(counts[i + 1],
+                                 numpy.count_nonzero(criterion & new))
+                numpy.testing.assert_array_equal(
+                    (mask & (1 << i)) != 0, criterion & new)
+
+    def test_beam_losses_per_turn(self):
+
+        beam = Beam(self.general_params, 1000, 1e9)
+        beam.dE = numpy.linspace(-1e8, 1e8, beam.n_macroparticles)
+        beam_losses = BeamLosses(beam, 3, energy_cut=(-5e7, 5e7),
+                                 below_energy=-9e7)
+        beam_losses.track()
+        beam.dE += 3e7
+        beam_losses.track()
+
+        lost_first = numpy.count_nonzero(
+            (beam.dE - 3e7 < -5e7) | (beam.dE - 3e7 > 5e7))
+        self.assertEqual(beam_losses.lost_per_turn[0, 0], lost_first)
+        self.assertEqual(beam_losses.lost_per_turn[0, 3],
+                         numpy.count_nonzero(beam.dE - 3e7 < -9e7))
+        self.assertEqual(beam_losses.total_losses()['total'],
+                         beam.n_macroparticles_lost)
+        self.assertEqual(beam_losses.counter, 2)
+
+        with self.assertRaises(RuntimeError):
+            BeamLosses(beam, 3)
+
     def test_losses_separatrix(self):
         try:
                 
@@ -155,6 +356,14 @@ class testBeamClass(unittest.TestCase):
         except TypeError as te:
             self.skipTest("Skipped because of known bug in deepcopy. Exception message %s" % str(te))
 
+    def test_losses_separatrix_several_harmonics(self):
+        rf_params = RFStation(self.general_params, [4620, 9240],
+                              [7e6, 7e5], [0., 0.], n_rf=2)
+        beam = Beam(self.general_params, 100, 1e9)
+        beam.dt[:] = rf_params.t_rf[0, 0] / 2
+        with self.assertWarnsRegex(UserWarning, 'separatrix_parameters'):
+            beam.losses_separatrix(self.general_params, rf_params)
+
     def test_losses_longitudinal_cut(self):
 
         try:
@@ -0,0 +1,132 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for impedances.impedance_cache
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances import impedance_cache
+from blond.impedances.impedance import InducedVoltageFreq, \
+    InducedVoltageTime
+from blond.impedances.impedance_sources import ResistiveWall, Resonators
+
+
+class UserResonators(Resonators):
+    pass
+
+
+class TestImpedanceCache(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    # Run after every test
+    def tearDown(self):
+        impedance_cache.disable_cache()
+        shutil.rmtree(self.directory)
+
+    def test_key(self):
+        frequency = np.linspace(0, 1e9, 1001)
+        resonators = Resonators([1e6, 2e6], [1e9, 2e9], [10, 20])
+        key = impedance_cache.cache_key('impedance', frequency, [resonators])
+
+        self.assertEqual(key, impedance_cache.cache_key(
+            'impedance', frequency.copy(),
+            [Resonators([1e6, 2e6], [1e9, 2e9], [10, 20])]))
+        resonators.Q[1] = 21
+        self.assertNotEqual(key, impedance_cache.cache_key(
+            'impedance', frequency, [resonators]))
+        resonators.Q[1] = 20
+        self.assertNotEqual(key, impedance_cache.cache_key(
+            'impedance', frequency[:-1], [resonators]))
+        self.assertNotEqual(key, impedance_cache.cache_key(
+            'wake', frequency, [resonators]))
+        # Sources without parameters of their own class are not cached
+        self.assertIsNone(impedance_cache.cache_key(
+            'impedance', frequency,
+            [resonators, UserResonators(1e6, 1e9, 10)]))
+
+    def test_lru(self):
+        table = np.arange(1000.)
+        cache = impedance_cache.ImpedanceCache(
+            memory_size=2.5 * table.nbytes, directory=self.directory,
+            disk_size=2.5 * table.nbytes)
+        cache.put('a', table)
+        cache.put('b', 2 * table)
+        os.utime(os.path.join(self.directory, 'a.npy'), (0, 0))
+        os.utime(os.path.join(self.directory, 'b.npy'), (1, 1))
+        # 'a' becomes the most recently used
+        np.testing.assert_array_equal(cache.get('a'), table)
+        cache.put('c', 3 * table)
+
+        self.assertEqual(list(cache._tables), ['a', 'c'])
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['a.npy', 'c.npy'])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # The tables on disk are found by another cache
+        cache = impedance_cache.ImpedanceCache(directory=self.directory)
+        np.testing.assert_array_equal(cache.get('c'), 3 * table)
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_induced_voltage(self):
+        ring = Ring(2 * np.pi * 1100.009, 1 / 18.**2, 25.92e9, Proton(), 10)
+        rf = RFStation(ring, 4620, 4.5e6, 0.)
+        beam = Beam(ring, 10000, 1e11)
+        bigaussian(ring, rf, beam, 1e-9, seed=1234, reinsertion=False)
+        profile = Profile(beam, CutOptions(
+            cut_left=0, cut_right=rf.t_rf[0, 0], n_slices=100))
+        profile.track()
+        resonators = Resonators([5e5, 1e6], [200.2e6, 1e9], [100, 3])
+        resistive_wall = ResistiveWall(0.05, 1000, 1e-8)
+
+        reference_freq = InducedVoltageFreq(
+            beam, profile, [resonators, resistive_wall],
+            frequency_resolution=5e5)
+        reference_time = InducedVoltageTime(beam, profile, [resonators])
+
+        cache = impedance_cache.set_cache(directory=self.directory)
+        induced_voltages = [
+            InducedVoltageFreq(beam, profile, [resonators, resistive_wall],
+                               frequency_resolution=5e5),
+            InducedVoltageTime(beam, profile, [resonators])]
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        for induced_voltage in induced_voltages:
+            induced_voltage.process()
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        np.testing.assert_array_equal(induced_voltages[0].total_impedance,
+                                      reference_freq.total_impedance)
+        np.testing.assert_array_equal(induced_voltages[1].total_wake,
+                                      reference_time.total_wake)
+
+        # New parameters are calculated again
+        resonators.R_S[0] = 6e5
+        induced_voltages[1].process()
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        self.assertFalse(np.array_equal(induced_voltages[1].total_wake,
+                                        reference_time.total_wake))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
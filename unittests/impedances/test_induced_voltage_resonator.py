@@ -0,0 +1,87 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for impedances.impedance.InducedVoltageResonator
+"""
+
+import unittest
+import numpy as np
+from scipy.constants import e
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltageResonator
+from blond.impedances.impedance_sources import Resonators
+
+
+class TestInducedVoltageResonator(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        ring = Ring(2 * np.pi * 1100.009, 1 / 18.**2, 25.92e9, Proton(), 10)
+        rf = RFStation(ring, 4620, 4.5e6, 0.)
+        self.beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, rf, self.beam, 1e-9, seed=1234, reinsertion=False)
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=rf.t_rf[0, 0], n_slices=200))
+        self.profile.track()
+        self.resonators = Resonators([5e5, 1e6], [200.2e6, 1e9], [100, 3])
+
+    def reference(self, induced_voltage):
+        # Sum over all the pairs of times and slices
+        kappa = np.diff(self.profile.n_macroparticles) \
+            / np.diff(self.profile.bin_centers) \
+            / (self.beam.n_macroparticles * self.profile.bin_size)
+        deltaT = induced_voltage.tArray[:, np.newaxis] \
+            - self.profile.bin_centers[np.newaxis, :]
+        voltage = 0
+        for r in range(induced_voltage.n_resonators):
+            Q, omega_r = induced_voltage.Q[r], induced_voltage.omega_r[r]
+            Q_tilde = Q * np.sqrt(1. - 1. / (4. * Q**2))
+            tmp_sum = ((2 * np.cos(omega_r * Q_tilde / Q * deltaT)
+                        + np.sin(omega_r * Q_tilde / Q * deltaT) / Q_tilde)
+                       * np.exp(-omega_r / (2 * Q) * deltaT)
+                       * induced_voltage.Heaviside(deltaT)
+                       - np.sign(deltaT))
+            voltage = voltage + induced_voltage.R[r] / (2 * omega_r * Q) \
+                * np.sum(kappa * np.diff(tmp_sum), axis=1)
+        return -voltage * self.beam.Particle.charge * e * self.beam.intensity
+
+    def test_line_density_times(self):
+        induced_voltage = InducedVoltageResonator(self.beam, self.profile,
+                                                  self.resonators)
+        induced_voltage.induced_voltage_1turn()
+        reference = self.reference(induced_voltage)
+        np.testing.assert_allclose(induced_voltage.induced_voltage,
+                                   reference, rtol=0,
+                                   atol=1e-12 * np.max(np.abs(reference)))
+
+    def test_time_array(self):
+        np.random.seed(0)
+        # Unsorted times, inside and outside of the profile, some of them
+        # equal to bin centres
+        time_array = np.random.permutation(np.concatenate((
+            np.linspace(-1e-9, 7e-9, 333), self.profile.bin_centers[::3])))
+        induced_voltage = InducedVoltageResonator(self.beam, self.profile,
+                                                  self.resonators,
+                                                  timeArray=time_array)
+        induced_voltage.induced_voltage_1turn()
+        reference = self.reference(induced_voltage)
+        np.testing.assert_allclose(induced_voltage.induced_voltage,
+                                   reference, rtol=0,
+                                   atol=1e-12 * np.max(np.abs(reference)))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
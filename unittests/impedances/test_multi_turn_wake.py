@@ -0,0 +1,99 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for the multi-turn wake of impedances.impedance
+"""
+
+import unittest
+import numpy as np
+from scipy.constants import e
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltageFreq, \
+    InducedVoltageTime
+from blond.impedances.impedance_sources import Resonators
+
+
+class TestMultiTurnWake(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        # Small ring, so that the wake lasts several turns
+        ring = Ring(60., 1 / 4.**2, 25.92e9, Proton(), 10)
+        self.rf = RFStation(ring, 40, 1e5, 0.)
+        self.beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, self.rf, self.beam, 0.5e-9, seed=1234,
+                   reinsertion=False)
+        # 4000 bins per revolution period
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=self.rf.t_rf[0, 0], n_slices=100))
+        self.profile.track()
+        self.resonators = Resonators(1e6, 250e6, 50)
+        self.wake_length = 600e-9
+
+    def test_time_domain_wake(self):
+        induced_voltage = InducedVoltageTime(
+            self.beam, self.profile, [self.resonators],
+            wake_length=self.wake_length, multi_turn_wake=True,
+            RFParams=self.rf, mtw_mode='freq_resident')
+
+        # Linear convolution of the line density with the wake of one turn,
+        # shifted by a revolution period (4000 bins) per turn
+        single_turn = - (self.beam.Particle.charge * e * self.beam.ratio *
+                         np.convolve(induced_voltage.total_wake,
+                                     self.profile.n_macroparticles))
+        n_induced_voltage = induced_voltage.n_induced_voltage
+        reference = np.zeros(n_induced_voltage)
+        for turn in range(6):
+            shift = 4000 * turn
+            if shift < len(single_turn):
+                end = min(len(single_turn) - shift, n_induced_voltage)
+                reference[:end] += single_turn[shift:shift + end]
+            induced_voltage.induced_voltage_generation()
+            np.testing.assert_allclose(
+                induced_voltage.induced_voltage, reference, rtol=0,
+                atol=1e-9 * np.max(np.abs(reference)))
+        # Only the turns within the wake length are kept
+        self.assertEqual(np.count_nonzero(
+            np.isfinite(induced_voltage.mtw_ages)), 4)
+
+    def test_frequency_domain_impedance(self):
+        objects = [
+            InducedVoltageTime(self.beam, self.profile, [self.resonators],
+                               wake_length=self.wake_length,
+                               multi_turn_wake=True, RFParams=self.rf,
+                               mtw_mode='freq_resident'),
+            InducedVoltageFreq(self.beam, self.profile, [self.resonators],
+                               frequency_resolution=1 / self.wake_length,
+                               multi_turn_wake=True, RFParams=self.rf,
+                               mtw_mode='freq_resident'),
+            InducedVoltageFreq(self.beam, self.profile, [self.resonators],
+                               frequency_resolution=1 / self.wake_length,
+                               multi_turn_wake=True, RFParams=self.rf,
+                               mtw_mode='freq')]
+        for turn in range(5):
+            for induced_voltage in objects:
+                induced_voltage.induced_voltage_generation()
+            reference = objects[0].induced_voltage[:self.profile.n_slices]
+            # The wake of the impedance is not truncated at the wake length
+            for induced_voltage in objects[1:]:
+                np.testing.assert_allclose(
+                    induced_voltage.induced_voltage[:self.profile.n_slices],
+                    reference, rtol=0,
+                    atol=2e-3 * np.max(np.abs(reference)))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
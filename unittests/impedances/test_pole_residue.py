@@ -0,0 +1,130 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for impedances.impedance_sources.PoleResidue and
+impedances.impedance.InducedVoltagePoleResidue
+"""
+
+import unittest
+import numpy as np
+from scipy.constants import e
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltagePoleResidue, \
+    InducedVoltageTime
+from blond.impedances.impedance_sources import InputTable, PoleResidue, \
+    Resonators
+
+
+class TestPoleResidue(unittest.TestCase):
+
+    def test_resonators(self):
+        resonators = Resonators([1e6, 5e5, 2e4], [1e9, 1.3e9, 3e8],
+                                [1e4, 500, 0.3])
+        poles = PoleResidue.from_resonators(resonators)
+        self.assertEqual(poles.n_poles, 4)
+
+        frequency = np.linspace(0, 2e9, 20001)
+        resonators.imped_calc(frequency)
+        poles.imped_calc(frequency)
+        np.testing.assert_allclose(poles.impedance[1:],
+                                   resonators.impedance[1:], rtol=1e-9)
+
+        underdamped = Resonators([1e6, 5e5], [1e9, 1.3e9], [1e4, 500])
+        poles = PoleResidue.from_resonators(underdamped)
+        time = np.linspace(-1e-9, 1e-6, 10001)
+        underdamped.wake_calc(time)
+        poles.wake_calc(time)
+        np.testing.assert_allclose(poles.wake, underdamped.wake, rtol=0,
+                                   atol=1e-9 * np.max(np.abs(poles.wake)))
+
+        with self.assertRaises(RuntimeError):
+            PoleResidue(1e9j, 1.)
+
+    def test_fit(self):
+        resonators = Resonators([1e6, 5e5, 3e5], [1e9, 1.3e9, 0.7e9],
+                                [1e4, 500, 50])
+        frequency = np.linspace(1e5, 2e9, 200000)
+        resonators.imped_calc(frequency)
+        table = InputTable(frequency, resonators.impedance.real,
+                           resonators.impedance.imag)
+
+        fit = PoleResidue.from_table(table, 3)
+
+        reference = PoleResidue.from_resonators(resonators)
+        np.testing.assert_allclose(np.sort_complex(fit.poles),
+                                   np.sort_complex(reference.poles),
+                                   rtol=1e-8)
+        fit.imped_calc(frequency)
+        np.testing.assert_allclose(fit.impedance[1:], resonators.impedance[1:],
+                                   rtol=0, atol=1e-8 * resonators.R_S[0])
+
+
+class TestInducedVoltagePoleResidue(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        # Small ring, 4000 bins per revolution period
+        ring = Ring(60., 1 / 4.**2, 25.92e9, Proton(), 10)
+        self.rf = RFStation(ring, 40, 1e5, 0.)
+        self.beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, self.rf, self.beam, 0.5e-9, seed=1234,
+                   reinsertion=False)
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=self.rf.t_rf[0, 0], n_slices=100))
+        self.profile.track()
+        # Long-memory mode, decaying over about 60 turns, and a broad one
+        self.resonators = Resonators([1e8, 1e3], [1.01e9, 250e6],
+                                     [1e4, 5])
+
+    def test_single_turn(self):
+        induced_voltage = InducedVoltagePoleResidue(
+            self.beam, self.profile, [self.resonators])
+        reference = InducedVoltageTime(self.beam, self.profile,
+                                       [self.resonators])
+        for turn in range(2):
+            induced_voltage.induced_voltage_generation()
+            reference.induced_voltage_generation()
+            np.testing.assert_allclose(
+                induced_voltage.induced_voltage, reference.induced_voltage,
+                rtol=0, atol=1e-10 * np.max(np.abs(reference.induced_voltage)))
+
+    def test_multi_turn(self):
+        poles = PoleResidue.from_resonators(self.resonators)
+        induced_voltage = InducedVoltagePoleResidue(
+            self.beam, self.profile, [poles], multi_turn_wake=True,
+            RFParams=self.rf)
+
+        # Linear convolution of the line density with the wake over all the
+        # turns, shifted by a revolution period (4000 bins) per turn
+        n_turns = 8
+        poles.wake_calc(np.arange(4000 * n_turns) * self.profile.bin_size)
+        single_turn = - (self.beam.Particle.charge * e * self.beam.ratio *
+                         np.convolve(poles.wake,
+                                     self.profile.n_macroparticles))
+        reference = np.zeros(self.profile.n_slices)
+        for turn in range(n_turns):
+            reference += single_turn[4000 * turn:4000 * turn + 100]
+            induced_voltage.induced_voltage_generation()
+            np.testing.assert_allclose(
+                induced_voltage.induced_voltage, reference, rtol=0,
+                atol=1e-9 * np.max(np.abs(reference)))
+        # The wake of the previous turns matters
+        self.assertGreater(np.max(np.abs(reference - single_turn[:100])),
+                           0.05 * np.max(np.abs(reference)))
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,135 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for impedances.impedance.TotalInducedVoltage
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltageFreq, \
+    InducedVoltageTime, InductiveImpedance, TotalInducedVoltage
+from blond.impedances.impedance_sources import Resonators
+
+
+class TestTotalInducedVoltage(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        ring = Ring(2 * np.pi * 1100.009, 1 / 18.**2, 25.92e9, Proton(), 10)
+        self.rf = RFStation(ring, 4620, 4.5e6, 0.)
+        self.beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, self.rf, self.beam, 1e-9, seed=1234,
+                   reinsertion=False)
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=self.rf.t_rf[0, 0], n_slices=100))
+        self.profile.track()
+
+    def sources(self):
+        beam, profile = self.beam, self.profile
+        return [
+            InducedVoltageFreq(beam, profile,
+                               [Resonators(5e5, 200.2e6, 100)],
+                               frequency_resolution=2e6),
+            InducedVoltageFreq(beam, profile,
+                               [Resonators(1e5, 629e6, 500)],
+                               frequency_resolution=2e6),
+            InducedVoltageTime(beam, profile,
+                               [Resonators(1e6, 800e6, 10)]),
+            InducedVoltageTime(beam, profile,
+                               [Resonators(2e6, 1.2e9, 20)]),
+            InducedVoltageFreq(beam, profile,
+                               [Resonators(3e5, 400e6, 50)],
+                               frequency_resolution=1e6),
+            InductiveImpedance(beam, profile, [100.], self.rf),
+            InducedVoltageFreq(beam, profile,
+                               [Resonators(5e5, 200.2e6, 100)],
+                               frequency_resolution=2e6,
+                               multi_turn_wake=True, RFParams=self.rf)]
+
+    def reference(self, sources):
+        induced_voltage = 0
+        for induced_voltage_object in sources:
+            induced_voltage_object.induced_voltage_generation()
+            induced_voltage = induced_voltage + \
+                induced_voltage_object.induced_voltage[:self.profile.n_slices]
+        return induced_voltage
+
+    def test_groups(self):
+        sources = self.sources()
+        total_induced_voltage = TotalInducedVoltage(self.beam, self.profile,
+                                                    sources)
+        groups = [group[3] for group in total_induced_voltage.fft_groups]
+        # The two InducedVoltageFreq of 2 MHz resolution and the two
+        # InducedVoltageTime share their FFTs
+        self.assertEqual(len(groups), 2)
+        self.assertIn(sources[:2], groups)
+        self.assertIn(sources[2:4], groups)
+        self.assertEqual(len(total_induced_voltage.ungrouped_list), 3)
+        for induced_voltage_object in sources[4:]:
+            self.assertIn(induced_voltage_object,
+                          total_induced_voltage.ungrouped_list)
+
+    def test_induced_voltage(self):
+        total_induced_voltage = TotalInducedVoltage(self.beam, self.profile,
+                                                    self.sources())
+        reference = self.reference(self.sources())
+        total_induced_voltage.induced_voltage_sum()
+        np.testing.assert_allclose(total_induced_voltage.induced_voltage,
+                                   reference, rtol=0,
+                                   atol=1e-10 * np.max(np.abs(reference)))
+
+        # After a change of the slicing
+        self.profile.cut_options.n_slices = 150
+        self.profile.cut_options.set_cuts()
+        self.profile.set_slices_parameters()
+        self.profile.n_macroparticles = np.zeros(150)
+        self.profile.track()
+        total_induced_voltage.reprocess()
+        reference_sources = self.sources()
+        reference = self.reference(reference_sources)
+        total_induced_voltage.induced_voltage_sum()
+        self.assertEqual(len(total_induced_voltage.induced_voltage), 150)
+        np.testing.assert_allclose(total_induced_voltage.induced_voltage,
+                                   reference, rtol=0,
+                                   atol=1e-10 * np.max(np.abs(reference)))
+
+    def test_object_processed(self):
+        sources = self.sources()
+        total_induced_voltage = TotalInducedVoltage(self.beam, self.profile,
+                                                    sources)
+        total_induced_voltage.induced_voltage_sum()
+
+        # Processed directly, with another resolution (FFT size)
+        sources[1].impedance_source_list[0].R_S[0] = 2e5
+        sources[1].frequency_resolution_input = 1e6
+        sources[1].process()
+        reference_sources = self.sources()
+        reference_sources[1].impedance_source_list[0].R_S[0] = 2e5
+        reference_sources[1].frequency_resolution_input = 1e6
+        reference_sources[1].process()
+        reference = self.reference(reference_sources)
+
+        total_induced_voltage.induced_voltage_sum()
+        np.testing.assert_allclose(total_induced_voltage.induced_voltage,
+                                   reference, rtol=0,
+                                   atol=1e-10 * np.max(np.abs(reference)))
+        self.assertIn([sources[1], sources[4]],
+                      [group[3] for group in total_induced_voltage.fft_groups])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,84 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for synchrotron_radiation.synchrotron_radiation
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Electron
+from blond.synchrotron_radiation.synchrotron_radiation import \
+    SynchrotronRadiation
+from blond.utils import bmath as bm
+
+
+class TestSynchrotronRadiation(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        self.num_threads = bm.get_num_threads()
+        self.ring = Ring(2 * np.pi * 15915.49, 1 / 377.96447**2, 175e9,
+                         Electron(), 10)
+        self.rf = RFStation(self.ring, 133650, 10e9, np.pi)
+
+    # Run after every test
+    def tearDown(self):
+        bm.set_num_threads(self.num_threads)
+
+    def kick(self, seed, n_kicks=1, precision='double', python=False):
+        beam = Beam(self.ring, 100001, 1.7e11, precision=precision)
+        SR = SynchrotronRadiation(self.ring, self.rf, beam, 11e3,
+                                  n_kicks=n_kicks, seed=seed, python=python)
+        beam.dE[:] = 0.
+        SR.track()
+        return SR, beam.dE.copy()
+
+    def test_quantum_excitation(self):
+        for python in [False, True]:
+            SR, dE = self.kick(1, python=python)
+            # Energy loss and quantum excitation of one kick from dE = 0
+            self.assertAlmostEqual(np.mean(dE) / SR.U0, -1., delta=0.01)
+            self.assertAlmostEqual(np.std(dE) / (
+                2 * SR.sigma_dE / np.sqrt(SR.tau_z) *
+                self.ring.energy[0, 0]), 1., delta=0.01)
+
+    def test_random_seed(self):
+        for python in [False, True]:
+            SR, dE = self.kick(None, python=python)
+            self.assertTrue(0 <= SR.seed < 2**63)
+            self.assertAlmostEqual(np.mean(dE) / SR.U0, -1., delta=0.01)
+
+    def test_reproducible(self):
+        bm.set_num_threads(1)
+        SR, dE = self.kick(3, n_kicks=2)
+        self.assertEqual(SR.random_counter, 2)
+        bm.set_num_threads(3)
+        np.testing.assert_array_equal(self.kick(3, n_kicks=2)[1], dE)
+        self.assertFalse(np.array_equal(self.kick(4, n_kicks=2)[1], dE))
+
+        # The next turn uses new random numbers
+        beam = SR.beam
+        beam.dE[:] = 0.
+        SR.track()
+        self.assertEqual(SR.random_counter, 4)
+        self.assertFalse(np.array_equal(beam.dE, dE))
+
+    def test_single_precision(self):
+        SR, dE = self.kick(5, precision='single')
+        np.testing.assert_allclose(dE, self.kick(5)[1], rtol=1e-5,
+                                   atol=1e-6 * SR.U0)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,136 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for trackers.tracker.EnsembleTracker
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, BeamEnsemble, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.trackers.tracker import RingAndRFTracker, EnsembleTracker
+
+
+class TestEnsembleTracker(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        self.n_turns = 20
+        self.ring = Ring(6911.5038, 1./17.95142852**2,
+                         np.linspace(25.92e9, 25.9201e9, self.n_turns + 1),
+                         Proton(), self.n_turns)
+        self.n_ensemble = 4
+        self.n_macroparticles = 3001
+
+    def rf_station(self, i):
+        return RFStation(self.ring, [4620, 4 * 4620],
+                         [(2 + i) * 1e6, 0.1 * (2 + i) * 1e6], [0, np.pi],
+                         n_rf=2)
+
+    def reference(self, i, solver, precision='double', rf=None):
+        rf = self.rf_station(i) if rf is None else rf
+        beam = Beam(self.ring, self.n_macroparticles, 1e11,
+                    precision=precision)
+        bigaussian(self.ring, rf, beam, 1e-9, seed=i)
+        profile = Profile(beam, CutOptions(cut_left=-1e-9, cut_right=6e-9,
+                                           n_slices=64))
+        tracker = RingAndRFTracker(rf, beam, solver=solver, Profile=profile)
+        for turn in range(self.n_turns):
+            tracker.track()
+            profile.track()
+        return beam, profile
+
+    def ensemble(self, rf_list, precision='double'):
+        ensemble = BeamEnsemble(self.ring, self.n_ensemble,
+                                self.n_macroparticles, 1e11,
+                                precision=precision)
+        profiles = []
+        for i, beam in enumerate(ensemble):
+            rf = rf_list[i] if isinstance(rf_list, list) else rf_list
+            bigaussian(self.ring, rf, beam, 1e-9, seed=i)
+            profiles.append(Profile(beam, CutOptions(
+                cut_left=-1e-9, cut_right=6e-9, n_slices=64)))
+        return ensemble, profiles
+
+    def test_per_member_rf(self):
+        for solver in ['simple', 'exact']:
+            for precision in ['double', 'single']:
+                rf_list = [self.rf_station(i) for i in range(self.n_ensemble)]
+                ensemble, profiles = self.ensemble(rf_list, precision)
+                tracker = EnsembleTracker(rf_list, ensemble, solver=solver,
+                                          Profile=profiles)
+                for turn in range(self.n_turns):
+                    tracker.track()
+
+                for i in range(self.n_ensemble):
+                    beam, profile = self.reference(i, solver, precision)
+                    np.testing.assert_array_equal(ensemble.dt[i], beam.dt)
+                    np.testing.assert_array_equal(ensemble.dE[i], beam.dE)
+                    np.testing.assert_array_equal(
+                        profiles[i].n_macroparticles,
+                        profile.n_macroparticles)
+                    self.assertEqual(ensemble[i].energy, beam.energy)
+                    self.assertEqual(rf_list[i].counter[0], self.n_turns)
+
+    def test_plain_profile_track(self):
+        rf = self.rf_station(0)
+        ensemble, profiles = self.ensemble(rf)
+        tracker = EnsembleTracker(rf, ensemble, Profile=profiles)
+        tracker.track()
+        histogram = profiles[0].n_macroparticles.copy()
+        # Sliced by the tracker
+        profiles[0].track()
+        np.testing.assert_array_equal(profiles[0].n_macroparticles,
+                                      histogram)
+        self.assertIn(profiles[0]._slice, profiles[0].operations)
+
+        # Particles moved by other code are sliced again
+        ensemble[0].dt += 1e-10
+        profiles[0].track()
+        reference = Profile(ensemble[0], CutOptions(
+            cut_left=-1e-9, cut_right=6e-9, n_slices=64))
+        reference.track()
+        np.testing.assert_array_equal(profiles[0].n_macroparticles,
+                                      reference.n_macroparticles)
+
+    def test_shared_rf(self):
+        rf = self.rf_station(0)
+        ensemble, profiles = self.ensemble(rf)
+        tracker = EnsembleTracker(rf, ensemble)
+        for turn in range(self.n_turns):
+            tracker.track()
+        self.assertEqual(rf.counter[0], self.n_turns)
+
+        for i in range(self.n_ensemble):
+            beam = self.reference(i, 'simple', rf=self.rf_station(0))[0]
+            np.testing.assert_array_equal(ensemble[i].dt, beam.dt)
+            np.testing.assert_array_equal(ensemble[i].dE, beam.dE)
+
+    def test_members(self):
+        ensemble = BeamEnsemble(self.ring, 3, 100, 1e11)
+        # Replacing the coordinates of a member fills the ensemble block
+        ensemble[1].dE = np.arange(100.)
+        np.testing.assert_array_equal(ensemble.dE[1], np.arange(100.))
+        self.assertTrue(np.shares_memory(ensemble[2].dt, ensemble.dt))
+        ensemble[0].id[:10] = 0
+        self.assertEqual(ensemble[0].n_macroparticles_alive, 90)
+        with self.assertRaises(RuntimeError):
+            ensemble[0].eliminate_lost_particles()
+        with self.assertRaises(RuntimeError):
+            EnsembleTracker([self.rf_station(0)], ensemble)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
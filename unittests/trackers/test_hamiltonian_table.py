@@ -0,0 +1,138 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for trackers.utilities.HamiltonianTable
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.trackers.tracker import RingAndRFTracker, FullRingAndRF
+from blond.trackers.utilities import is_in_separatrix, HamiltonianTable
+
+
+class TestHamiltonianTable(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        # SPS-like machine above transition
+        self.ring = Ring(6911.5038, 1./17.95142852**2, 450e9, Proton(), 10)
+
+    def make(self, harmonics, voltages, phases, precision='double',
+             sigma_dE=5e8):
+        rf = RFStation(self.ring, harmonics, voltages, phases,
+                       n_rf=len(harmonics))
+        beam = Beam(self.ring, 100000, 1e9, precision=precision)
+        np.random.seed(1)
+        beam.dt = rf.t_rf[0, 0] * np.random.rand(beam.n_macroparticles)
+        beam.dE = sigma_dE * np.random.randn(beam.n_macroparticles)
+        full_ring = FullRingAndRF([RingAndRFTracker(rf, beam)])
+        return rf, beam, HamiltonianTable(full_ring)
+
+    def test_single_harmonic(self):
+        rf, beam, table = self.make([4620], [7e6], [0.])
+
+        reference = is_in_separatrix(self.ring, rf, beam, beam.dt, beam.dE)
+        is_in = table.is_in_separatrix(beam.dt, beam.dE)
+        self.assertLess(np.count_nonzero(is_in != reference),
+                        1e-4 * beam.n_macroparticles)
+
+    def test_below_transition(self):
+        # PSB-like machine below transition
+        self.ring = Ring(157.08, 1./4.4**2, 571e6, Proton(), 10)
+        rf, beam, table = self.make([1], [8e3], [np.pi], sigma_dE=1e6)
+        self.assertLess(rf.eta_0[0], 0)
+
+        # Stationary bucket centred on t_rf/2, of height
+        # sqrt(2 q V beta^2 E / (pi h |eta_0|))
+        height = np.sqrt(2 * 8e3 * beam.beta**2 * beam.energy /
+                         (np.pi * abs(rf.eta_0[0])))
+        reference = (np.abs(beam.dE) <
+                     height * np.abs(np.sin(np.pi * beam.dt / rf.t_rf[0, 0])))
+        is_in = table.is_in_separatrix(beam.dt, beam.dE)
+        self.assertGreater(np.count_nonzero(reference),
+                           0.1 * beam.n_macroparticles)
+        self.assertLess(np.count_nonzero(is_in != reference),
+                        1e-4 * beam.n_macroparticles)
+
+    def test_acceleration(self):
+        self.ring = Ring(6911.5038, 1./17.95142852**2,
+                         np.linspace(26e9, 26.03e9, 11), Proton(), 10)
+        rf, beam, table = self.make([4620], [7e6], [0.], sigma_dE=5e7)
+        fixed = HamiltonianTable(table.full_ring, turn=0)
+        tracker = table.full_ring.RingAndRFSection_list[0]
+        for i in range(5):
+            tracker.track()
+
+        # The table follows the turn counter
+        is_in = table.is_in_separatrix(beam.dt, beam.dE)
+        self.assertEqual(table.turn, 5)
+        np.testing.assert_array_equal(
+            is_in, HamiltonianTable(table.full_ring, turn=5)
+            .is_in_separatrix(beam.dt, beam.dE))
+
+        fixed.is_in_separatrix(beam.dt, beam.dE)
+        self.assertEqual(fixed.turn, 0)
+        self.assertNotEqual(fixed.eom_factor_dE, table.eom_factor_dE)
+
+    def test_several_sections(self):
+        ring = Ring([3455.7519, 3455.7519], [[1./17.95142852**2]] * 2,
+                    [[450e9], [450e9]], Proton(), 10, n_sections=2)
+        beam = Beam(ring, 1000, 1e9)
+        trackers = [RingAndRFTracker(RFStation(ring, [4620], [3.5e6], [0.],
+                                               section_index=i + 1), beam)
+                    for i in range(2)]
+        with self.assertRaises(RuntimeError):
+            HamiltonianTable(FullRingAndRF(trackers))
+
+    def test_double_harmonic(self):
+        # Bunch lengthening mode
+        rf, beam, table = self.make([4620, 4 * 4620], [7e6, 0.7e6],
+                                    [0., np.pi])
+
+        potential = np.interp(beam.dt,
+                              table.full_ring.potential_well_coordinates,
+                              table.potential_well)
+        np.testing.assert_allclose(table.hamiltonian(beam.dt, beam.dE),
+                                   potential + table.eom_factor_dE *
+                                   beam.dE**2, rtol=1e-9)
+
+        is_in = table.is_in_separatrix(beam.dt, beam.dE)
+        H = table.hamiltonian(beam.dt, beam.dE)
+        np.testing.assert_array_equal(
+            is_in, (H < table.H_sep) & (beam.dt >= table.t_left) &
+            (beam.dt <= table.t_right))
+        # Bucket centre inside, large energy offsets outside
+        centre = np.array([0.5 * (table.t_left + table.t_right)])
+        self.assertTrue(table.is_in_separatrix(centre, np.zeros(1))[0])
+        self.assertFalse(table.is_in_separatrix(centre, np.array([5e9]))[0])
+        self.assertEqual(table.hamiltonian(np.array([-1.]),
+                                           np.zeros(1))[0], np.inf)
+
+    def test_losses(self):
+        for precision in ['double', 'single']:
+            rf, beam, table = self.make([4620, 2 * 4620], [7e6, 1e6],
+                                        [0., np.pi], precision=precision)
+            beam.id[::5] = 0
+            is_in = table.is_in_separatrix(beam.dt, beam.dE)
+            alive = beam.id != 0
+
+            n_lost = table.losses(beam)
+
+            self.assertEqual(n_lost, np.count_nonzero(alive & ~is_in))
+            np.testing.assert_array_equal(beam.id != 0, alive & is_in)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
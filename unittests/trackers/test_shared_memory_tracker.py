@@ -0,0 +1,146 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for trackers.shared_memory_tracker
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.trackers.tracker import RingAndRFTracker
+from blond.trackers.shared_memory_tracker import SharedMemoryTracker
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import CutOptions, FitOptions, Profile
+from blond.impedances.impedance import InducedVoltageFreq, \
+    TotalInducedVoltage
+from blond.impedances.impedance_sources import Resonators
+
+
+class TestSharedMemoryTracker(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e11          # Intensity
+    N_p = 50001         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_s = 450e9          # Synchronous momentum [eV/c]
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_objects(self):
+        ring = Ring(self.C, self.alpha, self.p_s, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        bigaussian(ring, rf, beam, self.tau_0/4, reinsertion=True, seed=1)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]),
+                          FitOptions(fit_option='rms'))
+        resonator = Resonators(5e6, 1.2e9, 10)
+        induced_voltage = InducedVoltageFreq(beam, profile, [resonator])
+        total_induced_voltage = TotalInducedVoltage(beam, profile,
+                                                    [induced_voltage])
+        tracker = RingAndRFTracker(rf, beam, Profile=profile,
+                                   TotalInducedVoltage=total_induced_voltage,
+                                   interpolation=True)
+        return beam, profile, total_induced_voltage, tracker
+
+    def test_shared_memory_vs_serial(self):
+        beam, profile, total_induced_voltage, tracker = self.make_objects()
+        beam_s, profile_s, total_induced_voltage_s, tracker_s = \
+            self.make_objects()
+        profile.track()
+        profile_s.track()
+
+        shared_tracker = SharedMemoryTracker(tracker_s, profile_s,
+                                             total_induced_voltage_s,
+                                             n_workers=2)
+        try:
+            for i in range(self.N_t // 2):
+                tracker.track()
+                profile.track()
+                total_induced_voltage.track()
+            shared_tracker.track(self.N_t // 2)
+
+            np.testing.assert_array_equal(beam.dt, beam_s.dt)
+            np.testing.assert_array_equal(beam.dE, beam_s.dE)
+            np.testing.assert_array_equal(profile.n_macroparticles,
+                                          profile_s.n_macroparticles)
+            np.testing.assert_array_equal(
+                total_induced_voltage.induced_voltage,
+                total_induced_voltage_s.induced_voltage)
+            self.assertEqual(profile.bunchLength, profile_s.bunchLength)
+            self.assertEqual(tracker.counter[0], tracker_s.counter[0])
+            self.assertEqual(beam.energy, beam_s.energy)
+        finally:
+            shared_tracker.close()
+
+        self.assertEqual(beam_s.dt.shape, (self.N_p,))
+        with self.assertRaises(RuntimeError):
+            shared_tracker.track()
+
+    def test_losses(self):
+        beam, profile, total_induced_voltage, tracker = self.make_objects()
+        beam_s, profile_s, total_induced_voltage_s, tracker_s = \
+            self.make_objects()
+        profile.track()
+        profile_s.track()
+
+        shared_tracker = SharedMemoryTracker(tracker_s, profile_s,
+                                             total_induced_voltage_s,
+                                             n_workers=2)
+        try:
+            self.assertEqual(beam_s.id.shape, (self.N_p,))
+            for i in range(self.N_t // 4):
+                tracker.track()
+                profile.track()
+                total_induced_voltage.track()
+            shared_tracker.track(self.N_t // 4)
+
+            # Losses flagged in the shared ids of the main process
+            dt_cut = (np.mean(beam.dt) - 2 * np.std(beam.dt),
+                      np.mean(beam.dt) + 2 * np.std(beam.dt))
+            beam.losses_longitudinal_cut(*dt_cut)
+            beam_s.losses_longitudinal_cut(*dt_cut)
+            self.assertGreater(beam_s.n_macroparticles_lost, 0)
+
+            for i in range(self.N_t // 4):
+                tracker.track()
+                profile.track()
+                total_induced_voltage.track()
+            shared_tracker.track(self.N_t // 4)
+            np.testing.assert_array_equal(beam.id, beam_s.id)
+            np.testing.assert_array_equal(beam.dt, beam_s.dt)
+        finally:
+            shared_tracker.close()
+
+        np.testing.assert_array_equal(beam.id, beam_s.id)
+        self.assertEqual(beam_s.n_macroparticles_lost,
+                         beam.n_macroparticles_lost)
+
+    def test_worker_error(self):
+        beam, profile, total_induced_voltage, tracker = self.make_objects()
+        shared_tracker = SharedMemoryTracker(tracker, profile, n_workers=2)
+        # The RF programs are shorter than the requested turns
+        with self.assertRaises(RuntimeError):
+            shared_tracker.track(self.N_t + 1)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
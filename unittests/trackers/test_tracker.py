@@ -20,7 +20,8 @@ import numpy as np
 from blond.utils import bmath as bm
 from blond.input_parameters.ring import Ring
 from blond.input_parameters.rf_parameters import RFStation
-from blond.trackers.tracker import RingAndRFTracker
+from blond.trackers import tracker as tracker_module
+from blond.trackers.tracker import RingAndRFTracker, FullRingAndRF
 from blond.beam.beam import Beam, Proton
 from blond.beam.distributions import bigaussian
 from blond.beam.profile import CutOptions, FitOptions, Profile
@@ -222,3 +223,458 @@ class TestRfVoltageCalcWCavityFB(unittest.TestCase):
             orig_rf_voltage = orig_rf_volt_comp(self.long_tracker)
         np.testing.assert_almost_equal(
             self.long_tracker.rf_voltage, orig_rf_voltage, decimal=8)
+
+
+class TestDrift(unittest.TestCase):
+    # Machine parameters
+    C = 26658.883        # Machine circumference [m]
+    p_s = 450e9          # Synchronous momentum [eV/c]
+    h = 35640            # Harmonic number
+    V = 6e6              # RF voltage [V]
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    N_p = 10001          # Macro-particles
+
+    def setUp(self):
+        ring = Ring(self.C, self.alpha, self.p_s, Proton(), 10)
+        self.rf = RFStation(ring, [self.h], [self.V], [0])
+        self.beam = Beam(ring, self.N_p, 1e9)
+        np.random.seed(0)
+        self.beam.dt = np.random.uniform(0, 2.5e-9, self.N_p)
+        self.beam.dE = np.random.normal(0, 1e9, self.N_p)
+
+    def test_drift_simple(self):
+        tracker = RingAndRFTracker(self.rf, self.beam, solver='simple')
+        dt = self.beam.dt + self.rf.t_rev[1] * self.rf.eta_0[1] \
+            * self.beam.dE / (self.rf.beta[1]**2 * self.rf.energy[1])
+        tracker.drift(self.beam.dt, self.beam.dE, 1)
+        np.testing.assert_allclose(self.beam.dt, dt, rtol=1e-12)
+
+    def test_drift_exact(self):
+        tracker = RingAndRFTracker(self.rf, self.beam, solver='exact')
+        delta = self.beam.dE / (self.rf.beta[1]**2 * self.rf.energy[1])
+        dt = self.beam.dt + self.rf.t_rev[1] * (
+            1. / (1. - self.rf.eta_0[1] * delta - self.rf.eta_1[1] * delta**2
+                  - self.rf.eta_2[1] * delta**3) - 1.)
+        tracker.drift(self.beam.dt, self.beam.dE, 1)
+        np.testing.assert_allclose(self.beam.dt, dt, rtol=1e-12)
+
+    def test_solver_id(self):
+        self.assertEqual(RingAndRFTracker(self.rf, self.beam).solver_id, 0)
+        self.assertEqual(RingAndRFTracker(self.rf, self.beam,
+                                          solver='exact').solver_id, 1)
+
+
+class TestVoltageTable(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 50000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 460.005e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 2000           # Number of turns of the RF program
+    n_turns = 10         # Number of turns to track
+
+    def make_tracker(self, **kwargs):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h, 2*self.h, 3*self.h, 4*self.h],
+                       [self.V, 0.2*self.V, 0.1*self.V, 0.05*self.V],
+                       [0, np.pi, 0.5, 0.2], n_rf=4)
+        bigaussian(ring, rf, beam, self.tau_0/4, seed=1)
+        tracker = RingAndRFTracker(rf, beam, **kwargs)
+        return beam, tracker
+
+    def run_both(self, interpolation, accuracy):
+        beam, tracker = self.make_tracker()
+        beam_t, tracker_t = self.make_tracker(
+            voltage_table=interpolation, voltage_table_accuracy=accuracy)
+        for i in range(self.n_turns):
+            tracker.track()
+            tracker_t.track()
+
+        self.assertLess(tracker_t.voltage_table_error(), accuracy)
+        max_voltage = np.sum(np.abs(tracker.voltage[:, 0]))
+        np.testing.assert_allclose(beam_t.dE, beam.dE, rtol=0,
+                                   atol=self.n_turns*accuracy*max_voltage)
+
+    def test_voltage_table_linear(self):
+        self.run_both('linear', 1e-6)
+
+    def test_voltage_table_cubic(self):
+        self.run_both('cubic', 1e-8)
+
+    def test_voltage_table_stray_particle(self):
+        beam, tracker = self.make_tracker()
+        beam_t, tracker_t = self.make_tracker(voltage_table='cubic',
+                                              voltage_table_accuracy=1e-8)
+        # Particle many RF periods away, and a lost one even further
+        for b in [beam, beam_t]:
+            b.dt[0] += 1e-5
+            b.dt[1] = 1.
+            b.id[1] = 0
+        tracker.track()
+        tracker_t.track()
+
+        # One period of the RF voltage is tabulated
+        self.assertLess(len(tracker_t.voltage_table_array), 1000)
+        max_voltage = np.sum(np.abs(tracker.voltage[:, 0]))
+        np.testing.assert_allclose(beam_t.dE[2:], beam.dE[2:], rtol=0,
+                                   atol=1e-8*max_voltage)
+        # Away by about 1e-5 / 2.5e-9 periods, the phase error stays small
+        self.assertAlmostEqual(beam_t.dE[0], beam.dE[0],
+                               delta=1e-6*max_voltage)
+
+    def test_voltage_table_zero_voltage(self):
+        beam, tracker = self.make_tracker(voltage_table='linear')
+        tracker.voltage[:, 0] = 0
+        dE = beam.dE.copy()
+        tracker.track()
+        np.testing.assert_array_equal(
+            beam.dE, dE + tracker.acceleration_kick[0])
+
+    def test_voltage_table_wrong_option(self):
+        with self.assertRaises(RuntimeError):
+            self.make_tracker(voltage_table='quadratic')
+
+
+class TestFusedSlicing(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 50000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 460.005e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 2000           # Number of turns to track
+
+    def make_tracker(self, solver, fused_slicing):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h, 2*self.h],
+                       [self.V * np.linspace(1, 1.1, self.N_t+1),
+                        0.1*self.V * np.ones(self.N_t+1)],
+                       [self.dphi * np.ones(self.N_t+1),
+                        np.pi * np.ones(self.N_t+1)], n_rf=2)
+        bigaussian(ring, rf, beam, self.tau_0/4, reinsertion=True, seed=1)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]),
+                          FitOptions(fit_option='gaussian'))
+        tracker = RingAndRFTracker(rf, beam, solver=solver, Profile=profile,
+                                   fused_slicing=fused_slicing)
+        return beam, profile, tracker
+
+    def run_both(self, solver):
+        beam, profile, tracker = self.make_tracker(solver, False)
+        beam_f, profile_f, tracker_f = self.make_tracker(solver, True)
+        for i in range(100):
+            tracker.track()
+            profile.track()
+            tracker_f.track()
+            profile_f.track()
+
+        np.testing.assert_array_equal(beam.dt, beam_f.dt)
+        np.testing.assert_array_equal(beam.dE, beam_f.dE)
+        np.testing.assert_array_equal(profile.n_macroparticles,
+                                      profile_f.n_macroparticles)
+        self.assertEqual(profile.bunchLength, profile_f.bunchLength)
+
+    def test_fused_simple(self):
+        self.run_both('simple')
+
+    def test_fused_exact(self):
+        self.run_both('exact')
+
+    def test_fused_plain_profile_track(self):
+        beam, profile, tracker = self.make_tracker('simple', True)
+        tracker.track()
+        histogram = profile.n_macroparticles.copy()
+        # Sliced by the tracker, only the fit is applied
+        profile.track()
+        np.testing.assert_array_equal(profile.n_macroparticles, histogram)
+        self.assertIn(profile._slice, profile.operations)
+
+        # Particles moved by other code are sliced again
+        beam.dt += 1e-10
+        profile.track()
+        reference = Profile(beam, CutOptions(
+            n_slices=100, cut_left=0, cut_right=tracker.rf_params.t_rf[0, 0]))
+        reference.track()
+        np.testing.assert_array_equal(profile.n_macroparticles,
+                                      reference.n_macroparticles)
+
+    def test_fused_no_profile(self):
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        with self.assertRaises(RuntimeError):
+            RingAndRFTracker(rf, beam, fused_slicing=True)
+
+
+class TestPeriodicity(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 50000         # Macro-particles
+    sigma_dE = 2e6      # Energy spread [eV]
+    # Machine and RF parameters
+    C = 2*np.pi*25      # Machine circumference [m]
+    p_s = 310e6         # Synchronous momentum [eV/c]
+    h = 1               # Harmonic number
+    V = 8e3             # RF voltage [V]
+    dphi = 0            # Phase modulation/offset
+    gamma_t = 4.4       # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_tracker(self, solver):
+        ring = Ring(self.C, self.alpha, self.p_s, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        np.random.seed(1)
+        beam.dt = np.random.uniform(-0.05, 1.05, self.N_p) * ring.t_rev[0]
+        beam.dE = np.random.normal(0, self.sigma_dE, self.N_p)
+        tracker = RingAndRFTracker(rf, beam, solver=solver, periodicity=True)
+        return beam, tracker
+
+    def orig_periodic_track(self, tracker):
+        # Reference implementation of the periodic solver, with index arrays
+        beam = tracker.beam
+        turn = tracker.counter[0]
+        t_rev = tracker.t_rev[turn + 1]
+        right = np.where(beam.dt > t_rev)[0]
+        inside = np.where(beam.dt <= t_rev)[0]
+        beam.dt[right] -= t_rev
+        dt = np.ascontiguousarray(beam.dt[inside])
+        dE = np.ascontiguousarray(beam.dE[inside])
+        tracker.kick(dt, dE, turn)
+        tracker.drift(dt, dE, turn + 1)
+        beam.dt[inside] = dt
+        beam.dE[inside] = dE
+        left = np.where(beam.dt < 0)[0]
+        dt = np.ascontiguousarray(beam.dt[left]) + t_rev
+        dE = np.ascontiguousarray(beam.dE[left])
+        tracker.kick(dt, dE, turn)
+        tracker.drift(dt, dE, turn + 1)
+        beam.dt[left] = dt
+        beam.dE[left] = dE
+        tracker.counter[0] += 1
+
+    def run_both(self, solver):
+        beam, tracker = self.make_tracker(solver)
+        beam_o, tracker_o = self.make_tracker(solver)
+        for i in range(self.N_t):
+            tracker.track()
+            self.orig_periodic_track(tracker_o)
+
+        np.testing.assert_array_equal(beam.dt, beam_o.dt)
+        np.testing.assert_array_equal(beam.dE, beam_o.dE)
+
+    def test_periodicity_simple(self):
+        self.run_both('simple')
+
+    def test_periodicity_exact(self):
+        self.run_both('exact')
+
+
+class TestTrackTurns(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 50000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 460.005e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 2000           # Number of turns of the RF program
+    n_turns = 200        # Number of turns to track
+
+    def make_trackers(self, solver='simple'):
+        ring = Ring([0.3*self.C, 0.7*self.C], [[self.alpha], [self.alpha]],
+                    [np.linspace(self.p_i, self.p_f, self.N_t + 1),
+                     np.linspace(self.p_i, self.p_f, self.N_t + 1)],
+                    Proton(), self.N_t, n_sections=2)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf_1 = RFStation(ring, [self.h], [0.3*self.V], [self.dphi],
+                         section_index=1)
+        rf_2 = RFStation(ring, [self.h], [0.7*self.V], [self.dphi],
+                         section_index=2)
+        bigaussian(ring, rf_1, beam, self.tau_0/4, seed=1)
+        trackers = [RingAndRFTracker(rf_1, beam, solver=solver),
+                    RingAndRFTracker(rf_2, beam, solver=solver)]
+        return beam, trackers
+
+    def run_both(self, solver):
+        beam, trackers = self.make_trackers(solver)
+        beam_n, trackers_n = self.make_trackers(solver)
+        full_ring = FullRingAndRF(trackers)
+        full_ring_n = FullRingAndRF(trackers_n)
+
+        for i in range(self.n_turns):
+            full_ring.track()
+        full_ring_n.track_turns(self.n_turns)
+
+        np.testing.assert_array_equal(beam.dt, beam_n.dt)
+        np.testing.assert_array_equal(beam.dE, beam_n.dE)
+        self.assertEqual(trackers[1].counter[0], trackers_n[1].counter[0])
+        self.assertEqual(beam.energy, beam_n.energy)
+
+    def test_track_turns_simple(self):
+        self.run_both('simple')
+
+    def test_track_turns_exact(self):
+        self.run_both('exact')
+
+    def test_fused_sections(self):
+        beam, trackers = self.make_trackers('exact')
+        beam_f, trackers_f = self.make_trackers('exact')
+        full_ring = FullRingAndRF(trackers)
+        full_ring_f = FullRingAndRF(trackers_f, fused_sections=True)
+        for i in range(self.n_turns):
+            full_ring.track()
+            full_ring_f.track()
+
+        np.testing.assert_array_equal(beam.dt, beam_f.dt)
+        np.testing.assert_array_equal(beam.dE, beam_f.dE)
+        self.assertEqual(trackers[0].counter[0], trackers_f[0].counter[0])
+        self.assertEqual(beam.momentum, beam_f.momentum)
+
+    def test_fused_sections_periodicity(self):
+        beam, trackers = self.make_trackers()
+        trackers[1].periodicity = True
+        with self.assertRaises(RuntimeError):
+            FullRingAndRF(trackers, fused_sections=True)
+
+    def test_track_turns_callback(self):
+        beam, trackers = self.make_trackers()
+        turns = []
+        trackers[0].track_turns(
+            50, callback=lambda: turns.append(trackers[0].counter[0]),
+            dt_callback=20)
+        self.assertEqual(turns, [20, 40, 50])
+
+    def test_track_turns_chunks(self):
+        beam, trackers = self.make_trackers()
+        trackers[0].track_turns(45)
+        max_turns_per_call = tracker_module.max_turns_per_call
+        tracker_module.max_turns_per_call = 7
+        try:
+            beam_n, trackers_n = self.make_trackers()
+            trackers_n[0].track_turns(45)
+            beam_c, trackers_c = self.make_trackers()
+            turns = []
+            trackers_c[0].track_turns(
+                45, callback=lambda: turns.append(trackers_c[0].counter[0]),
+                dt_callback=20)
+        finally:
+            tracker_module.max_turns_per_call = max_turns_per_call
+
+        np.testing.assert_array_equal(beam_n.dt, beam.dt)
+        np.testing.assert_array_equal(beam_n.dE, beam.dE)
+        np.testing.assert_array_equal(beam_c.dE, beam.dE)
+        self.assertEqual(trackers_n[0].counter[0], 45)
+        self.assertEqual(turns, [20, 40, 45])
+
+    def test_track_turns_too_many_turns(self):
+        beam, trackers = self.make_trackers()
+        with self.assertRaises(RuntimeError):
+            trackers[0].track_turns(self.N_t + 1)
+
+
+class TestSinglePrecision(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 50000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 460.005e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 2000           # Number of turns of the RF program
+    n_turns = 200        # Number of turns to track
+
+    def make_tracker(self, precision, **kwargs):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b, precision=precision)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        bigaussian(ring, rf, beam, self.tau_0/4, reinsertion=True, seed=1)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]))
+        tracker = RingAndRFTracker(rf, beam, Profile=profile, **kwargs)
+        return beam, profile, tracker
+
+    def test_single_vs_double(self):
+        beam, profile, tracker = self.make_tracker('double')
+        beam_s, profile_s, tracker_s = self.make_tracker('single')
+        for i in range(self.n_turns):
+            tracker.track()
+            tracker_s.track()
+        profile.track()
+        profile_s.track()
+
+        self.assertEqual(beam_s.dt.dtype, np.float32)
+        beam.statistics()
+        beam_s.statistics()
+        self.assertAlmostEqual(beam_s.epsn_rms_l / beam.epsn_rms_l, 1.,
+                               delta=1e-4)
+        np.testing.assert_allclose(profile_s.n_macroparticles,
+                                   profile.n_macroparticles,
+                                   atol=0.002*self.N_p)
+
+    def test_single_interpolation(self):
+        beam, profile, tracker = self.make_tracker('double',
+                                                   interpolation=True)
+        beam_s, profile_s, tracker_s = self.make_tracker('single',
+                                                         interpolation=True)
+        for i in range(self.n_turns):
+            profile.track()
+            tracker.track()
+            profile_s.track()
+            tracker_s.track()
+
+        np.testing.assert_allclose(beam_s.dE, beam.dE, rtol=0,
+                                   atol=1e-4*np.std(beam.dE))
+
+    def test_single_track_turns(self):
+        beam, profile, tracker = self.make_tracker('single')
+        beam_n, profile_n, tracker_n = self.make_tracker('single')
+        for i in range(self.n_turns):
+            tracker.track()
+        tracker_n.track_turns(self.n_turns)
+
+        np.testing.assert_array_equal(beam.dt, beam_n.dt)
+        np.testing.assert_array_equal(beam.dE, beam_n.dE)
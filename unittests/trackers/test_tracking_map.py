@@ -0,0 +1,105 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for trackers.tracking_map
+"""
+
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.trackers.tracker import RingAndRFTracker
+from blond.trackers.tracking_map import TrackingMap
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import CutOptions, Profile
+
+
+class TestTrackingMap(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_s = 450e9          # Synchronous momentum [eV/c]
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 50            # Number of turns to track
+
+    def make_objects(self):
+        ring = Ring(self.C, self.alpha, self.p_s, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        bigaussian(ring, rf, beam, self.tau_0/4, reinsertion=True, seed=1)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]))
+        tracker = RingAndRFTracker(rf, beam)
+        return beam, profile, tracker
+
+    def test_tracking_map_vs_loop(self):
+        beam, profile, tracker = self.make_objects()
+        beam_m, profile_m, tracker_m = self.make_objects()
+
+        turns = []
+        turns_m = []
+        for i in range(1, self.N_t + 1):
+            tracker.track()
+            profile.track()
+            if (i % 10) == 0:
+                turns.append(tracker.counter[0])
+
+        tracking_map = TrackingMap(
+            [tracker_m, profile_m,
+             (lambda: turns_m.append(tracker_m.counter[0]), 10)])
+        tracking_map.track(self.N_t // 2)
+        tracking_map.track(self.N_t - self.N_t // 2)
+
+        np.testing.assert_array_equal(beam.dt, beam_m.dt)
+        np.testing.assert_array_equal(profile.n_macroparticles,
+                                      profile_m.n_macroparticles)
+        self.assertEqual(turns, turns_m)
+        self.assertEqual(tracking_map.counter, self.N_t)
+
+    def test_timing(self):
+        beam, profile, tracker = self.make_objects()
+        tracking_map = TrackingMap([tracker, profile, (profile, 5)],
+                                   record_turns=True)
+        tracking_map.track(20)
+
+        self.assertEqual(tracking_map.names,
+                         ['RingAndRFTracker', 'Profile', 'Profile (2)'])
+        np.testing.assert_array_equal(tracking_map.calls, [20, 20, 4])
+        self.assertTrue(np.all(tracking_map.elapsed > 0))
+        self.assertEqual(len(tracking_map.turn_timing), 20)
+        np.testing.assert_allclose(np.sum(tracking_map.turn_timing, axis=0),
+                                   tracking_map.elapsed)
+        self.assertIn('RingAndRFTracker', tracking_map.timing_report())
+
+        tracking_map.reset_timing()
+        self.assertEqual(np.sum(tracking_map.calls), 0)
+
+    def test_wrong_element(self):
+        with self.assertRaises(RuntimeError):
+            TrackingMap([1.])
+        beam, profile, tracker = self.make_objects()
+        with self.assertRaises(RuntimeError):
+            TrackingMap([(tracker, 0)])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
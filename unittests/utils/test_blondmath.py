@@ -14,10 +14,22 @@ Unittest for utils.bmath
 """
 
 import unittest
+import os
+import ctypes
 import numpy as np
+from unittest import mock
 # import inspect
 
+import blond
 from blond.utils import bmath as bm
+from blond.utils import bphysics_wrap
+from blond.utils import autotuner
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.trackers.tracker import RingAndRFTracker
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import CutOptions, Profile
 
 
 class TestSin(unittest.TestCase):
@@ -454,6 +466,191 @@ class TestSort(unittest.TestCase):
         np.testing.assert_equal(y, y2)
 
 
+class TestLibraryVariants(unittest.TestCase):
+
+    def track(self):
+        ring = Ring(26658.883, 1./55.759505**2, 450e9, Proton(), 10)
+        rf = RFStation(ring, [35640], [6e6], [0])
+        beam = Beam(ring, 100000, 1e9)
+        bigaussian(ring, rf, beam, 0.1e-9, seed=1)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]))
+        tracker = RingAndRFTracker(rf, beam, interpolation=True,
+                                   Profile=profile)
+        for i in range(10):
+            profile.track()
+            tracker.track()
+        return beam.dt, beam.dE, profile.n_macroparticles
+
+    def test_loaded_variant(self):
+        self.assertIn(blond.get_libblond_variant(),
+                      [variant for variant, features in
+                       blond.libblond_variants] + ['generic'])
+        self.assertTrue(os.path.isfile(blond.libblond_path))
+        if blond.get_libblond_variant() != 'generic':
+            self.assertTrue(blond.cpu_features().issuperset(
+                dict(blond.libblond_variants)[blond.get_libblond_variant()]))
+
+    def test_variants_agree(self):
+        extension = os.path.splitext(blond.libblond_path)[1]
+        generic = ctypes.CDLL(os.path.join(blond.basepath, 'cpp_routines',
+                                           'libblond' + extension))
+        with mock.patch.object(bphysics_wrap, '__lib', generic):
+            dt, dE, histogram = self.track()
+
+        features = blond.cpu_features()
+        for variant, needed in blond.libblond_variants:
+            libpath = os.path.join(blond.basepath, 'cpp_routines',
+                                   'libblond_' + variant + extension)
+            if not (os.path.isfile(libpath) and
+                    features.issuperset(needed)):
+                continue
+            with mock.patch.object(bphysics_wrap, '__lib',
+                                   ctypes.CDLL(libpath)):
+                dt_v, dE_v, histogram_v = self.track()
+            np.testing.assert_allclose(dt_v, dt, rtol=1e-10, atol=0)
+            np.testing.assert_allclose(dE_v, dE, rtol=1e-8, atol=1e-3)
+            np.testing.assert_allclose(histogram_v, histogram, atol=2)
+
+
+class TestNumThreads(unittest.TestCase):
+
+    def setUp(self):
+        self.num_threads = bm.get_num_threads()
+
+    def tearDown(self):
+        bm.disable_autotuning()
+        bm.set_num_threads(self.num_threads)
+
+    def track(self, n_turns):
+        ring = Ring(26658.883, 1./55.759505**2, 450e9, Proton(), n_turns)
+        rf = RFStation(ring, [35640], [6e6], [0])
+        beam = Beam(ring, 10000, 1e9)
+        bigaussian(ring, rf, beam, 0.1e-9, seed=1)
+        tracker = RingAndRFTracker(rf, beam)
+        for i in range(n_turns):
+            tracker.track()
+        return beam.dt, beam.dE
+
+    def test_set_num_threads(self):
+        bm.set_num_threads(1)
+        self.assertEqual(bm.get_num_threads(), 1)
+        bm.set_num_threads(2)
+        self.assertIn(bm.get_num_threads(), [1, 2])
+
+    def test_set_num_threads_invalid(self):
+        with self.assertRaises(RuntimeError):
+            bm.set_num_threads(0)
+
+    def test_autotuning(self):
+        dt, dE = self.track(6)
+
+        bm.enable_autotuning(kernels=['kick', 'drift'], thread_counts=[1, 2],
+                             n_calls=2)
+        self.assertEqual(bm.autotuning_report(), {'kick': {},
+                                                  'drift': {}})
+        dt_tuned, dE_tuned = self.track(6)
+        report = bm.autotuning_report()
+        self.assertEqual(list(report['kick']), [16384])
+        self.assertIn(report['kick'][16384], [1, 2])
+        self.assertIn(report['drift'][16384], [1, 2])
+        self.assertEqual(bm.get_num_threads(), self.num_threads)
+        np.testing.assert_array_equal(dt_tuned, dt)
+        np.testing.assert_array_equal(dE_tuned, dE)
+
+        bm.disable_autotuning()
+        self.assertEqual(bm.autotuning_report(), {})
+
+    def test_autotuning_size(self):
+        calls = []
+
+        def kernel(x):
+            calls.append(len(x))
+
+        tuned = autotuner.AutotunedKernel('kernel', kernel, [1, 2], 1,
+                                          n_calls=1)
+        for i in range(2):
+            tuned(np.zeros(100))
+        self.assertEqual(tuned.num_threads.keys(), {128})
+        # A new problem size is tuned again
+        tuned(np.zeros(10000))
+        self.assertEqual(tuned.num_threads.keys(), {128})
+        tuned(np.zeros(10000))
+        self.assertEqual(tuned.num_threads.keys(), {128, 16384})
+        self.assertEqual(calls, [100, 100, 10000, 10000])
+
+        tuned.reset()
+        self.assertEqual(tuned.num_threads, {})
+
+    def test_autotuning_unknown_kernel(self):
+        with self.assertRaises(RuntimeError):
+            bm.enable_autotuning(kernels=['not_a_kernel'])
+
+
+class TestRandom(unittest.TestCase):
+
+    def setUp(self):
+        self.num_threads = bm.get_num_threads()
+
+    def tearDown(self):
+        bm.set_num_threads(self.num_threads)
+
+    def test_random_normal(self):
+        x = bm.random_normal(1000001, seed=1, loc=2., scale=3.)
+        self.assertAlmostEqual(np.mean(x), 2., delta=0.01)
+        self.assertAlmostEqual(np.std(x), 3., delta=0.01)
+        # Independent streams and seeds
+        self.assertLess(abs(np.corrcoef(x[:-1], bm.random_normal(
+            1000000, seed=1, stream=1))[0, 1]), 0.005)
+        self.assertLess(abs(np.corrcoef(x[:-1], bm.random_normal(
+            1000000, seed=2))[0, 1]), 0.005)
+        # Numbers depend only on their index
+        np.testing.assert_array_equal(bm.random_normal(11, seed=1, loc=2.,
+                                                       scale=3.), x[:11])
+
+    def test_random_uniform(self):
+        x = bm.random_uniform(1000000, seed=1, low=-1., high=3.)
+        self.assertGreater(np.min(x), -1.)
+        self.assertLess(np.max(x), 3.)
+        self.assertAlmostEqual(np.mean(x), 1., delta=0.01)
+        counts = np.histogram(x, bins=10, range=(-1., 3.))[0]
+        self.assertLess(np.max(np.abs(counts - 1e5)), 2e3)
+
+    def test_thread_independence(self):
+        bm.set_num_threads(1)
+        x = bm.random_normal(100001, seed=7, stream=3)
+        y = bm.random_uniform(100001, seed=7, stream=3)
+        bm.set_num_threads(3)
+        np.testing.assert_array_equal(bm.random_normal(100001, seed=7,
+                                                       stream=3), x)
+        np.testing.assert_array_equal(bm.random_uniform(100001, seed=7,
+                                                        stream=3), y)
+
+    def test_single_precision(self):
+        x = bm.random_normal(1001, seed=7)
+        result = np.empty(1001, dtype=np.float32)
+        bm.random_normal(1001, seed=7, result=result)
+        np.testing.assert_allclose(result, x, rtol=1e-6, atol=1e-6)
+
+    def test_bigaussian(self):
+        ring = Ring(26658.883, 1./55.759505**2, 450e9, Proton(), 1)
+        rf = RFStation(ring, [35640], [6e6], [0])
+        beam = Beam(ring, 100000, 1e9)
+        np.random.seed(10)
+        state = np.random.get_state()[1].copy()
+        bigaussian(ring, rf, beam, 0.1e-9, seed=1, reinsertion=True,
+                   random_generator='philox')
+        # The global generator is untouched
+        np.testing.assert_array_equal(np.random.get_state()[1], state)
+        self.assertAlmostEqual(np.std(beam.dt) / 0.1e-9, 1., delta=0.02)
+        dt = beam.dt.copy()
+        bigaussian(ring, rf, beam, 0.1e-9, seed=1, reinsertion=True,
+                   random_generator='philox')
+        np.testing.assert_array_equal(beam.dt, dt)
+        with self.assertRaises(RuntimeError):
+            bigaussian(ring, rf, beam, 0.1e-9, random_generator='mt')
+
+
 if __name__ == '__main__':
 
     unittest.main()
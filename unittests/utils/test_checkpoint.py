@@ -0,0 +1,175 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for utils.checkpoint
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltageFreq, TotalInducedVoltage
+from blond.impedances.impedance_sources import Resonators
+from blond.llrf.cavity_feedback import SPSCavityFeedback
+from blond.trackers.tracker import RingAndRFTracker
+from blond.utils.checkpoint import save_checkpoint, load_checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    # Run before every test
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint')
+
+    # Run after every test
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def simulation(self, feedback=False):
+        ring = Ring(2 * np.pi * 1100.009, 1 / 18.**2, 25.92e9, Proton(), 40)
+        rf = RFStation(ring, 4620, 4.5e6, 0.)
+        beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, rf, beam, 1e-9, seed=1234, reinsertion=False)
+        profile = Profile(beam, CutOptions(cut_left=-1.5 * rf.t_rf[0, 0],
+                                           cut_right=2.5 * rf.t_rf[0, 0],
+                                           n_slices=256))
+        profile.track()
+        resonators = Resonators(5e5, 200.2e6, 100)
+        impedance = InducedVoltageFreq(beam, profile, [resonators],
+                                       frequency_resolution=1e5,
+                                       multi_turn_wake=True, RFParams=rf)
+        total_induced_voltage = TotalInducedVoltage(beam, profile,
+                                                    [impedance])
+        cavity_feedback = None
+        if feedback:
+            cavity_feedback = SPSCavityFeedback(rf, beam, profile, turns=5)
+        tracker = RingAndRFTracker(rf, beam, Profile=profile,
+                                   TotalInducedVoltage=total_induced_voltage,
+                                   CavityFeedback=cavity_feedback,
+                                   interpolation=True)
+        return {'tracker': tracker, 'profile': profile,
+                'induced_voltage': total_induced_voltage,
+                'cavity_feedback': cavity_feedback}
+
+    def track(self, objects, n_turns):
+        for i in range(n_turns):
+            objects['profile'].track()
+            objects['induced_voltage'].track()
+            if objects['cavity_feedback'] is not None:
+                objects['cavity_feedback'].track()
+            objects['tracker'].track()
+            # Random kicks, e.g. of synchrotron radiation
+            objects['tracker'].beam.dE += 1e3 * np.random.randn(
+                objects['tracker'].beam.n_macroparticles)
+
+    def assert_same_state(self, objects, reference):
+        beam, beam_ref = objects['tracker'].beam, reference['tracker'].beam
+        np.testing.assert_array_equal(beam.dt, beam_ref.dt)
+        np.testing.assert_array_equal(beam.dE, beam_ref.dE)
+        np.testing.assert_array_equal(beam.id, beam_ref.id)
+        rf, rf_ref = objects['tracker'].rf_params, reference['tracker'].rf_params
+        self.assertEqual(rf.counter[0], rf_ref.counter[0])
+        np.testing.assert_array_equal(rf.phi_rf, rf_ref.phi_rf)
+        np.testing.assert_array_equal(rf.omega_rf, rf_ref.omega_rf)
+        np.testing.assert_array_equal(
+            objects['induced_voltage'].induced_voltage_list[0].mtw_memory,
+            reference['induced_voltage'].induced_voltage_list[0].mtw_memory)
+
+    def test_restart(self):
+        np.random.seed(1)
+        reference = self.simulation()
+        self.track(reference, 5)
+        save_checkpoint(self.checkpoint, reference)
+        self.track(reference, 10)
+
+        for mmap_mode in ['c', None]:
+            objects = load_checkpoint(self.checkpoint, mmap_mode=mmap_mode)
+            # Objects referenced by several objects are restored once
+            self.assertIs(objects['tracker'].beam, objects['profile'].Beam)
+            self.assertIs(objects['tracker'].rf_params.counter,
+                          objects['induced_voltage'].induced_voltage_list[0]
+                          .RFParams.counter)
+            if mmap_mode is not None:
+                self.assertIsInstance(objects['tracker'].beam.dt, np.memmap)
+            self.track(objects, 10)
+            self.assert_same_state(objects, reference)
+
+    def test_copy_on_write(self):
+        objects = self.simulation()
+        save_checkpoint(self.checkpoint, objects)
+        dE = objects['tracker'].beam.dE.copy()
+
+        restored = load_checkpoint(self.checkpoint)
+        restored['tracker'].beam.dE += 1.
+        restored = load_checkpoint(self.checkpoint)
+        np.testing.assert_array_equal(restored['tracker'].beam.dE, dE)
+
+        # A new checkpoint replaces the previous one
+        objects['tracker'].beam.dE += 1.
+        save_checkpoint(self.checkpoint, objects)
+        restored = load_checkpoint(self.checkpoint, mmap_mode=None)
+        np.testing.assert_array_equal(restored['tracker'].beam.dE, dE + 1.)
+        self.assertEqual(os.listdir(self.directory), ['checkpoint'])
+
+    def test_interrupted(self):
+        objects = self.simulation()
+        save_checkpoint(self.checkpoint, objects)
+        files = sorted(os.listdir(self.checkpoint))
+        dE = objects['tracker'].beam.dE.copy()
+
+        # Saving fails after the arrays are written, the previous checkpoint
+        # is kept complete
+        objects['tracker'].beam.dE += 1.
+        objects['callback'] = lambda: None
+        with self.assertRaises(Exception):
+            save_checkpoint(self.checkpoint, objects)
+        self.assertEqual(sorted(os.listdir(self.checkpoint)), files)
+        restored = load_checkpoint(self.checkpoint, mmap_mode=None)
+        np.testing.assert_array_equal(restored['tracker'].beam.dE, dE)
+
+        # The arrays of the previous checkpoint are removed
+        del objects['callback']
+        save_checkpoint(self.checkpoint, objects)
+        self.assertEqual(len(os.listdir(self.checkpoint)), len(files))
+        self.assertEqual(set(os.listdir(self.checkpoint)) & set(files),
+                         {'state.pkl'})
+        restored = load_checkpoint(self.checkpoint, mmap_mode=None)
+        np.testing.assert_array_equal(restored['tracker'].beam.dE, dE + 1.)
+
+    def test_cavity_feedback(self):
+        np.random.seed(2)
+        reference = self.simulation(feedback=True)
+        self.track(reference, 2)
+        save_checkpoint(self.checkpoint, reference)
+        self.track(reference, 3)
+
+        objects = load_checkpoint(self.checkpoint)
+        self.track(objects, 3)
+        self.assert_same_state(objects, reference)
+        for otfb, otfb_ref in [(objects['cavity_feedback'].OTFB_4,
+                                reference['cavity_feedback'].OTFB_4),
+                               (objects['cavity_feedback'].OTFB_5,
+                                reference['cavity_feedback'].OTFB_5)]:
+            np.testing.assert_array_equal(otfb.V_coarse_tot,
+                                          otfb_ref.V_coarse_tot)
+            np.testing.assert_array_equal(otfb.V_fine_tot, otfb_ref.V_fine_tot)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
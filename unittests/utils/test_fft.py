@@ -0,0 +1,158 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for utils.bfft
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.distributions import bigaussian
+from blond.beam.profile import Profile, CutOptions
+from blond.impedances.impedance import InducedVoltageFreq, \
+    InducedVoltageTime, TotalInducedVoltage
+from blond.impedances.impedance_sources import Resonators
+from blond.utils import bfft
+
+
+class TestRealFFT(unittest.TestCase):
+
+    # Run after every test
+    def tearDown(self):
+        bfft.set_backend('numpy')
+
+    def test_numpy(self):
+        np.random.seed(0)
+        x = np.random.randn(300)
+        for n in [256, 300, 375, 512]:
+            plan = bfft.RealFFT(n)
+            # A new array, not a copy into a buffer
+            spectrum = plan.rfft(x)
+            np.testing.assert_array_equal(spectrum, np.fft.rfft(x, n))
+            np.testing.assert_array_equal(plan.irfft(spectrum),
+                                          np.fft.irfft(spectrum, n))
+
+    def test_backends(self):
+        np.random.seed(0)
+        x = np.random.randn(3, 300)
+        for backend in bfft.available_backends():
+            for n in [256, 375, 512]:
+                plan = bfft.RealFFT(n, backend=backend, workers=2)
+                np.testing.assert_allclose(plan.rfft(x[0]),
+                                           np.fft.rfft(x[0], n), atol=1e-12)
+                # Batch of transforms along the last axis
+                spectrum = plan.rfft(x)
+                np.testing.assert_allclose(spectrum, np.fft.rfft(x, n),
+                                           atol=1e-12)
+                np.testing.assert_allclose(plan.irfft(spectrum)[:, :300],
+                                           x[:, :n], atol=1e-12)
+                # The plans are picklable, e.g. for checkpoints
+                copy = pickle.loads(pickle.dumps(plan))
+                np.testing.assert_allclose(copy.rfft(x[1]), plan.rfft(x[1]),
+                                           atol=1e-12)
+
+    def test_real_fft(self):
+        self.assertIs(bfft.real_fft(1000), bfft.real_fft(1000))
+        self.assertEqual(bfft.get_backend(), ('numpy', 1))
+        bfft.set_backend('scipy', workers=None)
+        plan = bfft.real_fft(1000)
+        self.assertEqual(plan.backend, 'scipy')
+        self.assertIsNot(plan, bfft.real_fft(1000, backend='numpy'))
+        with self.assertRaises(RuntimeError):
+            bfft.set_backend('fftpack')
+        with self.assertRaises(RuntimeError):
+            bfft.set_backend('scipy', workers=0)
+
+    @unittest.skipIf(bfft.pyfftw is not None, 'pyfftw is installed')
+    def test_pyfftw_missing(self):
+        with self.assertRaises(RuntimeError):
+            bfft.set_backend('pyfftw')
+        with self.assertRaises(RuntimeError):
+            bfft.RealFFT(256, backend='pyfftw')
+
+    @unittest.skipIf(bfft.pyfftw is None, 'pyfftw is not installed')
+    def test_pyfftw(self):
+        directory = tempfile.mkdtemp()
+        wisdom_file = bfft.wisdom_file
+        bfft.wisdom_file = os.path.join(directory, 'wisdom', 'fftw.pickle')
+        try:
+            np.random.seed(0)
+            x = np.random.randn(300)
+            for n in [256, 300, 375]:
+                plan = bfft.RealFFT(n, backend='pyfftw', workers=2)
+                # Input zero-padded or truncated as numpy.fft.rfft
+                spectrum = np.zeros(n // 2 + 1, dtype=complex)
+                result = plan.rfft(x, out=spectrum)
+                self.assertIs(result, spectrum)
+                np.testing.assert_allclose(spectrum, np.fft.rfft(x, n),
+                                           atol=1e-12)
+                # Results are copied out of the internal buffers
+                first = plan.rfft(x)
+                plan.rfft(2 * x)
+                np.testing.assert_allclose(first, np.fft.rfft(x, n),
+                                           atol=1e-12)
+                signal = np.zeros(n)
+                result = plan.irfft(spectrum, out=signal)
+                self.assertIs(result, signal)
+                np.testing.assert_allclose(signal, np.fft.irfft(spectrum, n),
+                                           atol=1e-12)
+                copy = pickle.loads(pickle.dumps(plan))
+                np.testing.assert_allclose(copy.rfft(x), spectrum,
+                                           atol=1e-12)
+            self.assertTrue(os.path.isfile(bfft.wisdom_file))
+        finally:
+            bfft.wisdom_file = wisdom_file
+            shutil.rmtree(directory)
+
+    def test_induced_voltage(self):
+        ring = Ring(2 * np.pi * 1100.009, 1 / 18.**2, 25.92e9, Proton(), 10)
+        rf = RFStation(ring, 4620, 4.5e6, 0.)
+        beam = Beam(ring, 100000, 1e11)
+        bigaussian(ring, rf, beam, 1e-9, seed=1234, reinsertion=False)
+        profile = Profile(beam, CutOptions(cut_left=0, cut_right=rf.t_rf[0, 0],
+                                           n_slices=125))
+        profile.track()
+        resonators = Resonators(5e5, 200.2e6, 100)
+
+        voltages = {}
+        for backend in bfft.available_backends():
+            bfft.set_backend(backend)
+            objects = [
+                InducedVoltageFreq(beam, profile, [resonators],
+                                   frequency_resolution=2e6),
+                InducedVoltageTime(beam, profile, [resonators]),
+                InducedVoltageFreq(beam, profile, [resonators],
+                                   frequency_resolution=2e6,
+                                   multi_turn_wake=True, RFParams=rf,
+                                   mtw_mode='freq')]
+            for induced_voltage in objects:
+                self.assertEqual(induced_voltage.fft.backend, backend)
+            total_induced_voltage = TotalInducedVoltage(beam, profile,
+                                                        objects)
+            total_induced_voltage.induced_voltage_sum()
+            total_induced_voltage.induced_voltage_sum()
+            voltages[backend] = total_induced_voltage.induced_voltage
+
+        for backend in voltages:
+            np.testing.assert_allclose(
+                voltages[backend], voltages['numpy'], rtol=0,
+                atol=1e-10 * np.max(np.abs(voltages['numpy'])))
+
+
+if __name__ == '__main__':
+
+    unittest.main()